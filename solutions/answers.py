@@ -0,0 +1,129 @@
+"""
+Persistent answer store, consulted by the runner and batch mode
+
+An answer is fully determined by the day, part and variant, the input's
+bytes, any extra solve() arguments, e.g. a sample's SAMPLE_KWARGS, and
+the code that ran. The store keys answers on exactly that, so an
+unchanged solver on an unchanged input is answered from disk:
+
+    (day, part, variant, input digest, code digest, args)
+
+The code digest covers the solver module's source and every module of
+the solutions package it imports, directly or not, e.g. grid.py or
+search.py. Editing any of them changes the digest, so stale answers are
+never read back, only left behind; clear() drops them.
+
+Entries live in one SQLite file, answers.sqlite3 under aoc_tools'
+CACHE_DIR, shared safely by concurrent batch workers. A store pickles
+as its path, so it can be handed to worker processes.
+"""
+import hashlib
+import inspect
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+from solutions import aoc_tools
+
+PACKAGE = __package__
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    day INTEGER, part INTEGER, variant TEXT,
+    input TEXT, code TEXT, args TEXT, answer TEXT,
+    PRIMARY KEY (day, part, variant, input, code, args)
+)
+"""
+# code digests by module name; source does not change under a process
+_code_digests = {}
+
+
+def package_imports(module) -> set[str]:
+    """Names of the package's modules that module uses, itself included"""
+    seen = set()
+    todo = [module.__name__]
+    while todo:
+        name = todo.pop()
+        if name in seen or not (mod := sys.modules.get(name)):
+            continue
+        seen.add(name)
+        for obj in vars(mod).values():
+            # imported modules, and functions or classes imported from them
+            source = (
+                obj.__name__
+                if inspect.ismodule(obj)
+                else getattr(obj, "__module__", None)
+            )
+            if isinstance(source, str) and source.startswith(f"{PACKAGE}."):
+                todo.append(source)
+    return seen
+
+
+def code_digest(module) -> str:
+    """Hex digest of the source of module and every package module it uses"""
+    if (digest := _code_digests.get(module.__name__)) is None:
+        h = hashlib.blake2b(digest_size=16)
+        for name in sorted(package_imports(module)):
+            h.update(name.encode())
+            h.update(Path(sys.modules[name].__file__).read_bytes())
+        digest = _code_digests[module.__name__] = h.hexdigest()
+    return digest
+
+
+class AnswerStore:
+    """Answers keyed by solver, part, input, code and arguments"""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or aoc_tools.CACHE_DIR / "answers.sqlite3")
+        self._conn = None
+
+    def __getstate__(self):
+        # connections don't pickle; each process opens its own
+        return {"path": self.path, "_conn": None}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # autocommit; a busy writer elsewhere is waited on, not an error
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(SCHEMA)
+        return self._conn
+
+    def key(
+        self, solver, part: int, fp, kwargs: dict = None, digest: str = None
+    ) -> tuple:
+        """digest, if given, is fp's file_digest, saving a read of the input"""
+        return (
+            solver.day,
+            part,
+            solver.variant,
+            digest or aoc_tools.file_digest(str(fp)),
+            code_digest(solver.load()),
+            json.dumps(kwargs or {}, sort_keys=True),
+        )
+
+    def get(self, key: tuple):
+        """Returns (True, answer) if stored, else (False, None)"""
+        row = self.conn.execute(
+            "SELECT answer FROM answers WHERE day=? AND part=? AND variant=?"
+            " AND input=? AND code=? AND args=?",
+            key,
+        ).fetchone()
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def put(self, key: tuple, answer):
+        """Stores answer, unless it has no JSON form"""
+        try:
+            answer = json.dumps(answer)
+        except TypeError:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*key, answer),
+        )
+
+    def clear(self) -> int:
+        """Deletes every entry; returns how many there were"""
+        return self.conn.execute("DELETE FROM answers").rowcount
@@ -1,13 +1,245 @@
+"""
+Shared input readers
+
+read_line() is the str reader every day uses. It reads in text mode by
+default; set USE_MMAP, or AOC_MMAP=1 in the environment, to serve the
+same lines from a memory map instead.
+
+Every reader takes STDIN, "-", in place of a path. read_line() streams
+it a line at a time, so the per-line days solve input of any length in
+constant memory; pick_input() resolves what a day's main() reads:
+
+    cat input.txt | python d12/memo12.py -i -
+
+The bytes-level helpers skip decoding altogether and work on a mapped
+buffer directly:
+
+    buf = map_file("input.txt")
+    for line in iter_lines(buf): ...    # memoryview per line, no copies
+    nums = ints(buf)                    # every int in the file
+    nums = int_array(buf)               # the same, as array("q")
+    for block in iter_blocks(buf): ...  # lines of each blank-line block
+
+Per-line token helpers take str or bytes alike, as int() parses both:
+
+    split_ints("0 3 6 9")             # [0, 3, 6, 9]; sep="," for 1,1,3
+    key_values("x=787,m=2655")        # {"x": 787, "m": 2655}
+    pairs("3 blue, 4 red", ", ", " ") # [("3", "blue"), ("4", "red")]
+    node = fixed_fields((0, 3), (7, 10), (12, 15))
+    node("AAA = (BBB, CCC)")          # ("AAA", "BBB", "CCC")
+
+Parsers decorated with @cached_parse(version) can skip parsing on
+repeat runs: with USE_PARSE_CACHE, or AOC_PARSE_CACHE=1, the parsed
+structure is saved under CACHE_DIR, keyed by the input's hash.
+"""
 from pathlib import Path
+import hashlib
+import marshal
+import mmap
+import os
+import pickle
+import re
+import sys
+from array import array
+from functools import wraps
+from operator import itemgetter
+
+USE_MMAP = os.environ.get("AOC_MMAP") == "1"
+USE_PARSE_CACHE = os.environ.get("AOC_PARSE_CACHE") == "1"
+CACHE_DIR = Path(os.environ.get("AOC_CACHE_DIR", Path.home() / ".cache" / "aoc-2023"))
+
+# path meaning standard input
+STDIN = "-"
+
+INT = re.compile(rb"-?\d+")
+# blanks out everything but digits and minus signs
+NUMERIC = bytes(c if c in b"-0123456789" else 32 for c in range(256))
+
+
+def map_file(fpath: str):
+    """
+    Returns a read-only mmap of the whole file, which stays valid after
+    the file is closed. Empty files can't be mapped, so b"" is returned,
+    nor can pipes: STDIN is read whole into bytes
+    """
+    if fpath == STDIN:
+        return sys.stdin.buffer.read()
+    with open(Path(fpath), "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
 
 def read_line(fpath: str):
     """Reads the input and yields each line"""
+    if fpath == STDIN:
+        yield from sys.stdin
+        return
+    if USE_MMAP:
+        buf = map_file(fpath)
+        if not buf:
+            # empty files map to b"", which has no readline
+            return
+        for line in iter(buf.readline, b""):
+            yield line.decode()
+        return
     fpath = Path(fpath)
     with open(fpath) as f:
         yield from f
 
 
+def pick_input(
+    sample: bool, part_two: bool, fp: str = None, samples=("sample.txt", "sample.txt")
+) -> str:
+    """fp if given, else input.txt or the sample file for the part"""
+    if fp:
+        return fp
+    return samples[part_two] if sample else "input.txt"
+
+
+def iter_lines(buf, start: int = 0, end: int = None):
+    """
+    Yields a memoryview of each line in buf[start:end], newline excluded
+    Views share memory with buf; convert with bytes() to keep one around
+    """
+    end = len(buf) if end is None else end
+    view = memoryview(buf)
+    while start < end:
+        stop = buf.find(b"\n", start, end)
+        if stop == -1:
+            stop = end
+        yield view[start:stop]
+        start = stop + 1
+
+
+def iter_blocks(buf):
+    """Yields the list of line views in each blank-line separated block"""
+    start, end = 0, len(buf)
+    while start < end:
+        # skip runs of blank lines
+        if buf[start : start + 1] == b"\n":
+            start += 1
+            continue
+        stop = buf.find(b"\n\n", start)
+        if stop == -1:
+            stop = end
+        yield list(iter_lines(buf, start, stop))
+        start = stop + 2
+
+
+def int_tokens(buf) -> list[bytes]:
+    """Every run of digits in buf, with its sign, as bytes"""
+    # translate and split both run in C, ~3x quicker than the regex;
+    # lone hyphens, e.g. seed-to-soil, become "- " and are dropped
+    return bytes(buf).translate(NUMERIC).replace(b"- ", b"  ").split()
+
+
+def ints(buf) -> list[int]:
+    """Every integer in buf, signs included, in order"""
+    try:
+        return list(map(int, int_tokens(buf)))
+    except ValueError:
+        # hyphen inside a token, e.g. a range like 1-3
+        return [int(n) for n in INT.findall(buf)]
+
+
+def int_array(buf) -> array:
+    """
+    ints(buf) as a packed array("q"), a quarter the memory of a list and
+    sliceable without copying ints; OverflowError past 64 bits
+    """
+    try:
+        return array("q", map(int, int_tokens(buf)))
+    except ValueError:
+        return array("q", map(int, INT.findall(buf)))
+
+
+def split_ints(line, sep=None) -> list[int]:
+    """Each sep-separated token of line as an int; whitespace by default"""
+    return list(map(int, line.split(sep)))
+
+
+def pairs(text, item_sep=",", kv_sep="=") -> list[tuple]:
+    """(left, right) of each item_sep-separated item, split at kv_sep"""
+    return [tuple(item.split(kv_sep, 1)) for item in text.split(item_sep)]
+
+
+def key_values(text, item_sep=",", kv_sep="=", conv=int) -> dict:
+    """{key: conv(value)} for items like x=787,m=2655"""
+    return {k: conv(v) for k, v in pairs(text, item_sep, kv_sep)}
+
+
+def fixed_fields(*spans):
+    """
+    Returns a getter of the (start, stop) spans of a fixed-width line,
+    as a tuple; slicing is done in C by itemgetter, with no regex
+    """
+    return itemgetter(*(slice(start, stop) for start, stop in spans))
+
+
+def file_digest(fpath: str) -> str:
+    """Hex blake2b digest of the file's bytes"""
+    return hashlib.blake2b(map_file(fpath), digest_size=16).hexdigest()
+
+
+def dump_obj(obj) -> bytes:
+    """
+    marshal when obj is only builtin types, as it loads fastest; pickle
+    otherwise, e.g. namedtuples. The first byte records which
+    """
+    try:
+        return b"M" + marshal.dumps(obj)
+    except ValueError:
+        return b"P" + pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_obj(data: bytes):
+    fmt, body = data[:1], memoryview(data)[1:]
+    if fmt == b"M":
+        return marshal.loads(body)
+    if fmt == b"P":
+        return pickle.loads(body)
+    raise ValueError(f"unknown cache format {fmt!r}")
+
+
+def cached_parse(version: int = 1):
+    """
+    Caches what the decorated parse(fp) returns when USE_PARSE_CACHE is set
+
+    Entries are keyed by the parser's module, name and version plus the
+    digest of the input bytes, so an edited input is re-parsed. Bump
+    version whenever the parser's output changes. The structure is
+    loaded fresh on every hit, so solvers may mutate it
+    """
+
+    def decorate(parse):
+        @wraps(parse)
+        def wrapper(fp):
+            # stdin can be read only once, so it can't be hashed first
+            if not USE_PARSE_CACHE or fp == STDIN:
+                return parse(fp)
+            key = f"{parse.__module__}.{parse.__qualname__}.v{version}"
+            path = CACHE_DIR / "parsed" / f"{key}.{file_digest(fp)}"
+            try:
+                return load_obj(path.read_bytes())
+            except FileNotFoundError:
+                pass
+            except (EOFError, ValueError, pickle.UnpicklingError):
+                # corrupt or stale format; parse again and overwrite
+                pass
+            parsed = parse(fp)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write then rename so a crash never leaves a partial entry
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(dump_obj(parsed))
+            tmp.replace(path)
+            return parsed
+
+        return wrapper
+
+    return decorate
+
+
 if __name__ == "__main__":
     # for line in read_input("../tests/sample.txt"):
     #     print(line)
@@ -0,0 +1,36 @@
+"""
+Optional NumPy backend for the grid and array days
+
+NumPy is not a dependency. When it is installed, USE_NUMPY, set by
+--numpy on the runner or bench, or AOC_NUMPY=1 in the environment,
+routes the hot loops of d9, d11, d13, d14, d16 and d21 through
+vectorized versions; answers are identical either way. Without NumPy
+the same flag warns once and every day runs pure Python as before:
+
+    if backend.enabled():
+        return solve_np(grid, part_two)
+
+Solvers import np from here, so it is None rather than an ImportError
+when NumPy is absent; only code behind enabled() may touch it.
+"""
+import logging
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+USE_NUMPY = os.environ.get("AOC_NUMPY") == "1"
+
+logger = logging.getLogger(__name__)
+_warned = False
+
+
+def enabled() -> bool:
+    """Whether to take the NumPy path: asked for, and importable"""
+    global _warned
+    if USE_NUMPY and np is None and not _warned:
+        logger.warning("numpy is not installed; running pure Python")
+        _warned = True
+    return USE_NUMPY and np is not None
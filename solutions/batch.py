@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Solves many puzzle inputs for one day in a single pool of processes
+
+Inputs are files, directories, whose every file is an input, or globs:
+
+    python -m solutions.batch 12 inputs/d12/ -o d12.jsonl --workers 4
+    python -m solutions.batch 19 'inputs/**/d19_*.txt' -v day19_named -p 2
+
+Each worker process imports the solver modules once, on its first
+input, and keeps them, along with any compiled regexes and parse
+caches, for every input after. Inputs go to the workers in chunks of
+--chunksize and are written to one JSONL file, one runner Result per
+input, variant and part, as each input finishes. With --workers 1
+everything runs in this process, in input order.
+"""
+from pathlib import Path
+import argparse
+import json
+import logging
+import sys
+from contextlib import nullcontext
+from dataclasses import asdict
+from functools import partial
+from glob import glob
+from time import perf_counter
+
+from solutions.answers import AnswerStore
+from solutions.parallel import pmap
+from solutions.runner import PACKAGE, Solver, run, select
+
+
+def expand_inputs(patterns: list[str]) -> list[Path]:
+    """Files named by each pattern, in order, without repeats"""
+    paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            paths += sorted(p for p in path.iterdir() if p.is_file())
+        elif path.is_file():
+            paths.append(path)
+        else:
+            paths += sorted(
+                p for p in map(Path, glob(pattern, recursive=True)) if p.is_file()
+            )
+    return list(dict.fromkeys(paths))
+
+
+def solve_input(
+    solvers: list[Solver], parts, answers: AnswerStore, fp: Path
+) -> list[dict]:
+    """Results of every solver and part for one input, as dicts"""
+    results = run(solvers, parts, fp=str(fp), answers=answers, digest=True)
+    return [asdict(result) for result in results]
+
+
+def batch(
+    solvers: list[Solver],
+    paths: list[Path],
+    parts=(1, 2),
+    workers: int = 1,
+    chunksize: int = 1,
+    answers: AnswerStore = None,
+):
+    """Yields result dicts as each input finishes"""
+    task = partial(solve_input, solvers, parts, answers)
+    for rows in pmap(task, paths, workers, chunksize, ordered=False):
+        yield from rows
+
+
+def main(
+    day: int,
+    inputs: list[str],
+    parts: list[int],
+    variants: list[str],
+    all_variants: bool,
+    out: str,
+    workers: int,
+    chunksize: int,
+    loglevel: str,
+    answer_cache: bool = False,
+):
+    """ """
+    logging.getLogger(PACKAGE).setLevel(loglevel)
+    solvers = select([day], variants, all_variants)
+    if not solvers:
+        raise SystemExit(f"no solvers for day {day} {variants or ''}")
+    paths = expand_inputs(inputs)
+    if not paths:
+        raise SystemExit(f"no inputs match {inputs}")
+
+    tstart = perf_counter()
+    n_results = n_errors = n_cached = 0
+    answers = AnswerStore() if answer_cache else None
+    with open(out, "w") if out != "-" else nullcontext(sys.stdout) as f:
+        for row in batch(solvers, paths, parts, workers, chunksize, answers):
+            f.write(json.dumps(row) + "\n")
+            n_results += 1
+            n_errors += row["error"] is not None
+            n_cached += row["cached"]
+    elapsed = perf_counter() - tstart
+    # stderr keeps stdout clean when it is the JSONL
+    print(
+        f"{len(paths)} inputs, {n_results} results ({n_cached} cached), "
+        f"{n_errors} errors in {elapsed:.2f} s: {len(paths) / elapsed:.1f} inputs/s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    opt = parser.add_argument
+    opt("day", type=int)
+    opt("inputs", nargs="+", help="input files, directories or globs")
+    opt("--part", "-p", type=int, choices=[1, 2], action="append")
+    opt("--variant", "-v", action="append", help="e.g. memo12; repeatable")
+    opt("--all_variants", "-a", action="store_true", default=False)
+    opt("--out", "-o", default="-", help="JSONL file; stdout if -")
+    opt("--workers", type=int, default=1, help="processes solving inputs")
+    opt("--chunksize", type=int, default=1, help="inputs per task sent to a worker")
+    opt("--loglevel", "-l", type=str.upper, default="error")
+    opt(
+        "--answer_cache",
+        action="store_true",
+        default=False,
+        help="reuse answers for unchanged code and input",
+    )
+    args = parser.parse_args()
+    main(
+        args.day,
+        args.inputs,
+        args.part or [1, 2],
+        args.variant,
+        args.all_variants,
+        args.out,
+        args.workers,
+        args.chunksize,
+        args.loglevel,
+        args.answer_cache,
+    )
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Benchmarks solve() for any subset of days, variants and parts
+
+Each solve is timed end to end, parsing included, over a few warmup
+rounds and then N timed repetitions. Stats can be saved as a JSON
+baseline; later runs are compared against it and any solver whose
+median slowed by more than the threshold is flagged as a regression.
+"""
+from pathlib import Path
+import argparse
+import json
+import logging
+import statistics
+import sys
+from dataclasses import dataclass, asdict
+from time import perf_counter_ns
+
+from solutions import aoc_tools, backend
+from solutions.runner import PACKAGE, Solver, select
+
+BASELINE = Path(__file__).parent / "bench_baseline.json"
+
+
+@dataclass
+class Stats:
+    median_ms: float
+    p95_ms: float
+    min_ms: float
+    reps: int
+
+    @classmethod
+    def from_times(cls, times_ns: list[int]):
+        times = sorted(t / 1e6 for t in times_ns)
+        # nearest-rank percentile; no interpolation for small N
+        p95 = times[max(0, -(-95 * len(times) // 100) - 1)]
+        return cls(statistics.median(times), p95, times[0], len(times))
+
+
+def bench_key(solver: Solver, part: int, fp, workers: int = 1) -> str:
+    key = f"d{solver.day}/{solver.variant}/part{part}/{Path(fp).name}"
+    # parallel timings get their own baseline entries
+    if workers > 1 and solver.parallel:
+        key += f"/w{workers}"
+    # and so do runs on the NumPy backend, and with either input mode,
+    # so a run is only ever compared against one made the same way
+    if backend.enabled():
+        key += "/np"
+    if aoc_tools.USE_MMAP:
+        key += "/mmap"
+    if aoc_tools.USE_PARSE_CACHE:
+        key += "/pc"
+    return key
+
+
+def time_solve(
+    solver: Solver,
+    fp,
+    part_two: bool,
+    sample: bool,
+    warmup: int = 1,
+    reps: int = 5,
+    workers: int = 1,
+) -> tuple:
+    """Returns the answer and the Stats of reps timed solves"""
+    for _ in range(warmup):
+        solver.solve(fp, part_two, sample, workers)
+    times = []
+    for _ in range(reps):
+        tstart = perf_counter_ns()
+        ans = solver.solve(fp, part_two, sample, workers)
+        times.append(perf_counter_ns() - tstart)
+    return ans, Stats.from_times(times)
+
+
+def benchmark(
+    solvers: list[Solver],
+    parts=(1, 2),
+    sample: bool = False,
+    warmup: int = 1,
+    reps: int = 5,
+    workers: int = 1,
+):
+    """
+    Yields (key, Stats) for each solver and part
+    Solvers that raise, e.g. for a missing input, are skipped with a warning
+    """
+    for solver in solvers:
+        for part in parts:
+            fp = solver.input_path(sample, part == 2)
+            key = bench_key(solver, part, fp, workers)
+            try:
+                _, stats = time_solve(
+                    solver, fp, part == 2, sample, warmup, reps, workers
+                )
+            except Exception as e:
+                print(f"skipping {key}: {e}", file=sys.stderr)
+                continue
+            yield key, stats
+
+
+def load_baseline(fp: Path = BASELINE) -> dict:
+    """Returns {key: Stats}; empty if no baseline saved yet"""
+    if not Path(fp).exists():
+        return {}
+    with open(fp) as f:
+        return {key: Stats(**stats) for key, stats in json.load(f).items()}
+
+
+def save_baseline(results: dict, fp: Path = BASELINE):
+    """Merges results into the baseline so partial runs keep other entries"""
+    baseline = load_baseline(fp) | results
+    with open(fp, "w") as f:
+        json.dump({k: asdict(v) for k, v in sorted(baseline.items())}, f, indent=2)
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float = 0.1) -> dict:
+    """
+    Returns {key: ratio} of new to baseline median for every key whose
+    median grew by more than threshold, e.g. 0.1 for 10%
+    """
+    regressions = {}
+    for key, stats in results.items():
+        if (base := baseline.get(key)) and base.median_ms > 0:
+            ratio = stats.median_ms / base.median_ms
+            if ratio > 1 + threshold:
+                regressions[key] = ratio
+    return regressions
+
+
+def main(
+    days: list[int],
+    parts: list[int],
+    variants: list[str],
+    all_variants: bool,
+    sample: bool,
+    warmup: int,
+    reps: int,
+    threshold: float,
+    baseline_fp: str,
+    save: bool,
+    use_mmap: bool = False,
+    parse_cache: bool = False,
+    workers: int = 1,
+    use_numpy: bool = False,
+) -> int:
+    """ """
+    # keep solver logging quiet while timing
+    logging.getLogger(PACKAGE).setLevel("WARNING")
+    aoc_tools.USE_MMAP = use_mmap or aoc_tools.USE_MMAP
+    aoc_tools.USE_PARSE_CACHE = parse_cache or aoc_tools.USE_PARSE_CACHE
+    backend.USE_NUMPY = use_numpy or backend.USE_NUMPY
+    solvers = select(days, variants, all_variants)
+    baseline = load_baseline(baseline_fp)
+    results = {}
+    print(f"{'solver':<40}{'median ms':>12}{'p95 ms':>12}{'min ms':>12}{'vs base':>10}")
+    for key, stats in benchmark(solvers, parts, sample, warmup, reps, workers):
+        results[key] = stats
+        base = baseline.get(key)
+        change = f"{stats.median_ms / base.median_ms:.2f}x" if base else "-"
+        print(
+            f"{key:<40}{stats.median_ms:>12.3f}{stats.p95_ms:>12.3f}"
+            f"{stats.min_ms:>12.3f}{change:>10}",
+            flush=True,
+        )
+
+    regressions = find_regressions(results, baseline, threshold)
+    for key, ratio in regressions.items():
+        print(f"REGRESSION {key}: median {ratio:.2f}x baseline")
+    if save:
+        save_baseline(results, baseline_fp)
+        print(f"saved {len(results)} results to {baseline_fp}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    opt = parser.add_argument
+    opt("days", nargs="*", type=int, help="days to run; all if omitted")
+    opt("--part", "-p", type=int, choices=[1, 2], action="append")
+    opt("--variant", "-v", action="append", help="e.g. memo12; repeatable")
+    opt("--all_variants", "-a", action="store_true", default=False)
+    opt("--sample", "-s", action="store_true", default=False)
+    opt("--warmup", "-w", type=int, default=1)
+    opt("--reps", "-n", type=int, default=5)
+    opt("--threshold", "-r", type=float, default=0.1, help="0.1 flags +10%%")
+    opt("--baseline", "-b", default=BASELINE)
+    opt("--save", action="store_true", default=False, help="update the baseline")
+    opt("--mmap", action="store_true", default=False, help="read inputs via mmap")
+    opt("--parse_cache", action="store_true", default=False, help="reuse parses")
+    opt("--workers", type=int, default=1, help="processes for days that split")
+    opt("--numpy", action="store_true", default=False, help="vectorize if available")
+    args = parser.parse_args()
+    sys.exit(
+        main(
+            args.days,
+            args.part or [1, 2],
+            args.variant,
+            args.all_variants,
+            args.sample,
+            args.warmup,
+            args.reps,
+            args.threshold,
+            args.baseline,
+            args.save,
+            args.mmap,
+            args.parse_cache,
+            args.workers,
+            args.numpy,
+        )
+    )
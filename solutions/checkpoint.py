@@ -0,0 +1,79 @@
+"""
+Periodic checkpoints for long simulations, so a killed run can resume
+
+d14 spins and d20 presses the button until a condition is met, which
+on large generated inputs takes hours. A solver hands its state, as a
+dict of plain values, to a Checkpoint at a point where the state is
+whole, e.g. between presses, and the Checkpoint writes it at most every
+`every` seconds:
+
+    checkpoint = Checkpoint("d20_part2", input_bytes, every=60)
+    if resume and (state := checkpoint.load()):
+        ...restore from state
+    while ...:
+        if checkpoint.due():
+            checkpoint.save({"presses": n, ...})
+    checkpoint.clear()
+
+Files live under CACHE_DIR/checkpoints, one per name and input digest,
+so a checkpoint is only ever resumed on the input it was taken from.
+They are pickled and zlib-compressed, and replaced atomically, so a
+run killed mid-save leaves the previous one intact. A finished run
+clears its file. Bump version when a solver's state layout changes;
+files of another version are ignored.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import time
+import zlib
+
+from solutions import aoc_tools
+
+CHECKPOINT_DIR = aoc_tools.CACHE_DIR / "checkpoints"
+# seconds between saves, unless a solver is given its own
+EVERY = 60
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint:
+    def __init__(self, name: str, data: bytes, every: float = EVERY, version: int = 1):
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        self.path = CHECKPOINT_DIR / f"{name}-v{version}-{digest}.ckpt"
+        self.every = every
+        self.saves = 0
+        self._last = time.monotonic()
+
+    def due(self) -> bool:
+        """Whether every seconds have passed since the last save, or the start"""
+        return time.monotonic() - self._last >= self.every
+
+    def save(self, state: dict):
+        """Writes state over the previous checkpoint"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(
+            zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+        )
+        os.replace(tmp, self.path)
+        self.saves += 1
+        self._last = time.monotonic()
+        logger.debug(f"checkpoint {self.saves} saved to {self.path}")
+
+    def load(self) -> dict:
+        """The last saved state, or None if there is none or it is unreadable"""
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            return pickle.loads(zlib.decompress(data))
+        except (zlib.error, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+
+    def clear(self):
+        """Removes the checkpoint, once the run it belongs to has finished"""
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Runs every variant of one day on the same inputs and compares them
+
+    python -m solutions.compare 12 --sample
+    python -m solutions.compare 12 inputs/d12/ -p 2 --reps 3 --memory
+    python -m solutions.compare 12 big.txt -x day12   # skip the brute force
+
+Each variant is timed as bench times it, a warmup and then --reps runs,
+on each input and part. Their answers must agree: any disagreement is
+printed and the exit status is 1. A table per input and part ranks the
+variants by median time, against the fastest; --memory adds the peak
+traced MiB of one more, untimed, run. A variant still going after
+--timeout seconds on an input is recorded as timed out, and the rest
+are compared without it. A summary closes with the fastest
+variant for each input, with its size, to choose between them by size.
+"""
+from pathlib import Path
+import argparse
+import logging
+import sys
+from dataclasses import dataclass
+
+from solutions import aoc_tools, backend
+from solutions.batch import expand_inputs
+from solutions.bench import Stats, time_solve
+from solutions.runner import PACKAGE, Solver, run, select
+from solutions.timing import deadline
+
+
+@dataclass
+class Row:
+    variant: str
+    answer: int = None
+    error: str = None
+    stats: Stats = None
+    peak_mib: float = None
+
+
+def compare(
+    solvers: list[Solver],
+    fp,
+    part: int,
+    sample: bool = False,
+    warmup: int = 1,
+    reps: int = 5,
+    memory: bool = False,
+    timeout: float = 120,
+) -> list[Row]:
+    """Rows for every solver on one input and part, fastest first"""
+    rows = []
+    for solver in solvers:
+        row = Row(solver.variant)
+        try:
+            with deadline(timeout):
+                row.answer, row.stats = time_solve(
+                    solver, fp, part == 2, sample, warmup, reps
+                )
+        except TimeoutError:
+            row.error = f"timed out after {timeout:g} s"
+        except Exception as e:
+            row.error = f"{type(e).__name__}: {e}"
+        if memory and row.error is None:
+            with deadline(timeout):
+                result = next(run([solver], [part], sample, fp, memory=True))
+            if result.error is None:
+                row.peak_mib = result.memory["peak_mib"]["total"]
+        rows.append(row)
+    # errors last
+    return sorted(rows, key=lambda r: (r.stats is None, r.stats and r.stats.median_ms))
+
+
+def agree(rows: list[Row]) -> bool:
+    """Whether every variant that finished gave the same answer"""
+    return len({repr(row.answer) for row in rows if row.error is None}) <= 1
+
+
+def print_table(rows: list[Row], title: str):
+    print(f"\n{title}")
+    print(
+        f"{'variant':<20}{'answer':>20}{'median ms':>12}{'min ms':>12}"
+        f"{'vs best':>10}{'peak MiB':>10}"
+    )
+    best = rows[0].stats.median_ms if rows and rows[0].stats else None
+    for row in rows:
+        if row.error is not None:
+            print(f"{row.variant:<20}  error: {row.error}")
+            continue
+        ratio = f"{row.stats.median_ms / best:.2f}x" if best else "-"
+        peak = "-" if row.peak_mib is None else f"{row.peak_mib:.2f}"
+        print(
+            f"{row.variant:<20}{str(row.answer):>20}{row.stats.median_ms:>12.3f}"
+            f"{row.stats.min_ms:>12.3f}{ratio:>10}{peak:>10}"
+        )
+
+
+def main(
+    day: int,
+    inputs: list[str],
+    parts: list[int],
+    variants: list[str],
+    exclude: list[str],
+    sample: bool,
+    warmup: int,
+    reps: int,
+    memory: bool,
+    use_numpy: bool = False,
+    timeout: float = 120,
+) -> int:
+    """ """
+    # keep solver logging quiet while timing
+    logging.getLogger(PACKAGE).setLevel("WARNING")
+    backend.USE_NUMPY = use_numpy or backend.USE_NUMPY
+    solvers = [
+        s for s in select([day], variants, True) if s.variant not in (exclude or [])
+    ]
+    if len(solvers) < 2:
+        raise SystemExit(f"day {day} has {len(solvers)} variant(s) to compare")
+    paths = expand_inputs(inputs) if inputs else None
+    if inputs and not paths:
+        raise SystemExit(f"no inputs match {inputs}")
+
+    disagreements = []
+    fastest = []
+    for part in parts:
+        # every variant of a day shares its directory, so its inputs too
+        for fp in paths or [solvers[0].input_path(sample, part == 2)]:
+            rows = compare(solvers, fp, part, sample, warmup, reps, memory, timeout)
+            print_table(rows, f"d{day} part {part}  {fp}")
+            if not agree(rows):
+                answers = {r.variant: r.answer for r in rows if r.error is None}
+                print(f"MISMATCH {answers}")
+                disagreements.append((fp, part))
+            elif rows[0].stats:
+                fastest.append((fp, part, rows[0]))
+
+    print(f"\n{'input':<40}{'part':>6}{'KiB':>10}  fastest")
+    for fp, part, row in fastest:
+        kib = Path(fp).stat().st_size / 1024 if fp != aoc_tools.STDIN else 0
+        print(
+            f"{Path(fp).name:<40}{part:>6}{kib:>10.1f}  "
+            f"{row.variant} ({row.stats.median_ms:.3f} ms)"
+        )
+    return 1 if disagreements else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    opt = parser.add_argument
+    opt("day", type=int)
+    opt("inputs", nargs="*", help="input files, directories or globs")
+    opt("--part", "-p", type=int, choices=[1, 2], action="append")
+    opt("--variant", "-v", action="append", help="e.g. memo12; repeatable")
+    opt("--exclude", "-x", action="append", help="variant to skip; repeatable")
+    opt("--sample", "-s", action="store_true", default=False)
+    opt("--warmup", "-w", type=int, default=1)
+    opt("--reps", "-n", type=int, default=5)
+    opt("--memory", action="store_true", default=False, help="peak MiB per variant")
+    opt("--numpy", action="store_true", default=False, help="vectorize if available")
+    opt(
+        "--timeout", type=float, default=120, help="seconds before a variant is dropped"
+    )
+    args = parser.parse_args()
+    sys.exit(
+        main(
+            args.day,
+            args.inputs,
+            args.part or [1, 2],
+            args.variant,
+            args.exclude,
+            args.sample,
+            args.warmup,
+            args.reps,
+            args.memory,
+            args.numpy,
+            args.timeout,
+        )
+    )
@@ -0,0 +1,148 @@
+"""
+Cycle detection for deterministic, iterated state
+
+A state that is stepped by a fixed rule eventually repeats; from then
+on it cycles. Steps are numbered from 0, the initial state, and a
+Cycle(start, period) says step start + period is the same state as step
+start. Every step at or past start is then equivalent to
+
+    start + (n - start) % period
+
+Callers identify states by a fingerprint: any hashable, exact summary
+of the state, such as the bytes of a grid. Fingerprints are compared
+for equality, never reduced to hash(), so distinct states cannot
+collide.
+
+History is the first-seen mode, driven by the caller's own loop. It
+spends one dict lookup per step and remembers a value per step, e.g.
+the load on a grid, to answer "value at step N" once a cycle is found:
+
+    history = History()
+    history.add(cells, load(cells))
+    while not history.add(cells := spin(cells), load(cells)):
+        pass
+    history.at(1_000_000_000)
+
+first_seen() runs that loop for a step function. brent() and floyd()
+keep only a couple of states, not every fingerprint seen, at the cost
+of stepping more than once through the first start + period states;
+state_at() then answers queries by stepping again.
+"""
+from collections import namedtuple
+
+Cycle = namedtuple("Cycle", "start period")
+
+
+def _identity(state):
+    return state
+
+
+class History:
+    """First-seen index of fingerprints, plus one value per step"""
+
+    def __init__(self):
+        # fingerprint -> step first seen
+        self.seen = {}
+        self.values = []
+        self.cycle = None
+
+    def __len__(self) -> int:
+        """Steps recorded"""
+        return len(self.values)
+
+    def add(self, fingerprint, value=None) -> Cycle:
+        """
+        Records the next step; returns its Cycle if fingerprint was seen
+        before, else None. A repeated step is not recorded
+        """
+        first = self.seen.get(fingerprint)
+        if first is not None:
+            self.cycle = Cycle(first, len(self.values) - first)
+            return self.cycle
+        self.seen[fingerprint] = len(self.values)
+        self.values.append(value)
+        return None
+
+    def index(self, n: int) -> int:
+        """The recorded step equivalent to step n"""
+        if n < len(self.values):
+            return n
+        if self.cycle is None:
+            raise IndexError(f"step {n} is past the {len(self.values)} recorded")
+        start, period = self.cycle
+        return start + (n - start) % period
+
+    def at(self, n: int):
+        """Value at step n, using the cycle past the end of the history"""
+        return self.values[self.index(n)]
+
+
+def first_seen(step, state, fingerprint=None, value=None, limit: int = None):
+    """
+    Steps state until its fingerprint repeats, or for limit steps
+    Returns the History; value(state) is recorded per step if given
+    """
+    fingerprint = fingerprint or _identity
+    history = History()
+    n = 0
+    while not history.add(fingerprint(state), value(state) if value else None):
+        if limit is not None and n == limit:
+            break
+        state = step(state)
+        n += 1
+    return history
+
+
+def floyd(step, state, fingerprint=None) -> Cycle:
+    """Tortoise and hare; a hare twice as fast meets the tortoise in the cycle"""
+    key = fingerprint or _identity
+    tortoise, hare = step(state), step(step(state))
+    while key(tortoise) != key(hare):
+        tortoise, hare = step(tortoise), step(step(hare))
+    # the meeting point is a multiple of period steps from the start;
+    # walking from there and from step 0 in lockstep meets at start
+    start = 0
+    tortoise = state
+    while key(tortoise) != key(hare):
+        tortoise, hare = step(tortoise), step(hare)
+        start += 1
+    period = 1
+    hare = step(tortoise)
+    while key(tortoise) != key(hare):
+        hare = step(hare)
+        period += 1
+    return Cycle(start, period)
+
+
+def brent(step, state, fingerprint=None) -> Cycle:
+    """
+    Brent's teleporting tortoise; finds the period first, in fewer steps
+    than floyd, then the start with a hare period steps ahead
+    """
+    key = fingerprint or _identity
+    power = period = 1
+    tortoise, hare = key(state), step(state)
+    while tortoise != key(hare):
+        if power == period:
+            tortoise = key(hare)
+            power *= 2
+            period = 0
+        hare = step(hare)
+        period += 1
+    tortoise = hare = state
+    for _ in range(period):
+        hare = step(hare)
+    start = 0
+    while key(tortoise) != key(hare):
+        tortoise, hare = step(tortoise), step(hare)
+        start += 1
+    return Cycle(start, period)
+
+
+def state_at(step, state, cycle: Cycle, n: int):
+    """State at step n, stepping at most start + period times"""
+    if n >= cycle.start:
+        n = cycle.start + (n - cycle.start) % cycle.period
+    for _ in range(n):
+        state = step(state)
+    return state
@@ -1,14 +1,13 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import re
 
+from solutions.aoc_tools import pick_input, read_line
+from solutions.metrics import emit
+from solutions.timing import phase, record
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
+# sample file for each part, used by the shared runner
+SAMPLES = ("sample1.txt", "sample2.txt")
 
 
 def find_first_digit(line: str) -> int:
@@ -49,15 +48,10 @@ def find_str_digit(
             return matches[0][0], matches[-1][0]
 
 
-def main(sample: bool, part_two: bool):
-    if sample and not part_two:
-        fp = "sample1.txt"
-    elif sample and part_two:
-        fp = "sample2.txt"
-    else:
-        fp = "input.txt"
-
-    print(f"using file {fp}")
+def solve(fp: str, part_two: bool = False, verbose: bool = False) -> int:
+    """Returns the sum of calibration values in fp"""
+    # streamed, so reading is timed within solve
+    lines = read_line(fp)
     total = 0
     # part 2
     # oneight -> 1ight, eightwo -> 8wo
@@ -79,25 +73,39 @@ def main(sample: bool, part_two: bool):
     # the ?=(...) allows positive lookahead; eightwo returns 'eight' and 'two'
     pattern = r"(?=(one|two|three|four|five|six|seven|eight|nine))"
 
-    for line in read_line(fp):
-        if part_two:
-            # determine the first and last occurring string digit
-            hits = re.findall(pattern, line)
-            for hit in hits:
-                line = line.replace(hit, digits_dict[hit])
+    with phase("solve"):
+        for line in lines:
+            if part_two:
+                # determine the first and last occurring string digit
+                hits = re.findall(pattern, line)
+                for hit in hits:
+                    line = line.replace(hit, digits_dict[hit])
+
+            if verbose:
+                print(f"original line: {line}")
+                #    print(f"edited line: {line}")
+                if part_two:
+                    print(hits)
+            digit1 = find_first_digit(line)
+            digit2 = find_first_digit(line[::-1])
+            cal = digit1 * 10 + digit2
+            if verbose:
+                print(cal)
+            total += cal
+    return total
 
-        if sample:
-            print(f"original line: {line}")
-            #    print(f"edited line: {line}")
-            print(hits)
-        digit1 = find_first_digit(line)
-        digit2 = find_first_digit(line[::-1])
-        cal = digit1 * 10 + digit2
-        if sample:
-            print(cal)
-        total += cal
 
-    print(f"total: {total}")
+def main(sample: bool, part_two: bool, fp: str = None, jsonl: str = None):
+    fp = pick_input(sample, part_two, fp, SAMPLES)
+
+    print(f"using file {fp}")
+    with record() as timer:
+        total = solve(fp, part_two, verbose=sample)
+        with phase("output"):
+            print(f"total: {total}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, total, timer)
+    print(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -105,5 +113,7 @@ if __name__ == "__main__":
     opt = parser.add_argument
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two)
+    main(args.sample, args.part_two, fp=args.input, jsonl=args.jsonl)
@@ -1,47 +1,47 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
 
+from solutions.aoc_tools import pick_input
+from solutions.grid import Grid
+from solutions.metrics import emit
+from solutions.search import bfs
+from solutions.timing import phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
-# char of each pipe shape; use imag plane to denote north/south
+# open dirs of each pipe shape, keyed by its byte in the grid;
+# use imag plane to denote north/south
 pipe_open = {
-    "F": [1, 1j],
-    "7": [-1, 1j],
-    "J": [-1j, -1],
-    "L": [1, -1j],
-    "S": [1j, 1, -1j, -1],
-    "-": [-1, 1],
-    "|": [1j, -1j],
+    ord("F"): [1, 1j],
+    ord("7"): [-1, 1j],
+    ord("J"): [-1j, -1],
+    ord("L"): [1, -1j],
+    ord("S"): [1j, 1, -1j, -1],
+    ord("-"): [-1, 1],
+    ord("|"): [1j, -1j],
 }
 
 # compatible pipe shapes for each direction
 # shapes belonging to -1j (north) means that if we
 # look north, these are the shapes that are compatible
 compatible = {
-    -1j: ["S", "|", "7", "F"],  # looking north
-    1: ["S", "-", "7", "J"],
-    1j: ["S", "|", "J", "L"],
-    -1: ["S", "-", "F", "L"],
+    -1j: b"S|7F",  # looking north
+    1: b"S-7J",
+    1j: b"S|JL",
+    -1: b"S-FL",
 }
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def find_next_pipe(
-    shape, pos, pipe_map, prev_d=None, pipe_open=pipe_open, compatible=compatible
+    shape, pos, grid, steps, prev_d=None, pipe_open=pipe_open, compatible=compatible
 ):
     """
     Returns the next compatible pipe shape and position
-    pipe_map uses complex num as coordinate keys
+    pos is a flat Grid index; steps[dir] is the index offset of each dir
     pipe_open[shape] provides which directions are open
     compatible[dir] provides list of shapes that accept entries
     __from__ that dir
@@ -49,12 +49,28 @@ def find_next_pipe(
     entry = -prev_d if prev_d else None
     for d in [1j, 1, -1j, -1]:
         if d != entry:
-            pos_chk = pos + d
-            chk = pipe_map.get(pos_chk)
-            if chk and chk in compatible[d] and d in pipe_open[shape]:
+            pos_chk = pos + steps[d]
+            chk = grid[pos_chk]
+            if chk in compatible[d] and d in pipe_open[shape]:
                 return chk, pos_chk, d
 
 
+def connected_pipes(grid, steps, pipe_open=pipe_open, compatible=compatible):
+    """
+    Returns the neighbours function for a search along the pipes: the
+    positions that the pipe at pos opens onto, and that open back to it
+    """
+
+    def neighbours(pos: int):
+        return [
+            pos + steps[d]
+            for d in pipe_open[grid[pos]]
+            if grid[pos + steps[d]] in compatible[d]
+        ]
+
+    return neighbours
+
+
 def scanrow(left_x, right_x, bot_y, top_y, pipe_map, path_map):
     """
     Returns pos of nodes inside the loop
@@ -64,11 +80,12 @@ def scanrow(left_x, right_x, bot_y, top_y, pipe_map, path_map):
     inside_nodes = []
     step_y = 1 if top_y > bot_y else -1
     step_x = 1 if right_x > left_x else -1
+    trace = tracer(logger)
     for row in range(bot_y, top_y, step_y):
-        logger.debug(f"row: {row}")
-        logger.debug(
-            f"line: {''.join([pipe_map[x + row * (1j)] for x in range(left_x, right_x)])}"
-        )
+        if trace:
+            trace("row: %s", row)
+            line = "".join([pipe_map[x + row * (1j)] for x in range(left_x, right_x)])
+            trace("line: %s", line)
         inside = False
         for col in range(left_x, right_x, step_x):
             pos = col + row * (1j)
@@ -76,11 +93,13 @@ def scanrow(left_x, right_x, bot_y, top_y, pipe_map, path_map):
                 inside_nodes.append(pos)
             elif pos in path_map:
                 # flip our count condition
-                logger.debug("flip inside")
+                if trace:
+                    trace("flip inside")
                 inside = not inside
             else:
                 next
-        logger.debug(f"running point: {len(inside_nodes)}")
+        if trace:
+            trace("running point: %s", len(inside_nodes))
     return inside_nodes
 
 
@@ -89,22 +108,25 @@ def scancol(left_x, right_x, bot_y, top_y, pipe_map, path_map):
     scan columns from left to right, top to bottom for inside nodes
     """
     inside_nodes = []
+    trace = tracer(logger)
     for col in range(left_x, right_x):
-        logger.debug(f"col: {col}")
-        logger.debug(
-            f"line: {''.join([pipe_map[col + y * (1j)] for y in range(bot_y, top_y)])}"
-        )
+        if trace:
+            trace("col: %s", col)
+            line = "".join([pipe_map[col + y * (1j)] for y in range(bot_y, top_y)])
+            trace("line: %s", line)
         inside = False
         for row in range(bot_y, top_y):
             pos = col + row * 1j
             if pipe_map[pos] == "." and inside:
                 inside_nodes.append(pos)
             elif pos in path_map:
-                logger.debug("flip inside")
+                if trace:
+                    trace("flip inside")
                 inside = not inside
             else:
                 next
-        logger.debug(f"running point: {len(inside_nodes)}")
+        if trace:
+            trace("running point: %s", len(inside_nodes))
     return inside_nodes
 
 
@@ -132,7 +154,7 @@ def calc_polygon_area(vertices: list) -> int:
     return abs(area / 2)
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def solve(fp: str, part_two: bool = False) -> int:
     """
     Pathfinding?
     Given a map of pipes, find the furthest distance from the start
@@ -143,64 +165,80 @@ def main(sample: bool, part_two: bool, loglevel: str):
     Given pos_s, search each cardinal dir
     for each dir, look for a compatible pipe, given current pipe
     """
-
+    # ground past the edges never connects
+    with phase("parse"):
+        grid = Grid.from_file(fp, border=b".")
+    with phase("solve"):
+        steps = {-1j: grid.N, 1: grid.E, 1j: grid.S, -1: grid.W}
+        pos_s = grid.find(b"S")
+
+        trace = tracer(logger)
+        if trace:
+            trace("origin: %s", grid.coords(pos_s))
+        if not part_two:
+            # the furthest pipe is as many steps away, either way round
+            depth = bfs([pos_s], connected_pipes(grid, steps))
+            return max(depth.values())
+        # walk the loop in order, to collect its vertices
+        curr = ord("S")
+        pos_curr = pos_s
+        step = 0
+        d = None
+        path_map = []
+        vertices = []
+        while not (curr == ord("S") and step):
+            curr, pos_curr, d = find_next_pipe(curr, pos_curr, grid, steps, d)
+            if part_two and curr in b"7LJF":
+                # collect all pos
+                # path_map.append(pos_curr)
+                # collect all elbows, i.e. vertices
+                row, col = grid.coords(pos_curr)
+                vertices.append(col + row * 1j)
+                if trace:
+                    trace("step %s\tshape %s\tpos %s", step, chr(curr), (row, col))
+            step += 1
+        if part_two:
+            logger.info(f"{len(vertices)} vertices found")
+            # find A using shoelace, then i using Pick's
+            area = calc_polygon_area(vertices)
+            logger.info(f"area: {area}\tstep: {step}")
+            interior = area - step // 2 + 1
+            # # iterate over all rows of bounding box
+            # xs = [int(p.real) for p in path_map]
+            # ys = [int(p.imag) for p in path_map]
+            # left_x = min(xs)
+            # right_x = max(xs) + 1
+            # top_y = max(ys) + 1
+            # bot_y = min(ys)
+            # logger.debug(f"bounding box: {left_x}, {bot_y} to {right_x}, {top_y}")
+            # inside_hscan = scanrow(left_x, right_x, bot_y, top_y, pipe_map, path_map)
+            # inside_vscan = scancol(left_x, right_x, bot_y, top_y, pipe_map, path_map)
+            # logger.debug(f"hscan: {inside_hscan}\nvscan: {inside_vscan}")
+            # inside_nodes = set(inside_hscan).intersection(set(inside_vscan))
+            # n_in = len(inside_nodes)
+            return int(interior - (interior % 1))
+        return step // 2
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
+    """ """
     logger.setLevel(loglevel)
-    if sample:
-        fp = "sample.txt"
-    else:
-        fp = "input.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    pipe_map = {}
-    s_row = s_col = 0
-    for y, row in enumerate(read_line(fp)):
-        for x, ch in enumerate(row):
-            pos = x + y * 1j
-            pipe_map |= {pos: ch}
-            # find 'S'
-            if ch == "S":
-                pos_s = pos
-
-    logger.debug(f"origin: {pos_s}")
-    curr = "S"
-    pos_curr = pos_s
-    step = 0
-    d = None
-    path_map = []
-    vertices = []
-    while not (curr == "S" and step):
-        curr, pos_curr, d = find_next_pipe(curr, pos_curr, pipe_map, d)
-        if part_two and curr in "7LJF":
-            # collect all pos
-            # path_map.append(pos_curr)
-            # collect all elbows, i.e. vertices
-            vertices.append(pos_curr)
-            logger.debug(f"step {step}\tshape {curr}\tpos {pos_curr}")
-        step += 1
-    if part_two:
-        logger.info(f"{len(vertices)} vertices found")
-        # find A using shoelace, then i using Pick's
-        area = calc_polygon_area(vertices)
-        logger.info(f"area: {area}\tstep: {step}")
-        interior = area - step // 2 + 1
-        # # iterate over all rows of bounding box
-        # xs = [int(p.real) for p in path_map]
-        # ys = [int(p.imag) for p in path_map]
-        # left_x = min(xs)
-        # right_x = max(xs) + 1
-        # top_y = max(ys) + 1
-        # bot_y = min(ys)
-        # logger.debug(f"bounding box: {left_x}, {bot_y} to {right_x}, {top_y}")
-        # inside_hscan = scanrow(left_x, right_x, bot_y, top_y, pipe_map, path_map)
-        # inside_vscan = scancol(left_x, right_x, bot_y, top_y, pipe_map, path_map)
-        # logger.debug(f"hscan: {inside_hscan}\nvscan: {inside_vscan}")
-        # inside_nodes = set(inside_hscan).intersection(set(inside_vscan))
-        # n_in = len(inside_nodes)
-        logger.info(f"points inside: {interior - (interior % 1)}")
-
-    else:
-        logger.info(f"furthest point: {step//2}")
+    with record() as timer:
+        ans = solve(fp, part_two)
+        with phase("output"):
+            if part_two:
+                logger.info(f"points inside: {ans}")
+            else:
+                logger.info(f"furthest point: {ans}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, ans, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -209,5 +247,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
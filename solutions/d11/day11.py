@@ -1,22 +1,21 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
 import re
 from itertools import chain
 
+from solutions import backend
+from solutions.aoc_tools import pick_input, read_line
+from solutions.backend import np
+from solutions.metrics import emit
+from solutions.timing import phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def find_gx(line: str, nrow: int, re_gx=re.compile("#")) -> list:
     """
     Finds all occurrences of gx and their location
@@ -25,54 +24,104 @@ def find_gx(line: str, nrow: int, re_gx=re.compile("#")) -> list:
     return [complex(x, -nrow) for x in xs]
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def pair_distances_np(lines: list[str], mult: int) -> int:
+    """
+    The solve phase on the NumPy backend. Manhattan distance splits by
+    axis, and on one axis the sum over all pairs of sorted coordinates
+    x_0 <= ... <= x_n-1 is sum(x_i * (2i - n + 1)), so no pair is
+    formed: O(n log n) for n galaxies rather than O(n^2)
+    """
+    rows = [line.rstrip("\n").encode() for line in lines if line.strip()]
+    is_gx = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), -1)
+    is_gx = is_gx == ord("#")
+    total = 0
+    for axis in (1, 0):
+        # each empty line before a galaxy is mult lines wide
+        empty = ~is_gx.any(axis=axis)
+        expanded = np.arange(empty.size) + (mult - 1) * np.cumsum(empty)
+        coords = np.sort(expanded[np.nonzero(is_gx)[1 - axis]])
+        weights = 2 * np.arange(coords.size) - coords.size + 1
+        # exact python ints; the products fit in int64 but their sum may not
+        total += sum((coords * weights).tolist())
+    return total
+
+
+def solve(fp: str, part_two: bool = False) -> int:
+    """Returns the sum of shortest paths between all galaxy pairs"""
+    with phase("read"):
+        lines = list(read_line(fp))
+    if backend.enabled():
+        with phase("solve"):
+            return pair_distances_np(lines, 10**6 if part_two else 2)
+    trace = tracer(logger)
+    # collect initial g locations
+    with phase("parse"):
+        gmap = [find_gx(line, nrow) for nrow, line in enumerate(lines)]
+        gmap = list(chain.from_iterable(gmap))
+    if trace:
+        trace("%s", gmap)
+
+    # use all gx loc to find empty rows/cols
+    with phase("index"):
+        gx_rows = [int(c.imag) for c in gmap]
+        gx_cols = [int(c.real) for c in gmap]
+        if trace:
+            trace("gx rows: %s\tgx cols: %s", gx_rows, gx_cols)
+        empty_rows = set(range(0, min(gx_rows), -1)).difference(gx_rows)
+        empty_cols = set(range(max(gx_cols))).difference(gx_cols)
+        if trace:
+            trace("empty rows: %s\nempty cols: %s", empty_rows, empty_cols)
+
+    with phase("solve"):
+        # move galaxies based on expanded space
+        # iterate through the galaxies
+        mult = 1e6 if part_two else 2
+        gdict = {}
+        for i, g in enumerate(gmap):
+            # count how many rows are above, and how many cols before
+            if trace:
+                trace("pre exp: %s", g)
+            nrows_abv = sum([g.imag < empty for empty in empty_rows])
+            g -= nrows_abv * 1j * (mult - 1)
+
+            ncols_bef = sum([g.real > empty for empty in empty_cols])
+            g += ncols_bef * (mult - 1)
+            if trace:
+                trace("post exp: %s", g)
+            gdict |= {i: g}
+
+        # calculate manhattan dist for all pairs using expanded coordinates
+        if trace:
+            trace("gdict: %s", gdict)
+        pairs = [(i, j) for i in gdict for j in gdict if i < j]
+        if trace:
+            trace("unique pairs: %s", len(pairs))
+        distances = [
+            abs(c.real) + abs(c.imag)
+            for c in [gdict[p[1]] - gdict[p[0]] for p in pairs]
+        ]
+        if trace:
+            for d, p in zip(distances, pairs):
+                trace("pair: %s\tdist: %s", p, d)
+        return int(sum(distances))
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    # collect initial g locations
-    gmap = [find_gx(line, nrow) for nrow, line in enumerate(read_line(fp))]
-    gmap = list(chain.from_iterable(gmap))
-    logger.debug(gmap)
-
-    # use all gx loc to find empty rows/cols
-    gx_rows = [int(c.imag) for c in gmap]
-    gx_cols = [int(c.real) for c in gmap]
-    logger.debug(f"gx rows: {gx_rows}\tgx cols: {gx_cols}")
-    empty_rows = set(range(0, min(gx_rows), -1)).difference(gx_rows)
-    empty_cols = set(range(max(gx_cols))).difference(gx_cols)
-    logger.debug(f"empty rows: {empty_rows}\nempty cols: {empty_cols}")
-
-    # move galaxies based on expanded space
-    # iterate through the galaxies
-    mult = 1e6 if part_two else 2
-    gdict = {}
-    for i, g in enumerate(gmap):
-        # count how many rows are above, and how many cols before
-        logger.debug(f"pre exp: {g}")
-        nrows_abv = sum([g.imag < empty for empty in empty_rows])
-        g -= nrows_abv * 1j * (mult - 1)
-
-        ncols_bef = sum([g.real > empty for empty in empty_cols])
-        g += ncols_bef * (mult - 1)
-        logger.debug(f"post exp: {g}")
-        gdict |= {i: g}
-
-    # calculate manhattan dist for all pairs using expanded coordinates
-    logger.debug(f"gdict: {gdict}")
-    pairs = [(i, j) for i in gdict for j in gdict if i < j]
-    logger.debug(f"unique pairs: {len(pairs)}")
-    distances = [
-        abs(c.real) + abs(c.imag) for c in [gdict[p[1]] - gdict[p[0]] for p in pairs]
-    ]
-    for d, p in zip(distances, pairs):
-        logger.debug(f"pair: {p}\tdist: {d}")
-    logger.info(f"total: {sum(distances)}")
+    with record() as timer:
+        total = solve(fp, part_two)
+        with phase("output"):
+            logger.info(f"total: {total}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, total, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -81,5 +130,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
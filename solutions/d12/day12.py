@@ -1,21 +1,20 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
 from collections import Counter
+from functools import partial
+
+from solutions.aoc_tools import pick_input, read_line, split_ints
+from solutions.metrics import emit
+from solutions.parallel import preduce
+from solutions.timing import phase, record
+from solutions.tracing import tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def find_arrangements(springs: str, sep="?") -> list:
     """
     Return all possible substitutions of "?"
@@ -39,9 +38,12 @@ def is_valid_arrng(spring: str, grps: list[int], sp="#") -> bool:
     does the spring arrangement satisfy the conditions
     specified in grps?
     """
-    logger.debug(f"checking: {spring}")
+    trace = tracer(logger)
+    if trace:
+        trace("checking: %s", spring)
     if Counter(spring)[sp] != sum(grps):
-        logger.debug(f"springs: {Counter(spring)[sp]}\tneed: {sum(grps)}")
+        if trace:
+            trace("springs: %s\tneed: %s", Counter(spring)[sp], sum(grps))
         return False
     # check arrangement
     else:
@@ -57,38 +59,62 @@ def is_valid_arrng(spring: str, grps: list[int], sp="#") -> bool:
         count_grps.append(curr)
 
         count_grps = [c for c in count_grps if c]
-        logger.debug(f"count: {count_grps}\tcheck: {grps}")
+        if trace:
+            trace("count: %s\tcheck: %s", count_grps, grps)
         return grps == count_grps
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def count_record(line: str, part_two: bool = False) -> int:
+    """Returns the number of valid arrangements for one row"""
+    springs, grps = line.split()
+    # remove extraneous '.' to prune states
+    springs = ".".join([sp for sp in springs.split(".") if sp])
+    grps = split_ints(grps, ",")
+    if part_two:
+        springs = "?".join(springs for _ in range(5))
+        grps *= 5
+    trace = tracer(logger)
+    if trace:
+        trace("springs: %s\tgroups: %s", springs, grps)
+
+    all_arrng = find_arrangements(springs)
+    if trace:
+        trace("all arrangements:\n%s", list(all_arrng))
+    num_valids = sum([is_valid_arrng(spring, grps) for spring in all_arrng])
+    if trace:
+        trace("valids: %s", num_valids)
+    return num_valids
+
+
+def solve(fp: str, part_two: bool = False, workers: int = 1) -> int:
+    """Returns the sum of valid arrangements over all rows"""
+    # streamed, so reading is timed within solve
+    lines = read_line(fp)
+    with phase("solve"):
+        return preduce(partial(count_record, part_two=part_two), lines, workers=workers)
+
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    workers: int = 1,
+    fp: str = None,
+    jsonl: str = None,
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    num_arrngs = []
-    for line in read_line(fp):
-        springs, grps = line.split()
-        # remove extraneous '.' to prune states
-        springs = ".".join([sp for sp in springs.split(".") if sp])
-        grps = [int(n) for n in grps.split(",")]
-        if part_two:
-            springs = "?".join(springs for _ in range(5))
-            grps *= 5
-        logger.debug(f"springs: {springs}\tgroups: {grps}")
-
-        all_arrng = find_arrangements(springs)
-        logger.debug(f"all arrangements:\n{list(all_arrng)}")
-        num_valids = sum([is_valid_arrng(spring, grps) for spring in all_arrng])
-        logger.debug(f"valids: {num_valids}")
-        num_arrngs.append(num_valids)
-
-    logger.info(f"{sum(num_arrngs)}")
+    with record() as timer:
+        num_arrngs = solve(fp, part_two, workers)
+        with phase("output"):
+            logger.info(f"{num_arrngs}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, num_arrngs, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -97,5 +123,15 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--workers", "-w", type=int, default=1, help="processes for the rows")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        args.workers,
+        fp=args.input,
+        jsonl=args.jsonl,
+    )
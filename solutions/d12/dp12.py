@@ -1,22 +1,19 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-from time import time_ns
 from collections import Counter
+from functools import partial
+
+from solutions.aoc_tools import pick_input, read_line, split_ints
+from solutions.metrics import emit
+from solutions.parallel import preduce
+from solutions.timing import phase, record
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def count_arrng(springs, grps, working=".", broken="#", unknown="?"):
     """
     dynamic programming, iterative, bottom up/tabular approach
@@ -109,7 +106,45 @@ def count_arrng(springs, grps, working=".", broken="#", unknown="?"):
     return dp[-1][0]
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def count_record(line: str, part_two: bool = False) -> int:
+    """Returns the number of valid arrangements for one row"""
+    springs, grps = line.split()
+    grps = split_ints(grps, ",")
+    if part_two:
+        springs = "?".join([springs for _ in range(5)])
+        grps *= 5
+    # remove extraneous '.'
+    springs = ".".join(sp for sp in springs.split(".") if sp)
+    # logger.debug(f"springs: {springs}\tgroups: {grps}")
+
+    return count_arrng(springs, grps)
+
+
+def solve(fp: str, part_two: bool = False, workers: int = 1) -> int:
+    """Returns the sum of valid arrangements over all rows"""
+    diffs = []
+    # streamed, so reading is timed within solve
+    lines = read_line(fp)
+    with phase("solve"):
+        num_arrngs = preduce(
+            partial(count_record, part_two=part_two), lines, workers=workers
+        )
+
+    # if not sample:
+    #     with open("diffs.txt", "w") as f:
+    #         f.writelines(diffs)
+    logger.info(f"{len(diffs)} different results")
+    return num_arrngs
+
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    workers: int = 1,
+    fp: str = None,
+    jsonl: str = None,
+):
     """
     ???.### 1,1,3
     .??..??...?##. 1,1,3
@@ -119,36 +154,17 @@ def main(sample: bool, part_two: bool, loglevel: str):
     ?###???????? 3,2,1
     """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    tstart = time_ns()
-    num_arrngs = 0
-    diffs = []
-    for line in read_line(fp):
-        springs, grps = line.split()
-        grps = [int(n) for n in grps.split(",")]
-        if part_two:
-            springs = "?".join([springs for _ in range(5)])
-            grps *= 5
-        # remove extraneous '.'
-        springs = ".".join(sp for sp in springs.split(".") if sp)
-        # logger.debug(f"springs: {springs}\tgroups: {grps}")
-
-        n_dp = count_arrng(springs, grps)
-        num_arrngs += n_dp
-
-    # if not sample:
-    #     with open("diffs.txt", "w") as f:
-    #         f.writelines(diffs)
-    tstop = time_ns()
-    logger.info(f"{num_arrngs}")
-    logger.info(f"{len(diffs)} different results")
-    logger.info(f"runtime: {(tstop-tstart)/1e6:.3f} ms")
+    with record() as timer:
+        num_arrngs = solve(fp, part_two, workers)
+        with phase("output"):
+            logger.info(f"{num_arrngs}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, num_arrngs, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -157,5 +173,15 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--workers", "-w", type=int, default=1, help="processes for the rows")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        args.workers,
+        fp=args.input,
+        jsonl=args.jsonl,
+    )
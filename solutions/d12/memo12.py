@@ -1,26 +1,29 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-from time import time_ns
+from functools import partial
+
+from solutions.aoc_tools import pick_input, read_line, split_ints
+from solutions.memo import BoundedCache
+from solutions.metrics import emit
+from solutions.parallel import preduce
+from solutions.timing import count, phase, record
+from solutions.tracing import tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
-
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
+# sub-results kept per solve; a part 2 row needs a few thousand
+MEMO_ENTRIES = 1 << 16
 
 
 def count_broken(springs, grps, cache, working=".", broken="#", unknown="?") -> int:
     """
     helper func to guardrail the recursion
     """
-    logger.debug(f"counting brokens; sp: {springs}\ngroups: {grps}")
+    if trace := tracer(logger):
+        trace("counting brokens; sp: %s\ngroups: %s", springs, grps)
     nx_grp = grps[0]
     # fix unknowns as broken springs to match group
     brokens = springs[:nx_grp].replace(unknown, broken)
@@ -50,16 +53,17 @@ def count_broken(springs, grps, cache, working=".", broken="#", unknown="?") ->
 
 
 def find_arrangements(
-    springs, grps, cache={}, working=".", broken="#", unknown="?"
+    springs, grps, cache: BoundedCache, working=".", broken="#", unknown="?"
 ) -> int:
     """
     Count number of valid arrangements using recursion and memoization
     groups refer to contiguous broken springs (#)
     """
     # check cache
-    if (key := (springs, grps)) in cache:
-        logger.debug("cached value")
-        return cache[key]
+    if (hit := cache.get(key := (springs, grps))) is not None:
+        if trace := tracer(logger):
+            trace("cached value")
+        return hit
     # base case
     if not grps:
         # still valid if no more brokens
@@ -104,41 +108,72 @@ def find_arrangements(
     return num_arrng
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def count_record(line: str, part_two: bool = False, cache: BoundedCache = None) -> int:
+    """
+    Returns the number of valid arrangements for one row
+    Pass the same cache for every row to share sub-results between them
+    """
+    cache = BoundedCache(MEMO_ENTRIES) if cache is None else cache
+    springs, grps = line.split()
+    # immutability for caching
+    grps = tuple(split_ints(grps, ","))
+    if part_two:
+        springs = "?".join(springs for _ in range(5))
+        grps *= 5
+    springs = ".".join(sp for sp in springs.split(".") if sp)
+    trace = tracer(logger)
+    if trace:
+        trace("springs: %s\ngroups: %s", springs, grps)
+
+    num_arrng = find_arrangements(springs, grps, cache)
+    if trace:
+        trace("arrangements: %s\tcache: %s\n%s", num_arrng, cache.info(), "-" * 10)
+    return num_arrng
+
+
+def solve(fp: str, part_two: bool = False, workers: int = 1) -> int:
+    """Returns the sum of valid arrangements over all rows"""
+    # each worker gets its own copy per chunk of rows
+    cache = BoundedCache(MEMO_ENTRIES)
+    # streamed, so reading is timed within solve
+    lines = read_line(fp)
+    with phase("solve"):
+        total = preduce(
+            partial(count_record, part_two=part_two, cache=cache),
+            lines,
+            workers=workers,
+        )
+    if workers == 1:
+        # workers fill copies of the cache, out of reach here
+        count("memo_hits", cache.hits)
+        count("memo_misses", cache.misses)
+        count("memo_evictions", cache.evictions)
+    return total
+
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    workers: int = 1,
+    fp: str = None,
+    jsonl: str = None,
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    # read input
-
     # execute
-    tstart = time_ns()
-    num_arrngs = 0
-    cache = {}
-    for line in read_line(fp):
-        springs, grps = line.split()
-        # immutability for caching
-        grps = tuple([int(n) for n in grps.split(",")])
-        if part_two:
-            springs = "?".join(springs for _ in range(5))
-            grps *= 5
-        springs = ".".join(sp for sp in springs.split(".") if sp)
-        logger.debug(f"springs: {springs}\ngroups: {grps}")
-
-        num_arrngs += find_arrangements(springs, grps, cache)
-        logger.debug(f"running total: {num_arrngs}\tcache size: {len(cache)}")
-        logger.debug("-" * 10)
-
-    logger.info(f"ans: {num_arrngs}")
-    # output
-
-    tstop = time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6} ms")
+    with record() as timer:
+        num_arrngs = solve(fp, part_two, workers)
+        # output
+        with phase("output"):
+            logger.info(f"ans: {num_arrngs}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, num_arrngs, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -147,5 +182,15 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--workers", "-w", type=int, default=1, help="processes for the rows")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        args.workers,
+        fp=args.input,
+        jsonl=args.jsonl,
+    )
@@ -1,21 +1,22 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-from time import time_ns
+from collections import defaultdict
+from functools import partial
+
+from solutions import backend
+from solutions.aoc_tools import iter_blocks, map_file, pick_input
+from solutions.backend import np
+from solutions.metrics import emit
+from solutions.parallel import preduce
+from solutions.timing import phase, record
+from solutions.tracing import tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def transpose(pattern: list[str]) -> list[str]:
     """Given list of equal length str, transpose the characters"""
     # try 1
@@ -34,11 +35,13 @@ def find_reflection(pattern: list[str], old_line=0) -> int:
 
     Iterates through the rows to find when row_n == row_n-1
     """
+    trace = tracer(logger)
     prev = None
     n_row = None
     for i, row in enumerate(pattern):
         if row == prev:
-            logger.debug(f"checking row {i}")
+            if trace:
+                trace("checking row %d", i)
             # potential reflection point found
             dist = 1
             while (
@@ -49,7 +52,8 @@ def find_reflection(pattern: list[str], old_line=0) -> int:
                 # iterate away from reflection point
                 dist += 1
             # check if we iterated to either end
-            logger.debug(f"dist: {dist}")
+            if trace:
+                trace("dist: %d", dist)
             if (above < 0 or below == len(pattern)) and i != old_line:
                 n_row = i
                 break
@@ -62,75 +66,138 @@ def find_smudge(pattern: list[str], r_old, c_old) -> int:
     Find the new reflection point if only one tile
     in the pattern is flipped
     """
+    trace = tracer(logger)
     for row in range(len(pattern)):
-        logger.debug(f"old {pattern[row]}")
+        if trace:
+            trace("old %s", pattern[row])
         for j, col in enumerate(pattern[row]):
             chk = pattern.copy()
             # str is immutable
             flip = "#" if col == "." else "."
             chk[row] = chk[row][:j] + flip + chk[row][j + 1 :]
             if r_ref := find_reflection(chk, r_old):
-                logger.debug(f"row found: {r_ref}; flipped {row}, {j}")
+                if trace:
+                    trace("row found: %d; flipped %d, %d", r_ref, row, j)
                 return r_ref, None
             if c_ref := find_reflection(transpose(chk), c_old):
-                logger.debug(f"col found: {c_ref}; flipped {row}, {j}")
+                if trace:
+                    trace("col found: %d; flipped %d, %d", c_ref, row, j)
                 return None, c_ref
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def summarize(p: list[str], part_two: bool = False) -> int:
+    """Returns the reflection column, or 100 times the reflection row"""
+    trace = tracer(logger)
+    r_ref = c_ref = None
+    if trace:
+        trace("pattern:\n%s", p)
+    if r_ref := find_reflection(p):
+        if trace:
+            trace("ref row found: %d", r_ref)
+        # if found, no need to look for vertical
+    else:
+        p_transposed = transpose(p)
+        if trace:
+            trace("transposed:\n%s", p_transposed)
+        if c_ref := find_reflection(p_transposed):
+            if trace:
+                trace("ref col found: %d", c_ref)
+    if part_two:
+        # brute-force
+        if trace:
+            trace("passing %s, %s into smudge", r_ref, c_ref)
+        try:
+            r_ref, c_ref = find_smudge(p, r_ref, c_ref)
+        except TypeError:
+            logger.error("no reflection found:")
+            for r in p:
+                logger.error(r)
+    if r_ref:
+        return 100 * r_ref
+    else:
+        return c_ref
+
+
+def mirror_lines_np(cells, ndiff: int = 0):
+    """
+    For a stack of same shape patterns, (n, rows, cols) of bools, returns
+    each pattern's first line between rows i-1 and i across which exactly
+    ndiff cells differ, or 0. Rows r < c face each other across line
+    (r + c + 1) / 2 when r + c is odd, so a line's differences are a sum
+    over the row pairs it owns, and every line is scored at once
+    """
+    n_rows = cells.shape[1]
+    # cells differing between every two rows of each pattern
+    row_diffs = (cells[:, :, None, :] != cells[:, None, :, :]).sum(axis=3)
+    r, c = np.triu_indices(n_rows, 1)
+    odd = (r + c) % 2 == 1
+    r, c = r[odd], c[odd]
+    owner = (r + c + 1) // 2 == np.arange(n_rows)[:, None]
+    hits = row_diffs[:, r, c] @ owner.T.astype(np.int64) == ndiff
+    # line 0 has nothing above it
+    hits[:, 0] = False
+    return np.where(hits.any(axis=1), hits.argmax(axis=1), 0)
+
+
+def summarize_np(buf, part_two: bool = False) -> int:
+    """summarize() over every pattern, stacked by shape, on the NumPy backend"""
+    by_shape = defaultdict(list)
+    for block in bytes(buf).split(b"\n\n"):
+        if rows := block.split():
+            by_shape[len(rows), len(rows[0])].append(b"".join(rows))
+    total = 0
+    for (n_rows, n_cols), patterns in by_shape.items():
+        cells = np.frombuffer(b"".join(patterns), dtype=np.uint8)
+        cells = cells.reshape(-1, n_rows, n_cols) == ord("#")
+        rows = mirror_lines_np(cells, int(part_two))
+        cols = mirror_lines_np(cells.transpose(0, 2, 1), int(part_two))
+        total += int(np.where(rows, 100 * rows, cols).sum())
+    return total
+
+
+def solve(fp: str, part_two: bool = False, workers: int = 1) -> int:
+    """Returns the summary of reflection lines over all patterns"""
+    # each set of pattern is divided by newline
+    if backend.enabled():
+        with phase("solve"):
+            return summarize_np(map_file(fp), part_two)
+    with phase("parse"):
+        patterns = [
+            [bytes(line).decode() for line in block]
+            for block in iter_blocks(map_file(fp))
+        ]
+
+    with phase("solve"):
+        return preduce(
+            partial(summarize, part_two=part_two),
+            patterns,
+            workers=workers,
+            chunksize=16,
+        )
+
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    workers: int = 1,
+    fp: str = None,
+    jsonl: str = None,
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    patterns = []
-    pattern = []
-    for line in read_line(fp):
-        # each set of pattern is divided by newline
-        if line := line.strip():
-            pattern.append(line)
-        else:
-            patterns.append(pattern)
-            pattern = []
-    # no empty line at end of file; last case as edge case
-    patterns.append(pattern)
-
-    # execute
-    tstart = time_ns()
-    rows = cols = 0
-    for p in patterns:
-        r_ref = c_ref = None
-        logger.debug(f"pattern:\n{p}")
-        if r_ref := find_reflection(p):
-            logger.debug(f"ref row found: {r_ref}")
-            # if found, no need to look for vertical
-        else:
-            p_transposed = transpose(p)
-            logger.debug(f"transposed:\n{p_transposed}")
-            if c_ref := find_reflection(p_transposed):
-                logger.debug(f"ref col found: {c_ref}")
-        if part_two:
-            # brute-force
-            logger.debug(f"passing {r_ref}, {c_ref} into smudge")
-            try:
-                r_ref, c_ref = find_smudge(p, r_ref, c_ref)
-            except TypeError:
-                logger.error("no reflection found:")
-                for r in p:
-                    logger.error(r)
-        if r_ref:
-            rows += r_ref
-        else:
-            cols += c_ref
-    # output
-    logger.info(f"total: {cols + 100 * rows}")
-
-    tstop = time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6:.3f} ms")
+    with record() as timer:
+        total = solve(fp, part_two, workers)
+        # output
+        with phase("output"):
+            logger.info(f"total: {total}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, total, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -139,5 +206,15 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--workers", "-w", type=int, default=1, help="processes for the patterns")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        args.workers,
+        fp=args.input,
+        jsonl=args.jsonl,
+    )
@@ -1,29 +1,29 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-from time import time_ns
+from functools import partial
+
+from solutions.aoc_tools import iter_blocks, map_file, pick_input
+from solutions.metrics import emit
+from solutions.parallel import preduce
+from solutions.timing import phase, record
+from solutions.tracing import tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
-
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
+BITS = bytes.maketrans(b".#", b"01")
 
 
 def bit_convert(pattern):
     """
-    Convert "...##.#" patterns into 0s and 1s
+    Convert "...##.#" patterns, as lines of bytes, into 0s and 1s
     Each pattern becomes a matrix of bits
     """
-    logger.debug(f"pattern:\n{pattern}")
-    pattern = pattern.replace(".", "0").replace("#", "1")
-    return [[bit for bit in line] for line in pattern.split("\n") if line]
+    if trace := tracer(logger):
+        trace("pattern:\n%s", [bytes(line) for line in pattern])
+    return [list(bytes(line).translate(BITS).decode()) for line in pattern]
 
 
 def find_reflection(pattern: list[str], diff_lim=0) -> int:
@@ -33,7 +33,8 @@ def find_reflection(pattern: list[str], diff_lim=0) -> int:
     if diff_lim = 0, we're looking for perfect reflections
     if diff_lim = 1, we're looking for reflections with 1 smudge
     """
-    logger.debug(f"first row:{pattern[0]}")
+    if trace := tracer(logger):
+        trace("first row:%s", pattern[0])
     bmat = [int("".join(p), base=2) for p in pattern]
     prev = bmat[0]
     for i, row in enumerate(bmat[1:], start=1):
@@ -58,41 +59,63 @@ def find_reflection(pattern: list[str], diff_lim=0) -> int:
             return i
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def summarize(p: list[str], ndiff: int = 0) -> int:
+    """Returns the reflection column, or 100 times the reflection row"""
+    trace = tracer(logger)
+    if trace:
+        trace("pattern:\n%s", p)
+        trace("len: %s\tfirst row: %s", len(p), p[0])
+    if r_ref := find_reflection(p, ndiff):
+        if trace:
+            trace("ref row found: %s", r_ref)
+        # if found, no need to look for vertical
+        return 100 * r_ref
+    p_transposed = [*zip(*p)]
+    if trace:
+        trace("transposed:\n%s", p_transposed)
+    if c_ref := find_reflection(p_transposed, ndiff):
+        if trace:
+            trace("ref col found: %s", c_ref)
+        return c_ref
+    return 0
+
+
+def solve(fp: str, part_two: bool = False, workers: int = 1) -> int:
+    """Returns the summary of reflection lines over all patterns"""
+    with phase("parse"):
+        patterns = [bit_convert(p) for p in iter_blocks(map_file(fp))]
+
+    with phase("solve"):
+        return preduce(
+            partial(summarize, ndiff=1 if part_two else 0),
+            patterns,
+            workers=workers,
+            chunksize=16,
+        )
+
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    workers: int = 1,
+    fp: str = None,
+    jsonl: str = None,
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    patterns = [bit_convert(p) for p in "".join(read_line(fp)).split("\n\n")]
-
-    # execute
-    tstart = time_ns()
-    ndiff = 1 if part_two else 0
-    rows = cols = 0
-    for p in patterns:
-        # r_ref = c_ref = None
-        logger.debug(f"pattern:\n{p}")
-        logger.debug(f"len: {len(p)}\tfirst row: {p[0]}")
-        if r_ref := find_reflection(p, ndiff):
-            logger.debug(f"ref row found: {r_ref}")
-            # if found, no need to look for vertical
-            rows += r_ref
-        else:
-            p_transposed = [*zip(*p)]
-            logger.debug(f"transposed:\n{p_transposed}")
-            if c_ref := find_reflection(p_transposed, ndiff):
-                logger.debug(f"ref col found: {c_ref}")
-                cols += c_ref
-    # output
-    logger.info(f"total: {cols + 100 * rows}")
-
-    tstop = time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6:.3f} ms")
+    with record() as timer:
+        total = solve(fp, part_two, workers)
+        # output
+        with phase("output"):
+            logger.info(f"total: {total}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, total, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -101,5 +124,15 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--workers", "-w", type=int, default=1, help="processes for the patterns")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        args.workers,
+        fp=args.input,
+        jsonl=args.jsonl,
+    )
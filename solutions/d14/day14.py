@@ -1,200 +1,240 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-import time
-from functools import cache
-from collections import namedtuple
+
+from solutions import backend
+from solutions.aoc_tools import pick_input
+from solutions.backend import np
+from solutions.checkpoint import EVERY, Checkpoint
+from solutions.cycles import History
+from solutions.grid import Grid
+from solutions.memo import bounded_cache
+from solutions.metrics import emit
+from solutions.timing import count, phase, record
+from solutions.tracing import tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
-Node = namedtuple("Node", "pos, shape")
-
-
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
-def draw_map(node_items, nrows: int, ncols: int):
-    positions = {n.pos: n.shape for n in node_items}
-    lines = []
-    for row in range(nrows):
-        line = ""
-        for col in range(ncols):
-            ch = shape if (shape := positions.get(col + 1j * row)) else "."
-            line += ch
-        lines.append(line)
-    return lines
+# expected exponent of time against input size per part, for scaling.py;
+# spins run until a state repeats, and larger random grids take more
+COMPLEXITY = {2: 2.0}
+# tilt results kept per solve; a 100x100 grid's entry is ~21 KiB
+TILT_CACHE_BYTES = 64 << 20
 
 
-def make_map(line_iter, rock="O", cube="#", space="."):
+def tilt_lanes(grid: Grid) -> tuple:
     """
-    Given a grid of rocks, cubes, and spaces,
-    return tuple of pos and shape for each rock and cube
+    Returns a tuple of lanes for each tilt of a spin cycle, north, west,
+    south, east. A lane is a range of flat indices walked from the edge
+    the rocks roll toward
     """
-    node_map = (
-        Node(complex(j, i), ch)
-        for i, line in enumerate(line_iter)
-        for j, ch in enumerate(line)
-        if (ch == rock or ch == cube)
+    cols = [grid.col_indices(c) for c in range(grid.ncols)]
+    rows = [grid.row_indices(r) for r in range(grid.nrows)]
+    return (
+        tuple(cols),
+        tuple(rows),
+        tuple(c[::-1] for c in cols),
+        tuple(r[::-1] for r in rows),
     )
-    # node_map = (Node(i, k, v) for i, (k, v) in enumerate(node_map.items()))
-    # node_map = {i: {"pos": k, "node": v} for i, (k, v) in enumerate(node_map.items())}
-    return tuple(node_map)
 
 
-@cache
-def ccw_rotate(node_items: tuple, nrows: int):
+@bounded_cache(max_bytes=TILT_CACHE_BYTES)
+def tilt(cells: bytes, lanes: tuple, rock: int, cube: int, space: int) -> bytes:
     """
-    Given 2d coordinate as a complex, and nrows of grid,
-    return the new coordinate after rotating 90deg CCW
-    new col: row
-    new row: nrows - col
+    Rolls every rock to the start of its lane, stopping at cubes and other
+    rocks; cells is hashable so repeated states come straight from cache
     """
-    return tuple(
-        Node(pos=complex(n.pos.imag, nrows - n.pos.real), shape=n.shape)
-        for n in node_items
-    )
+    tilted = bytearray(cells)
+    for lane in lanes:
+        step = lane.step
+        free = lane.start
+        for idx in lane:
+            ch = tilted[idx]
+            if ch == cube:
+                free = idx + step
+            elif ch == rock:
+                if idx != free:
+                    tilted[free] = rock
+                    tilted[idx] = space
+                free += step
+    return bytes(tilted)
 
 
-@cache
-def cw_rotate(node_items: tuple, nrows: int) -> tuple:
+def tilt_np(cells, rock: int, cube: int, space: int):
     """
-    Rotates 90deg CW given tuple of Node containing
-    "pos" attribute describing 2D coordinates using
-    complex numbers, e.g. 2+3j for element in 2nd col, 3rd row
-    (0-based index)
+    tilt() on the NumPy backend, toward row 0 of a 2d array bordered by
+    cubes; other directions pass a transposed or flipped view. Read
+    column by column, the cells are runs between cubes, and a run
+    holding k rocks ends up with them in its first k cells, so rocks
+    are counted per run and placed, not rolled
     """
-    return tuple(
-        Node(pos=complex(nrows - n.pos.imag - 1, n.pos.real), shape=n.shape)
-        for n in node_items
+    line = cells.T.ravel()
+    cubes = np.flatnonzero(line == cube)
+    rocks = np.flatnonzero(line == rock)
+    counts = np.diff(np.searchsorted(rocks, cubes))
+    # rock i of the run after cube j lands at cubes[j] + 1 + i
+    shift = cubes[:-1] + 1 - (np.cumsum(counts) - counts)
+    tilted = np.full(line.size, space, dtype=np.uint8)
+    tilted[cubes] = cube
+    tilted[np.repeat(shift, counts) + np.arange(rocks.size)] = rock
+    return tilted.reshape(cells.shape[::-1]).T
+
+
+def spin_np(cells, rock: int, cube: int, space: int):
+    """One spin cycle, north, west, south, east, on the NumPy backend"""
+    cells = tilt_np(cells, rock, cube, space)
+    cells = tilt_np(cells.T, rock, cube, space).T
+    cells = tilt_np(cells[::-1], rock, cube, space)[::-1]
+    return tilt_np(cells.T[::-1], rock, cube, space)[::-1].T
+
+
+def north_load_np(cells, rock: int) -> int:
+    """north_load of a 2d array; the border rows weigh nothing"""
+    weights = np.arange(cells.shape[0] - 1, -1, -1)
+    return int((cells == rock).sum(axis=1) @ weights)
+
+
+def north_load(grid: Grid, cells: bytes, rock: int) -> int:
+    """Each rock weighs its distance from the south edge"""
+    return sum(
+        (grid.nrows - row) * cells[r.start : r.stop].count(rock)
+        for row, r in enumerate(map(grid.row_indices, range(grid.nrows)))
     )
 
 
-@cache
-def tilt(node_tuples: tuple, rock="O", cube="#", rock_edge=0, cube_edge=0) -> dict:
+def solve(
+    fp: str,
+    part_two: bool = False,
+    n_cycles=1000000000,
+    rock="O",
+    cube="#",
+    checkpoint: float = None,
+    resume: bool = False,
+) -> int:
     """
-    Tilts the node_items toward north
-
-    node_items: node_map.items() = (idx, (Node))
-    Returns tilted node_map
+    Returns the total load on the north beams
+    With checkpoint, part two saves the grid and history every checkpoint
+    seconds; resume picks up from the last save for the same input
     """
-    # convert from dict_items to list for mutability
-    node_items = list(node_tuples)
-    # sort rocks by rows so we're always moving the top rocks first
-    # collect only rocks as their Node
-    rocks = [n for n in node_items if n.shape == rock]
-    # sort rocks by rows
-    rocks_sorted = sorted(rocks, key=lambda r: r.pos.imag)
-    # iterate through rocks to look for any rocks above it
-    for r in rocks_sorted:
-        # consider column above each 'rock' using original node_items
-        # so that cubes are included
-        edges = [
-            n.pos.imag
-            for n in node_items
-            if n.pos.real == r.pos.real and n.pos.imag < r.pos.imag
-        ]
-
-        if edges:
-            # take the lowest node; [-1] selects the highest .imag
-            edge = sorted(edges)[-1]
-            # do not check if edge is already above current rock;
-            # it's always + 1 anyway
-            tilted = edge + 1
+    # read into mem; cubes around the edge stop rocks rolling off
+    with phase("parse"):
+        grid = Grid.from_file(fp, border=cube.encode())
+    logger.info(f"nrows: {grid.nrows}, ncols: {grid.ncols}")
+    with phase("index"):
+        lanes = tilt_lanes(grid)
+    shapes = (ord(rock), ord(cube), ord("."))
+    node_map = bytes(grid.cells)
+    saver = None
+    if part_two and (checkpoint or resume):
+        saver = Checkpoint("d14_part2", node_map, checkpoint or EVERY)
+
+    with phase("solve"), tilt.scope() as cache:
+        trace = tracer(logger)
+        if trace:
+            trace("tilting")
+        if backend.enabled():
+            return solve_np(grid.array(), part_two, n_cycles, *shapes, saver, resume)
+        if not part_two:
+            node_map = tilt(node_map, lanes[0], *shapes)
+            load = north_load(grid, node_map, shapes[0])
         else:
-            # go to boundary
-            tilted = 0
+            # the grid bytes are the fingerprint; save load for each cycle
+            history = History()
+            history.add(node_map, north_load(grid, node_map, shapes[0]))
+            if resume and (state := saver.load()):
+                node_map, history = state["cells"], state["history"]
+                logger.info(f"resuming after cycle {len(history) - 1}")
+            # history holds the start and every cycle after
+            for i in range(len(history) - 1, n_cycles):
+                # north, west, south, east; lanes save rotating the grid
+                for direc in range(4):
+                    node_map = tilt(node_map, lanes[direc], *shapes)
+
+                # logger.debug(f'after cycle {i+1}:')
+                # grid.cells[:] = node_map
+                # logger.debug(f'{grid}')
+                load = north_load(grid, node_map, shapes[0])
+                if cycle := history.add(node_map, load):
+                    logger.info(f"n_first: {cycle.start}\tduration: {cycle.period}")
+                    break
+                if saver and saver.due():
+                    saver.save({"cells": node_map, "history": history})
+                    logger.info(f"checkpoint after cycle {i+1}")
+                if trace:
+                    trace("completed cycle %s", i + 1)
+            load = history.at(n_cycles)
+            count("spins", len(history) - 1)
+        if trace:
+            trace("tilt cache: %s", cache.info())
+        count("tilt_hits", cache.hits)
+        count("tilt_misses", cache.misses)
+        count("tilt_evictions", cache.evictions)
+    if saver:
+        saver.clear()
+    return int(load)
 
-        pos_new = complex(r.pos.real, tilted)
-        # logger.debug(f"node pos updated to {pos_new}")
-        node_items.remove(r)
-        node_items.append(Node(pos_new, rock))
 
-    return tuple(node_items)
+def solve_np(
+    cells,
+    part_two: bool,
+    n_cycles: int,
+    rock,
+    cube,
+    space,
+    saver: Checkpoint = None,
+    resume: bool = False,
+) -> int:
+    """
+    The solve phase on the NumPy backend, cells being Grid.array();
+    its checkpoints hold the same bytes as solve's, so either resumes
+    """
+    if not part_two:
+        return north_load_np(tilt_np(cells, rock, cube, space), rock)
+    history = History()
+    history.add(cells.tobytes(), north_load_np(cells, rock))
+    if resume and (state := saver.load()):
+        history = state["history"]
+        cells = np.frombuffer(state["cells"], dtype=np.uint8).reshape(cells.shape)
+        logger.info(f"resuming after cycle {len(history) - 1}")
+    for _ in range(len(history) - 1, n_cycles):
+        cells = spin_np(cells, rock, cube, space)
+        if cycle := history.add(cells.tobytes(), north_load_np(cells, rock)):
+            logger.info(f"n_first: {cycle.start}\tduration: {cycle.period}")
+            break
+        if saver and saver.due():
+            saver.save({"cells": cells.tobytes(), "history": history})
+            logger.info(f"checkpoint after cycle {len(history) - 1}")
+    if saver:
+        saver.clear()
+    count("spins", len(history) - 1)
+    return history.at(n_cycles)
 
 
 def main(
-    sample: bool, part_two: bool, loglevel: str, n_cycles=1000000000, rock="O", cube="#"
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    fp: str = None,
+    checkpoint: float = None,
+    resume: bool = False,
+    jsonl: str = None,
 ):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
     # timing
-    tstart = time.time_ns()
-    # read into mem
-    lines = list(read_line(fp))
-    nrows = len(lines)
-    ncols = len(lines[0].strip())
-    logger.info(f"nrows: {nrows}, ncols: {ncols}")
-    node_map = make_map(lines)
-
-    logger.debug("tilting")
-    if not part_two:
-        node_map = tilt(node_map)
-        load = sum([nrows - r.pos.imag for r in node_map if r.shape == rock])
-    else:
-        # save load for each cycle
-        past_loads = []
-        past_nodes = []
-        for i in range(n_cycles):
-            for direc in range(4):
-                # tilt first since we're start with north
-                tilted = tilt(node_map)
-                # logger.debug(f'after tilting {direc}:')
-                # for line in draw_map(tilted, nrows, ncols):
-                #     logger.debug(f'{line}')
-                # then rotate
-                # node_map = ccw_rotate(tilted, nrows)
-                node_map = cw_rotate(tilted, nrows)
-                # swap nrows/ncols
-                temp = nrows
-                nrows = ncols
-                ncols = temp
-                # logger.debug(f'after rotating CW:')
-                # for line in draw_map(node_map, nrows, ncols):
-                #     logger.debug(f'{line}')
-
-            # logger.debug(f'after cycle {i+1}:')
-            # for line in draw_map(node_map, nrows, ncols):
-            #     logger.debug(f'{line}')
-            load = sum([nrows - r.pos.imag for r in node_map if r.shape == rock])
-            # check for repeat
-            node_hash = hash(node_map)
-            # if load in past_loads:
-            if node_hash in past_nodes:
-                n_first = past_nodes.index(node_hash)
-                duration = i - n_first
-                n_cycling = n_cycles - n_first
-                n_remain = n_cycling % duration
-                load = past_loads[n_first + n_remain - 1]
-                logger.info(
-                    f"n_first: {n_first}\tduration: {duration}\tn_remain:{n_remain}"
-                )
-                break
-            else:
-                past_nodes.append(node_hash)
-                past_loads.append(load)
-                # if i+1 % 100 == 0:
-                logger.info(
-                    f"completed cycle {i+1}\truntime: {(time.time_ns() - tstart)/1e6} ms"
-                )
-
-    logger.info(f"load: {load}")
-    tstop = time.time_ns()
-    runtime = (tstop - tstart) / 1e6
-    logger.info(f"runtime: {runtime} ms")
+    with record() as timer:
+        load = solve(fp, part_two, checkpoint=checkpoint, resume=resume)
+        with phase("output"):
+            logger.info(f"load: {load}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, load, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -203,5 +243,17 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
+    opt("--checkpoint", type=float, metavar="SECONDS", help="save state this often")
+    opt("--resume", action="store_true", default=False, help="from the last save")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        fp=args.input,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        jsonl=args.jsonl,
+    )
@@ -1,49 +1,53 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-import time
 from collections import namedtuple
 
+from solutions.aoc_tools import pick_input, read_line
+from solutions.cycles import History
+from solutions.metrics import emit
+from solutions.timing import phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
+# expected exponent of time against input size per part, for scaling.py;
+# each tilt scans every rock for every rock, so one tilt is quadratic,
+# and part 2 repeats spins until a state repeats, more on larger grids
+COMPLEXITY = {1: 2.0, 2: 3.0}
+
 # use tuples of namedtuple for @cache
 Node = namedtuple("Node", "idx, shape, pos")
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def make_map(line_iter, rock="O", cube="#", space="."):
-    """ """
-    node_map = {
-        complex(j, i): ch
-        for i, line in enumerate(line_iter)
-        for j, ch in enumerate(line)
-        if (ch == rock or ch == cube)
-    }
+    """
+    Returns {rock: {idx: pos}, cube: {idx: pos}}, the layout expected by tilt
+    """
+    node_map = {rock: {}, cube: {}}
+    for i, line in enumerate(line_iter):
+        for j, ch in enumerate(line):
+            if ch == rock or ch == cube:
+                node_map[ch][len(node_map[ch])] = complex(j, i)
     # rocks = {i: pos for i, (pos, k) in enumerate(node_map.items()) if k == rock}
     # cubes = {i: pos for i, (pos, k) in enumerate(node_map.items()) if k == cube}
     # node_map = {i: {"pos": k, "node": v} for i, (k, v) in enumerate(node_map.items())}
-    node_map
     return node_map
 
 
-def ccw_rotate(node_map, nrows: int):
+def cw_rotate(node_map, nrows: int):
     """
     Given 2d coordinate as a complex, and nrows of grid,
-    return the new coordinate after rotating 90deg CCW
-    new col: row
-    new row: nrows - col
+    return the new coordinate after rotating 90deg CW, so that the
+    west edge becomes north, for the next tilt of the spin
+    new col: nrows - 1 - row
+    new row: col
     """
     return {
-        idx: complex(coord.imag, nrows - coord.real) for idx, coord in node_map.items()
+        idx: complex(nrows - 1 - coord.imag, coord.real)
+        for idx, coord in node_map.items()
     }
 
 
@@ -54,6 +58,7 @@ def tilt(node_map, rock="O", cube="#", rock_edge=0, cube_edge=0) -> dict:
     """
     # sort rocks by rows so we're always moving the top rocks first
     rocks_sorted = sorted(node_map[rock].items(), key=lambda r: r[1].imag)
+    trace = tracer(logger)
     for idx, pos in rocks_sorted:
         rock_edge = 0
         cube_edge = 0
@@ -79,53 +84,78 @@ def tilt(node_map, rock="O", cube="#", rock_edge=0, cube_edge=0) -> dict:
             tilted = 0
 
         pos_new = complex(pos.real, tilted)
-        logger.debug(f"node pos updated to {pos_new}")
+        if trace:
+            trace("node pos updated to %s", pos_new)
         node_map[rock][idx] = pos_new
     return node_map
 
 
-def main(sample: bool, part_two: bool, loglevel: str, rock="O", cube="#"):
-    """ """
-    logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
-    logger.debug(f"loglevel: {loglevel}")
-    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
+def north_load(node_map, nrows: int, rock="O") -> int:
+    return int(sum(nrows - r.imag for r in node_map[rock].values()))
 
-    # timing
-    tstart = time.time_ns()
+
+def solve(
+    fp: str, part_two: bool = False, n_cycles=1000000000, rock="O", cube="#"
+) -> int:
+    """Returns the total load on the north beams"""
     # read into mem
-    lines = list(read_line(fp))
+    with phase("read"):
+        lines = [line.rstrip("\n") for line in read_line(fp)]
     nrows = len(lines)
     ncols = len(lines[0])
-    logger.debug(f"nrows: {nrows}, ncols: {ncols}")
-    node_map = make_map(lines)
-    logger.debug(f"map:\n{node_map}")
-
-    logger.debug("tilting")
-    if not part_two:
-        node_map = tilt(node_map)
-    else:
-        for i in range(1000000):
+    trace = tracer(logger)
+    if trace:
+        trace("nrows: %s, ncols: %s", nrows, ncols)
+    with phase("parse"):
+        node_map = make_map(lines)
+    if trace:
+        trace("map:\n%s", node_map)
+
+    with phase("solve"):
+        if trace:
+            trace("tilting")
+        if not part_two:
+            return north_load(tilt(node_map), nrows, rock)
+        # the set of rock positions is the fingerprint; save load per cycle
+        history = History()
+        history.add(frozenset(node_map[rock].values()), north_load(node_map, nrows))
+        for _ in range(n_cycles):
             for direc in range(4):
                 # tilt first since we're start with north
                 tilted = tilt(node_map)
                 # then rotate
-                rotate_rocks = ccw_rotate(tilted[rock], nrows)
-                rotate_cubes = ccw_rotate(tilted[cube], nrows)
+                rotate_rocks = cw_rotate(tilted[rock], nrows)
+                rotate_cubes = cw_rotate(tilted[cube], nrows)
                 node_map = {rock: rotate_rocks, cube: rotate_cubes}
                 # swap nrows/ncols
                 temp = nrows
                 nrows = ncols
                 ncols = temp
+            # four turns face north again
+            load = north_load(node_map, nrows, rock)
+            if cycle := history.add(frozenset(node_map[rock].values()), load):
+                logger.info(f"n_first: {cycle.start}\tduration: {cycle.period}")
+                break
+        return history.at(n_cycles)
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
+    """ """
+    logger.setLevel(loglevel)
+    fp = pick_input(sample, part_two, fp)
+    logger.debug(f"loglevel: {loglevel}")
+    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    loads = sum([nrows - r.imag for r in node_map[rock].values()])
-    logger.info(f"load: {loads}")
-    tstop = time.time_ns()
-    runtime = (tstop - tstart) / 1e3
-    logger.info(f"runtime: {runtime} us")
+    # timing
+    with record() as timer:
+        loads = solve(fp, part_two)
+        with phase("output"):
+            logger.info(f"load: {loads}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, loads, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -134,5 +164,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
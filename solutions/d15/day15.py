@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-import time
 from collections import defaultdict, namedtuple
 import re
 
+from solutions.aoc_tools import pick_input, read_line
+from solutions.metrics import emit
+from solutions.timing import phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
@@ -33,8 +36,8 @@ class Box:
         if (idx := self.find_idx(label)) >= 0:
             self.labels.remove(label)
             del self.focals[idx]
-        else:
-            logger.debug(f"{label} not in box")
+        elif trace := tracer(logger):
+            trace("%s not in box", label)
 
     def add_lens(self, label: str, focal: int):
         """
@@ -54,13 +57,6 @@ class Box:
         return f"{content}"
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def aoc_hash(step) -> int:
     """
     add ascii val
@@ -77,56 +73,71 @@ def aoc_hash(step) -> int:
     return val
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def solve(fp: str, part_two: bool = False) -> int:
+    """Returns the sum of step hashes, or total focusing power for part two"""
+    with phase("read"):
+        line = next(read_line(fp))
+    with phase("parse"):
+        steps = line.strip().split(",")
+
+    with phase("solve"):
+        if part_two:
+            # aoc_hash gets the box num
+            # all steps are formatted as <label><op>[focal length]
+            # only `=` op will include focal length
+            pattern = re.compile(r"(.*)([-=])(\d{0,1})")
+            boxes = defaultdict(Box)
+            trace = tracer(logger)
+            # iterate through steps
+            for step in steps:
+                if trace:
+                    trace("step: %s", step)
+                parts = pattern.search(step)
+                label = parts.group(1)
+                box_num = aoc_hash(label)
+                if parts.group(2) == "-":
+                    # remove_lens(boxes, box_num, label)
+                    boxes[box_num].remove_lens(label)
+                else:
+                    focal = int(parts.group(3))
+                    # add_lens(boxes, box_num, label, focal)
+                    boxes[box_num].add_lens(label, focal)
+                # logger.debug(f'boxes:\n{pprint(boxes)}')
+
+            # iterate through boxes to find sum
+            powers = []
+            for box_num, lenses in boxes.items():
+                for idx_lens, focal in enumerate(lenses.focals):
+                    # list of Lens namedtuple
+                    power = (1 + box_num) * (1 + idx_lens) * focal
+                    powers.append(power)
+            if trace:
+                trace("boxes: \n%s", boxes)
+            return sum(powers)
+        else:
+            hashes = [aoc_hash(step) for step in steps]
+            return sum(hashes)
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    steps = next(read_line(fp)).strip().split(",")
-
-    tstart = time.time_ns()
-
-    if part_two:
-        # aoc_hash gets the box num
-        # all steps are formatted as <label><op>[focal length]
-        # only `=` op will include focal length
-        pattern = re.compile(r"(.*)([-=])(\d{0,1})")
-        boxes = defaultdict(Box)
-        # iterate through steps
-        for step in steps:
-            logger.debug(f"step: {step}")
-            parts = pattern.search(step)
-            label = parts.group(1)
-            box_num = aoc_hash(label)
-            if parts.group(2) == "-":
-                # remove_lens(boxes, box_num, label)
-                boxes[box_num].remove_lens(label)
+    with record() as timer:
+        total = solve(fp, part_two)
+        with phase("output"):
+            if part_two:
+                logger.info(f"sum focal powers: {total}")
             else:
-                focal = int(parts.group(3))
-                # add_lens(boxes, box_num, label, focal)
-                boxes[box_num].add_lens(label, focal)
-            # logger.debug(f'boxes:\n{pprint(boxes)}')
-
-        # iterate through boxes to find sum
-        powers = []
-        for box_num, lenses in boxes.items():
-            for idx_lens, focal in enumerate(lenses.focals):
-                # list of Lens namedtuple
-                power = (1 + box_num) * (1 + idx_lens) * focal
-                powers.append(power)
-        logger.debug(f"boxes: \n{boxes}")
-        logger.info(f"sum focal powers: {sum(powers)}")
-    else:
-        hashes = [aoc_hash(step) for step in steps]
-
-        logger.info(f"sum: {sum(hashes)}")
-    tstop = time.time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6} ms")
+                logger.info(f"sum: {total}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, total, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -135,5 +146,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
@@ -1,20 +1,32 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-from time import time_ns
+
+from solutions import backend
+from solutions.aoc_tools import pick_input
+from solutions.backend import np
+from solutions.grid import Grid
+from solutions.metrics import emit
+from solutions.search import bfs_array
+from solutions.timing import count, phase, record
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
+# expected exponent of time against input size per part, for scaling.py;
+# part two tries every edge entry, ~sqrt(n) of them, each O(n)
+COMPLEXITY = {2: 1.5}
+
+SLASH, BACKSLASH, DASH, PIPE = b"/\\-|"
+
 
 class Beam:
     # shared attributes between all Beams
     # access with Beam.traversed
     traversed = set()
 
-    def __init__(self, direc: complex, pos: complex) -> None:
+    def __init__(self, direc: int, pos: int) -> None:
         self.direc = direc
         self.pos = pos
         self.nx = None
@@ -23,16 +35,16 @@ class Beam:
     def __repr__(self) -> str:
         return f"dir: {self.direc}\tpos: {self.pos}\ntraversed: {self.traversed}"
 
-    def traverse(self, grid, max_x, max_y):
+    def traverse(self, grid: Grid):
         """
         Update dir and pos based on next tile
+        pos is a flat Grid index and direc one of its offsets
         Returns another Beam if split
         """
         # calc and validate
         self.nx = self.direc + self.pos
-        if (self.direc, self.nx) in Beam.traversed or not (
-            0 <= self.nx.real < max_x and 0 <= self.nx.imag < max_y
-        ):
+        tile = grid[self.nx]
+        if tile == grid.border or (self.direc, self.nx) in Beam.traversed:
             # loop or outside bounds
             self.complete = True
         else:
@@ -41,42 +53,35 @@ class Beam:
             # store traversed tiles
             Beam.traversed.add((self.direc, self.nx))
             # update dir based on prior dir and new tile
-            tile = grid[int(self.nx.imag)][int(self.nx.real)]
             # Beam obj
-            if split_dir := self.update_dir(tile):
+            if split_dir := self.update_dir(tile, grid.width):
                 return Beam(split_dir, self.pos)
 
-    def update_dir(self, tile) -> complex:
+    def update_dir(self, tile: int, width: int) -> int:
         split_dir = None
-        # logger.debug(f"entry: {self.direc}\ttile: {tile}")
-        match tile:
-            case "/":
-                self.direc = -1j / self.direc
-            case "\\":
-                self.direc = 1j / self.direc
-            case "-":
-                if self.direc not in [-1, 1]:
-                    # split
-                    self.direc = 1 + 0j
-                    split_dir = -1 + 0j
-            case "|":
-                if self.direc not in [-1j, 1j]:
-                    # split
-                    self.direc = 1j
-                    split_dir = -1j
+        # logger.debug(f"entry: {self.direc}\ttile: {chr(tile)}")
+        # horizontal offsets are +-1, vertical +-width
+        horizontal = self.direc in (-1, 1)
+        if tile == SLASH:
+            self.direc = -width * self.direc if horizontal else -self.direc // width
+        elif tile == BACKSLASH:
+            self.direc = width * self.direc if horizontal else self.direc // width
+        elif tile == DASH:
+            if not horizontal:
+                # split
+                self.direc = 1
+                split_dir = -1
+        elif tile == PIPE:
+            if horizontal:
+                # split
+                self.direc = width
+                split_dir = -width
         # if logger.isEnabledFor(logging.DEBUG):
         #     logger.debug(f"nxdir: {self.direc}\tsplitdir: {split_dir}")
         return split_dir
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
-def count_energized(entry_beam, grid, max_x, max_y):
+def count_energized(entry_beam, grid):
     """
     Given an arbitrary entry beam located at the edge,
     count energized tiles
@@ -87,7 +92,7 @@ def count_energized(entry_beam, grid, max_x, max_y):
         while not beam.complete:
             # logger.debug(f'{30*"-"}\n{repr(beam)}')
             # moves beam by one tile; returns split if encountered
-            split_beam = beam.traverse(grid, max_x, max_y)
+            split_beam = beam.traverse(grid)
             if split_beam:
                 # logger.debug(f'list of splits: {splits}')
                 # logger.debug(f"new splits: {repr(split_beam)}")
@@ -105,71 +110,114 @@ def count_energized(entry_beam, grid, max_x, max_y):
     return n_energized
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
-    """ """
-    logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
-    logger.debug(f"loglevel: {loglevel}")
-    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
-
-    grid = [line.strip() for line in read_line(fp)]
-    tstart = time_ns()
-
-    max_x = len(grid[0])
-    max_y = len(grid)
-    logger.debug(f"size: {max_y} rows x {max_x} cols")
-    for line in grid:
-        logger.debug(f"{line}")
-
-    if part_two:
-        # construct list of candidates
-        energized = []
-        # for col in range(0, max_x):
-        #     energized.append((count_energized(Beam(1j, col - 1j), grid, max_x, max_y), col - 1j))
-        #     energized.append((count_energized(Beam(-1j, col + max_y * 1j), grid, max_x, max_y), col + max_y * 1j))
-        energized = [
-            (count_energized(Beam(1j, col - 1j), grid, max_x, max_y), col - 1j)
-            for col in range(0, max_x)
-        ]
-        energized += [
-            (
-                count_energized(Beam(-1j, col + max_y * 1j), grid, max_x, max_y),
-                col + max_y * 1j,
-            )
-            for col in range(0, max_x)
-        ]
-        energized += [
-            (
-                count_energized(Beam(1 + 0j, -1 + row * 1j), grid, max_x, max_y),
-                -1 + row * 1j,
-            )
-            for row in range(0, max_y)
-        ]
-        energized += [
-            (
-                count_energized(Beam(-1 + 0j, max_x + row * 1j), grid, max_x, max_y),
-                max_x + row * 1j,
-            )
-            for row in range(0, max_y)
+def beam_successors_np(grid: Grid):
+    """
+    NumPy backend: the beam graph as a table. A state is a beam entering
+    a tile, pos * 4 + d for direction d of grid.offsets, N/E/S/W, and
+    column s of the (2, n_states) table holds its one or two successors,
+    -1 for none; beams into the border leave the contraption
+    """
+    # directions out of each tile for each direction in
+    out = np.full((2, 256, 4), -1, dtype=np.intp)
+    out[0] = np.arange(4)
+    out[0, SLASH] = [1, 0, 3, 2]
+    out[0, BACKSLASH] = [3, 2, 1, 0]
+    out[:, DASH] = [[1, 1, 1, 3], [3, -1, 3, -1]]
+    out[:, PIPE] = [[0, 2, 2, 2], [-1, 0, -1, 0]]
+    tiles = grid.array().ravel()
+    n = tiles.size
+    direcs = out[:, tiles]
+    nxt = np.arange(n)[:, None] + np.array(grid.offsets)[direcs]
+    # border tiles are never entered, so their wrapped steps are masked
+    nxt = nxt.clip(0, n - 1)
+    valid = (direcs >= 0) & (tiles[:, None] != grid.border)
+    valid &= tiles[nxt] != grid.border
+    return np.where(valid, nxt * 4 + direcs, -1).reshape(2, -1)
+
+
+def count_energized_np(succ, grid: Grid, entries: list, max_states=2**24) -> list:
+    """
+    count_energized on the NumPy backend for every (direc, pos) entry
+    beam. A beam's path is narrow, so entries are searched in batches as
+    one graph of copies of the table, keeping each layer wide enough to
+    be worth a vectorized step; max_states bounds a batch's depth array
+    """
+    # copies sit a power of two apart, so splitting a state is a mask
+    shift = (succ.shape[1] - 1).bit_length()
+    mask = (1 << shift) - 1
+    batch = max(1, max_states >> shift)
+
+    def expand(frontier):
+        nxt = succ[:, frontier & mask]
+        return ((frontier & ~mask) | nxt)[nxt >= 0]
+
+    counts = []
+    for start in range(0, len(entries), batch):
+        chunk = entries[start : start + batch]
+        sources = [
+            i << shift | (pos + direc) * 4 + grid.offsets.index(direc)
+            for i, (direc, pos) in enumerate(chunk)
         ]
-        # for row in range(0, max_y):
-        #     energized.append((count_energized(Beam(1+0j, -1 + row * 1j), grid, max_x, max_y), -1 + row * 1j))
-        #     energized.append((count_energized(Beam(-1+0j, max_x + row * 1j), grid, max_x, max_y), max_x + row * 1j))
+        depth = bfs_array(len(chunk) << shift, sources, expand)
+        # a tile's 4 states as one uint32 is nonzero if any was reached
+        tiles = (depth >= 0).view(np.uint32).reshape(len(chunk), -1)
+        counts += np.count_nonzero(tiles, axis=1).tolist()
+    return counts
+
+
+def solve(fp: str, part_two: bool = False) -> int:
+    """Returns the energized tile count, or its maximum over entries for part two"""
+    # beams leaving the contraption hit the blank border
+    with phase("parse"):
+        grid = Grid.from_file(fp, border=b" ")
+
+    logger.debug(f"size: {grid.nrows} rows x {grid.ncols} cols")
+    logger.debug(f"{grid}")
+
+    with phase("solve"):
+        if part_two:
+            # construct list of candidates; beams enter from the border
+            entries = [(grid.S, grid.idx(-1, col)) for col in range(grid.ncols)]
+            entries += [
+                (grid.N, grid.idx(grid.nrows, col)) for col in range(grid.ncols)
+            ]
+            entries += [(grid.E, grid.idx(row, -1)) for row in range(grid.nrows)]
+            entries += [
+                (grid.W, grid.idx(row, grid.ncols)) for row in range(grid.nrows)
+            ]
+        else:
+            entries = [(grid.E, grid.idx(0, -1))]
+        if backend.enabled():
+            counts = count_energized_np(beam_successors_np(grid), grid, entries)
+        else:
+            counts = [count_energized(Beam(direc, pos), grid) for direc, pos in entries]
+        count("entries", len(entries))
+        if not part_two:
+            return counts[0]
 
+        energized = zip(counts, (pos for _, pos in entries))
         most_energy = max(energized, key=lambda b: b[0])
-        max_entry = most_energy[1]
+        max_entry = grid.coords(most_energy[1])
         logger.info(f"max: {most_energy[0]}\tentry: {max_entry}")
+        return most_energy[0]
+
 
-    else:
-        origin = Beam(1 + 0j, -1 + 0j)
-        n_energized = count_energized(origin, grid, max_x, max_y)
-        logger.info(f"energized tiles: {n_energized}")
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
+    """ """
+    logger.setLevel(loglevel)
+    fp = pick_input(sample, part_two, fp)
+    logger.debug(f"loglevel: {loglevel}")
+    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    tstop = time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6} ms")
+    with record() as timer:
+        n_energized = solve(fp, part_two)
+        with phase("output"):
+            logger.info(f"energized tiles: {n_energized}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, n_energized, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -178,5 +226,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
@@ -1,83 +1,74 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-from dataclasses import dataclass
-from collections import defaultdict, deque
-from math import inf
-from time import time_ns
+
+from solutions.aoc_tools import pick_input
+from solutions.grid import Grid
+from solutions.metrics import emit
+from solutions.search import dijkstra, pack, path, unpack
+from solutions.timing import phase, record
+from solutions.tracing import tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
+# digit chars to their heat loss; the 0 border marks outside the grid
+HEAT = bytes.maketrans(b"0123456789", bytes(range(10)))
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
-@dataclass
-class Node:
-    pos: complex
-    entry: complex
-    n_dir: int = 0  # init to 1 when creating child nodes
-
-    @property
-    def real(self):
-        # computed attribute via @property
-        return int(self.pos.real)
-
-    @real.setter
-    def real(self, value):
-        # node.real = new_val assignment is already
-        # disallowed since this function only raises Exception
-        # but this provides a more specific message
-        raise Exception("read only")
 
-    @property
-    def imag(self):
-        return int(self.pos.imag)
+# no entry direction yet, at the source
+START = 4
 
-    @imag.setter
-    def imag(self, value):
-        raise Exception("read only")
 
-    def __hash__(self):
-        return hash((self.pos, self.entry, self.n_dir))
-
-    def __sub__(self, other):
-        # only works between Nodes
-        return self.pos - other.pos
-
-    def __add__(self, other):
-        if isinstance(other, Node):
-            addend = other.pos
-        elif isinstance(other, complex):
-            addend = other
-        else:
-            raise ValueError("Not supported")
-        return self.pos + addend
+def crucible_moves(grid: Grid, min_blocks: int, max_blocks: int):
+    """
+    Returns the neighbours function over packed (pos, entry, n_dir)
+    states, yielding (state, heat loss) for each legal move
+    entry indexes grid.offsets, N E S W, so its reverse is entry ^ 2
+    """
+    offsets = grid.offsets
+    cells = grid.cells
+
+    def moves(state: int):
+        pos, entry, n_dir = unpack(state, 2)
+        for d, off in enumerate(offsets):
+            if entry == START:
+                n = 1
+            elif d == entry:
+                # max moves in a row
+                if n_dir >= max_blocks:
+                    continue
+                n = n_dir + 1
+            elif d == entry ^ 2 or n_dir < min_blocks:
+                # no reverse; min moves in a row before turning
+                continue
+            else:
+                n = 1
+            nx = pos + off
+            # the 0 border is the bounds check
+            if loss := cells[nx]:
+                yield pack(nx, d, n), loss
 
-    def __repr__(self) -> str:
-        return f"pos: {self.pos}\tentry: {self.entry}\tndir: {self.n_dir}"
+    return moves
 
 
 def heat_loss_dijkstra(
-    grid, src=0 + 0j, min_blocks: int = 0, max_blocks: int = 3, part_two: bool = False
+    grid: Grid,
+    src: int = None,
+    min_blocks: int = 0,
+    max_blocks: int = 3,
 ):
     """
     Given weighted 2d grid, find the path with minimal heat loss using
-    dijkstra
+    A* on a heapq priority queue
 
     Params
     ------
-    grid: list[str]
-        2d array of heat loss
-    src: complex
-        uses imag plane to denote rows; real for columns
+    grid: Grid
+        heat loss per block, 0 on the border
+    src: int
+        flat grid index; top left if None
     min_blocks: int >= 0
         minimum number of nodes moved per direction after turning
     max_blocks: int >= 1
@@ -88,127 +79,76 @@ def heat_loss_dijkstra(
     loss: int
         heat loss of the optimized path
     """
-
-    ncols = len(grid[0])
-    nrows = len(grid)
-    logger.info(f"grid size: {nrows} x {ncols}")
-    # mark all vertices as inf (unvisited)
-    dists = defaultdict(lambda: inf)
-    # dist to source initialize to 0
-    src = Node(src, entry=0j)
-    dists[src] = 0
-    # init all prev to None
-    prev = defaultdict(lambda: None)
-    visited = set()
+    trace = tracer(logger)
+    logger.info(f"grid size: {grid.nrows} x {grid.ncols}")
+    if src is None:
+        src = grid.idx(0, 0)
     # target @ bottom right corner
-    target = ncols - 1 + (nrows - 1) * 1j
-    to_check = [src]
-    dirs = [-1 + 0j, 1 + 0j, 1j, -1j]
-    while to_check:
-        # retrieve node with min dist[node]
-        to_check = sorted(to_check, key=lambda node: dists[node], reverse=True)
-        curr = to_check.pop()
-        if curr in visited:
-            continue
-        if curr.pos == target:
-            logger.info(f"potential target found: {dists[curr]}")
-            if part_two:
-                if curr.n_dir < min_blocks:
-                    # not enough to satisfy min movements;  discard
-                    continue
-                else:
-                    # due to our sorting (aka priority queue) the target
-                    # that comes up is necessarily the shortest dist
-                    # targets.append(curr)
-                    # logger.info(f"{len(targets)} potential target saved")
-                    return dists[curr]
-            else:
-                # part 1
-                node = curr
-                route = deque()
-                if prev[node] or node == src:
-                    while node:
-                        route.appendleft(node.pos)
-                        node = prev[node]
-                logger.info(f"route: {route}")
-                return dists[curr]
-        # logger.debug(f'{"-"*30}\ncurrent node: {curr}: {grid[curr.imag][curr.real]}')
-        # check adjacent nodes
-        for dir in dirs:
-            # logger.debug(f"checking dir {dir}")
-            # no reverse
-            if prev[curr] is not None and dir == prev[curr] - curr:
-                logger.debug("next; reverse")
-                continue
-            # max moves in a row
-            if dir == curr.entry and curr.n_dir >= max_blocks:
-                logger.debug("next; too many in a row")
-                continue
-            # min moves in a row
-            if curr != src and dir != curr.entry and curr.n_dir < min_blocks:
-                # src has dir=0j
-                logger.debug("next; not enough in a row")
-                continue
-            if dir == curr.entry:
-                # increment n_dir; assign before using dists[nx]
-                # to maintain same hash
-                n_dir = curr.n_dir + 1
-            else:
-                n_dir = 1
-            nx = curr + dir
-            # bounds check
-            if 0 <= nx.real < ncols and 0 <= nx.imag < nrows:
-                # check if new dist is shorter
-                nx = Node(nx, dir, n_dir)
-                alt = dists[curr] + int(grid[nx.imag][nx.real])
-                # logger.debug(f"alt: {alt}\t current dist: {dists[nx]}")
-                if alt < dists[nx]:
-                    # if so, update dist, prev
-                    dists[nx] = alt
-                    prev[nx] = curr
-                    nx.entry = dir
-                    # logger.debug(f"nx: {nx}\tdist: {alt}")
-                    if nx not in visited:
-                        # this needs to be checked so we do not re-add nodes
-                        # that were popped from to_check
-                        # logger.debug(f'added to queue')
-                        to_check.append(nx)
-            else:
-                logger.debug("next; outside or visited")
-                continue
-        visited.add(curr)
-        # f = input()
-
+    target = grid.idx(grid.nrows - 1, grid.ncols - 1)
+
+    def at_target(state: int) -> bool:
+        pos, _, n_dir = unpack(state, 2)
+        return pos == target and n_dir >= min_blocks
+
+    # manhattan distance, since every block loses at least 1
+    t_row, t_col = divmod(target, grid.width)
+
+    def to_target(state: int) -> int:
+        row, col = divmod(unpack(state, 2)[0], grid.width)
+        return abs(t_row - row) + abs(t_col - col)
+
+    parents = {} if trace else None
+    found = dijkstra(
+        [pack(src, START, 0)],
+        crucible_moves(grid, min_blocks, max_blocks),
+        at_target,
+        heuristic=to_target,
+        parents=parents,
+    )
+    if found is None:
+        return None
+    loss, end = found
+    if trace:
+        route = [grid.coords(unpack(s, 2)[0]) for s in path(parents, end)]
+        trace("route: %s", route)
+    return loss
 
-def main(sample: bool, part_two: bool, loglevel: str):
-    """ """
-    logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
-    logger.debug(f"loglevel: {loglevel}")
-    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
+def solve(fp: str, part_two: bool = False) -> int:
+    """Returns the lowest heat loss from top left to bottom right"""
     # read input
-    grid_rows = [line.strip() for line in read_line(fp)]
-    grid = [[int(ch) for ch in line] for line in grid_rows]
-    # execute
-    tstart = time_ns()
+    with phase("parse"):
+        grid = Grid.from_file(fp, border=b"\0")
+        grid.cells = grid.cells.translate(HEAT)
     if part_two:
         min_blocks = 4
         max_blocks = 10
     else:
         min_blocks = 0
         max_blocks = 3
-    dist = heat_loss_dijkstra(
-        grid, min_blocks=min_blocks, max_blocks=max_blocks, part_two=part_two
-    )
+    with phase("solve"):
+        return heat_loss_dijkstra(grid, min_blocks=min_blocks, max_blocks=max_blocks)
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
+    """ """
+    logger.setLevel(loglevel)
+    fp = pick_input(sample, part_two, fp)
+    logger.debug(f"loglevel: {loglevel}")
+    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
+
+    # execute
+    with record() as timer:
+        dist = solve(fp, part_two)
 
-    # output
-    logger.info(f"lowest heat loss: {dist}")
-    tstop = time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6} ms")
+        # output
+        with phase("output"):
+            logger.info(f"lowest heat loss: {dist}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, dist, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -217,5 +157,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
@@ -1,23 +1,24 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-from time import time_ns
 from collections import namedtuple
+
+from solutions.aoc_tools import cached_parse, fixed_fields, pick_input, read_line
+from solutions.metrics import emit
+from solutions.timing import phase, record
+from solutions.tracing import tracer
 # from itertools import cycle
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
 Vertex = namedtuple("Vertex", "pos rgb", defaults=[0j, None])
-
-
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
+# part two's "(#70c710)": 5 hex digits of metres, then the direction
+HEX_FIELDS = fixed_fields((2, 7), (7, 8))
+# each direction as a step on the complex plane; hex digits 0-3 are RDLU
+STEPS = {"U": 1j, "D": -1j, "L": -1 + 0j, "R": 1 + 0j}
+HEX_DIRS = "RDLU"
 
 
 def calc_polygon_area(vertices: dict) -> int:
@@ -39,55 +40,75 @@ def calc_polygon_area(vertices: dict) -> int:
     return abs(area // 2)
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+@phase("parse")
+@cached_parse(version=1)
+def parse(fp: str) -> list[tuple]:
+    """
+    Returns the dig plan as (step, metres, hex step, hex metres, rgb) per
+    line, so one parse serves both parts
+    """
+    plan = []
+    for line in read_line(fp):
+        direc, metres, rgb = line.split()
+        hex_metres, hex_direc = HEX_FIELDS(rgb)
+        plan.append(
+            (
+                STEPS[direc],
+                int(metres),
+                STEPS[HEX_DIRS[int(hex_direc)]],
+                int(hex_metres, 16),
+                rgb[2:-1],  # trim () and #
+            )
+        )
+    return plan
+
+
+def solve(fp: str, part_two: bool = False) -> int:
+    """Returns the cubic metres of lava the lagoon holds"""
+    plan = parse(fp)
+    vertices = dict()
+    perim = 0
+
+    trace = tracer(logger)
+    with phase("index"):
+        for i, (direc, metres, hex_direc, hex_metres, rgb) in enumerate(plan):
+            if part_two:
+                direc, metres = hex_direc, hex_metres
+            if vertices.get(i):
+                pos = vertices[i].pos + direc * metres
+            else:
+                pos = direc * metres
+            vertices[i + 1] = Vertex(pos, rgb)
+            perim += metres
+            if trace:
+                trace("add node %s %s", i + 1, vertices[i + 1])
+
+    with phase("solve"):
+        # execute
+        area = calc_polygon_area(vertices)
+        interior = area - perim // 2 + 1
+        holes_dug = perim + interior
+        logger.info(f"perimeter: {perim}")
+    return int(holes_dug)
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    # read input
-    vertices = dict()
-    perim = 0
-
-    for i, line in enumerate(read_line(fp)):
-        line = line.strip()
-        if part_two:
-            _, _, rgb = line.split()
-            rgb = rgb[2:-1]  # trim () and #
-            metres = int(rgb[:5], 16)
-            direc = int(rgb[-1])
-        else:
-            direc, metres, rgb = line.split()
-        match direc:
-            case "U" | 3:
-                direc = 1j
-            case "D" | 1:
-                direc = -1j
-            case "L" | 2:
-                direc = -1 + 0j
-            case "R" | 0:
-                direc = 1 + 0
-        if vertices.get(i):
-            pos = vertices[i].pos + direc * int(metres)
-        else:
-            pos = direc * int(metres)
-        vertices[i + 1] = Vertex(pos, rgb)
-        perim += int(metres)
-        logger.debug(f"add node {i+1} {vertices[i+1]}")
-
-    # execute
-    tstart = time_ns()
-    area = calc_polygon_area(vertices)
-    interior = area - perim // 2 + 1
-    holes_dug = perim + interior
-    # output
-    logger.info(f"holes: {holes_dug}\tperimeter: {perim}")
-    tstop = time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6} ms")
+    with record() as timer:
+        holes_dug = solve(fp, part_two)
+        # output
+        with phase("output"):
+            logger.info(f"holes: {holes_dug}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, holes_dug, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -96,5 +117,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
@@ -2,42 +2,44 @@
 """
 Represent our part ranges with namedtuples instead of using dict
 """
-from pathlib import Path
 import argparse
 import logging
 import sys
-from time import time_ns
 from collections import namedtuple
-from functools import reduce
-from dataclasses import dataclass, astuple
-from copy import copy
+from dataclasses import dataclass, replace
+from math import prod
+from operator import gt, lt
+
+from solutions.aoc_tools import (
+    cached_parse,
+    iter_blocks,
+    key_values,
+    map_file,
+    pick_input,
+)
+from solutions.intervals import RangeSet
+from solutions.metrics import emit
+from solutions.timing import phase, record
+from solutions.tracing import tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
 Rule = namedtuple("Rule", "part op arg dest", defaults=["", "", None, ""])
+# comparisons a rule's op names
+OPS = {"<": lt, ">": gt}
 
 
 # Part = namedtuple("Part", "x m a s")
 @dataclass
 class Part:
-    x: list
-    m: list
-    a: list
-    s: list
-
-    def __copy__(self):
-        return Part(self.x, self.m, self.a, self.s)
+    x: RangeSet
+    m: RangeSet
+    a: RangeSet
+    s: RangeSet
 
     def calc_poss(self):
-        return reduce(lambda x, y: x * (y[1] - y[0] + 1), astuple(self), 1)
-
-
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
+        return prod(r.size for r in (self.x, self.m, self.a, self.s))
 
 
 def parse_rules(line):
@@ -56,7 +58,7 @@ def parse_rules(line):
     for r in rules:
         if (rte_idx := r.find(":")) > -1:
             part = r[0]
-            op = r[1]  # use eval
+            op = r[1]  # looked up in OPS
             dest = r[rte_idx + 1 :]
             arg = int(r[2:rte_idx])
             parsed_rules.append(Rule(part, op, arg, dest))
@@ -73,7 +75,7 @@ def parse_parts(line):
     where ... are integers
     Stored as namedtuples
     """
-    return {ch[0]: int(ch[2:]) for ch in line[1:-1].split(",")}
+    return key_values(line[1:-1])
 
 
 def apply_rule(part: dict, rule: dict) -> str:
@@ -81,7 +83,7 @@ def apply_rule(part: dict, rule: dict) -> str:
     for subr in rule:
         if subr.part:
             # not catchall
-            if eval(f"{part[subr.part]}{subr.op}{subr.arg}"):
+            if OPS[subr.op](part[subr.part], subr.arg):
                 return subr.dest
             else:
                 continue  # next rule
@@ -96,8 +98,8 @@ def apply_range_rule(part: tuple, rule: list) -> list:
 
     params
     ------
-    part: dict
-        {'x': [min, max], 'm':[...], 'a': [...], 's': [...]}
+    part: Part
+        Part(x=RangeSet, m=RangeSet, a=RangeSet, s=RangeSet)
     rule: list
         [Rule(part, op, arg, dest), ...]
 
@@ -109,136 +111,139 @@ def apply_range_rule(part: tuple, rule: list) -> list:
     # parts = {}
     # can't use dict; each rule may have multiple outlets to A or R
     # use list of dict(dest: part)
+    trace = tracer(logger)
     parts = []
     for subr in rule:
         if subr.part:
             # not catchall
-            logger.debug(f"part: {part}")
-            logger.debug(f"rule: {subr}")
-            comps = [
-                eval(f"{subpart}{subr.op}{subr.arg}")
-                for subpart in getattr(part, subr.part)
-            ]
-            if all(comps):
-                # true for both lower/upper; return whole part
-                logger.debug(f"both true; send to {subr.dest}")
-                parts.append({subr.dest: part})
-                break
-            elif not any(comps):
-                # false for both; next rule
-                logger.debug("none true; next rule")
-                continue
+            if trace:
+                trace("part: %s\nrule: %s", part, subr)
+            # half-open ranges; x<arg passes below arg, x>arg from arg + 1
+            if subr.op == "<":
+                passing, rest = getattr(part, subr.part).split(subr.arg)
             else:
-                # change only subr.part's values
-                r_lower, r_upper = getattr(part, subr.part)
-                split = copy(part)
-                # look at the op
-                if subr.op == "<":
-                    setattr(split, subr.part, [r_lower, subr.arg - 1])
-                    setattr(part, subr.part, [subr.arg, r_upper])
-                else:
-                    # '>'
-                    setattr(split, subr.part, [subr.arg + 1, r_upper])
-                    setattr(part, subr.part, [r_lower, subr.arg])
-                parts.append({subr.dest: split})
-                logger.debug(f"split: {split}")
+                rest, passing = getattr(part, subr.part).split(subr.arg + 1)
+            if passing:
+                parts.append({subr.dest: replace(part, **{subr.part: passing})})
+                if trace:
+                    trace("split: %s", passing)
+            if not rest:
+                # nothing left for later rules
+                if trace:
+                    trace("all sent to %s", subr.dest)
+                break
+            part = replace(part, **{subr.part: rest})
         else:
-            logger.debug(f"sending {part} to {subr.dest}")
+            if trace:
+                trace("sending %s to %s", part, subr.dest)
             parts.append({subr.dest: part})
-    logger.debug(f"returning parts:\n{parts}")
+    if trace:
+        trace("returning parts:\n%s", parts)
     return parts
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
-    """ """
-    logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
-    logger.debug(f"loglevel: {loglevel}")
-    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
-
-    # read input
+@phase("parse")
+@cached_parse(version=1)
+def parse(fp: str) -> tuple[dict, list]:
+    """Returns the rules by id, and the parts"""
+    # an empty line separates rules and parts
+    blocks = iter_blocks(map_file(fp))
     rules = {}
-    if not part_two:
-        parts = []
-    read_rules = True
-    for line in read_line(fp):
-        # start parsing rules
-        # logger.debug(f"line: {line}")
-        if not line.strip():
-            # empty lines separate rules and parts
-            if part_two:
-                # read only the rules
-                break
-            read_rules = False
-            continue
-        elif read_rules:
-            rules |= parse_rules(line.strip())
-        else:
-            # read parts now
-            parts.append(parse_parts(line.strip()))
+    for line in next(blocks):
+        rules |= parse_rules(bytes(line).decode())
+    parts = [parse_parts(bytes(line).decode()) for line in next(blocks, [])]
+    return rules, parts
+
+
+def solve(fp: str, part_two: bool = False) -> int:
+    """Returns the sum of accepted ratings, or accepted combinations for part two"""
+    # read input; part two uses only the rules
+    rules, parts = parse(fp)
 
     # logger.debug(f"rules: {rules}")
     # if not part_two:
     #     logger.debug(f"parts: {parts}")
 
-    # execute
-    tstart = time_ns()
-    if part_two:
-        accept = []
-        rule_id = "in"
-        part_min = 1
-        part_max = 4000
-        xmas_rng = [[part_min, part_max] for i in range(4)]
-        # parts = {rule_id: {letter: [part_min, part_max] for letter in "xmas"}}
-        parts = {rule_id: Part(*xmas_rng)}
-
-        while parts:
-            logger.debug(f"\n\nparts to check: {parts}")
-            check_parts = {}
-            for rule_id, part in parts.items():
-                logger.debug(f"applying {rule_id} to {part}")
-                new_parts = apply_range_rule(part, rules[rule_id])
-                # process 'A' and 'R's; potential multiple A/R per rule
-                # use append to keep parts separate
-                accept += [list(p.values())[0] for p in new_parts if "A" in p.keys()]
-                # removed all A and Rs
-
-                for p in new_parts:
-                    check_parts |= (
-                        p
-                        if ("A" not in p.keys()) and ("R" not in p.keys())
-                        else check_parts
-                    )
-            parts = check_parts
-            # f = input()
-
-        # accept: list[dict]
-        logger.debug(f"{len(accept)} accepts:\n{accept}")
-        # num_poss = 0
-        # for p in accept:
-        #     num_poss += reduce(lambda x, y: x * (y[1] - y[0] + 1), list(p.values()), 1)
-        num_poss = sum([p.calc_poss() for p in accept])
-
-        logger.info(f"num possibilities: {num_poss}")
-
-    else:
-        part_sums = []
-        for part in parts:
-            # follow rules for each part, starting with rules['in']
+    with phase("solve"):
+        # execute
+        if part_two:
+            accept = []
             rule_id = "in"
-            while rule_id not in ["R", "A"]:
-                rule_id = apply_rule(part, rules[rule_id])
-            if rule_id == "A":
-                part_sums.append(sum(part.values()))
-                logger.debug(f"accept part {part}\tnew sums: {part_sums}")
+            part_min = 1
+            part_max = 4000
+            xmas_rng = [RangeSet([(part_min, part_max + 1)]) for i in range(4)]
+            # parts = {rule_id: {letter: [part_min, part_max] for letter in "xmas"}}
+            parts = {rule_id: Part(*xmas_rng)}
+
+            trace = tracer(logger)
+            while parts:
+                if trace:
+                    trace("\n\nparts to check: %s", parts)
+                check_parts = {}
+                for rule_id, part in parts.items():
+                    if trace:
+                        trace("applying %s to %s", rule_id, part)
+                    new_parts = apply_range_rule(part, rules[rule_id])
+                    # process 'A' and 'R's; potential multiple A/R per rule
+                    # use append to keep parts separate
+                    accept += [
+                        list(p.values())[0] for p in new_parts if "A" in p.keys()
+                    ]
+                    # removed all A and Rs
+
+                    for p in new_parts:
+                        check_parts |= (
+                            p
+                            if ("A" not in p.keys()) and ("R" not in p.keys())
+                            else check_parts
+                        )
+                parts = check_parts
+                # f = input()
+
+            # accept: list[dict]
+            logger.debug(f"{len(accept)} accepts:\n{accept}")
+            # num_poss = 0
+            # for p in accept:
+            #     num_poss += reduce(lambda x, y: x * (y[1] - y[0] + 1), list(p.values()), 1)
+            num_poss = sum([p.calc_poss() for p in accept])
+
+            return num_poss
+
+        else:
+            trace = tracer(logger)
+            part_sums = []
+            for part in parts:
+                # follow rules for each part, starting with rules['in']
+                rule_id = "in"
+                while rule_id not in ["R", "A"]:
+                    rule_id = apply_rule(part, rules[rule_id])
+                if rule_id == "A":
+                    part_sums.append(sum(part.values()))
+                    if trace:
+                        trace("accept part %s\tnew sums: %s", part, part_sums)
+            return sum(part_sums)
+
 
-        # output
-        logger.info(f"sums: {sum(part_sums)}")
-    tstop = time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6} ms")
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
+    """ """
+    logger.setLevel(loglevel)
+    fp = pick_input(sample, part_two, fp)
+    logger.debug(f"loglevel: {loglevel}")
+    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
+
+    with record() as timer:
+        ans = solve(fp, part_two)
+        with phase("output"):
+            if part_two:
+                logger.info(f"num possibilities: {ans}")
+            else:
+                # output
+                logger.info(f"sums: {ans}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, ans, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -247,5 +252,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
@@ -1,63 +1,71 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
-import re
 import logging
 import sys
-from collections import defaultdict
+from functools import partial
 import math
 
+from solutions.aoc_tools import pairs, pick_input, read_line
+from solutions.metrics import emit
+from solutions.parallel import preduce
+from solutions.timing import phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
+CMAX = dict(red=12, green=13, blue=14)
+
+
+def score_game(record: str, part_two: bool = False) -> int:
+    """Returns the game ID if possible, else 0, or the set power for part two"""
+    gid, sets = record.split(": ")
+    gid = int(gid[5:])
+    # which set a count came from doesn't matter, only each color's max
+    setmax = {}
+    for count, color in pairs(sets.rstrip().replace(";", ","), ", ", " "):
+        setmax[color] = max(setmax.get(color, 0), int(count))
+    if trace := tracer(logger):
+        trace("ID: %s\tsetmax: %s", gid, setmax)
+    if not part_two:
+        if all([setmax[color] <= CMAX[color] for color in setmax]):
+            return gid
+        return 0
+    else:
+        return math.prod(setmax.values())
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
 
+def solve(fp: str, part_two: bool = False, workers: int = 1) -> int:
+    """Returns the sum of possible game IDs, or sum of set powers for part two"""
+    # streamed, so reading is timed within solve
+    records = read_line(fp)
+    with phase("solve"):
+        return preduce(partial(score_game, part_two=part_two), records, workers=workers)
 
-def main(sample: bool, part_two: bool, loglevel: str):
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    workers: int = 1,
+    fp: str = None,
+    jsonl: str = None,
+):
     """ """
     # boilerplate #
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    elif sample and part_two:
-        fp = "sample2.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.debug(f"Using {fp}")
     # BOILERPLATE END #
 
-    total = 0
-    cmax = dict(red=12, green=13, blue=14)
-    p_id = re.compile(r"\d+")
-    p_sets = re.compile(r"(\d+) (red|blue|green)[, ]*")
-    for record in read_line(fp):
-        colors = defaultdict(list)
-        gid, _ = record.split(":")
-        gid = int(p_id.search(gid).group(0))
-        logger.debug(f"ID: {gid}")
-        # sets = sets.split(';')
-        cubecounts = p_sets.finditer(record)
-        logger.debug("parsed sets:")
-        for m in cubecounts:
-            logger.debug(f"count: {m.group(1)}; color: {m.group(2)}")
-            colors[m.group(2)].append(int(m.group(1)))
-            logger.debug(f"colors: {colors}")
-        setmax = {color: max(colors[color]) for color in colors}
-        logger.debug(f"setmax:\n{setmax}")
-        if not part_two:
-            if all([setmax[color] <= cmax[color] for color in setmax]):
-                total += gid
-        else:
-            total += math.prod(setmax.values())
-        logger.debug(f"new total: {total}")
-
-    logger.info(f"total: {total}")
+    with record() as timer:
+        total = solve(fp, part_two, workers)
+        with phase("output"):
+            logger.info(f"total: {total}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, total, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -66,5 +74,15 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--workers", "-w", type=int, default=1, help="processes for the game records")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        args.workers,
+        fp=args.input,
+        jsonl=args.jsonl,
+    )
@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
 from collections import deque, namedtuple, defaultdict
-from time import time_ns
 from functools import reduce
 
+from solutions.aoc_tools import cached_parse, pick_input, read_line
+from solutions.checkpoint import EVERY, Checkpoint
+from solutions.metrics import emit
+from solutions.timing import count, phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
+# sample file for each part, used by the shared runner
+SAMPLES = ("sample2.txt", "sample2.txt")
+
 Pulse = namedtuple("Pulse", "input state dest")
 
 
@@ -23,7 +30,8 @@ class Module:
 
     def __init__(self, name: str = None, inputs: list = [], dests: list = []) -> None:
         self.name = name
-        self.inputs = inputs
+        # copy; the shared default would otherwise collect every conjunction's inputs
+        self.inputs = list(inputs)
         self.dests = dests
 
     def process_pulse(self, name, pulse: bool, *args, **kwargs):
@@ -85,90 +93,172 @@ class Conjunction(Module):
         super().process_pulse(name, pulse)
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
+def network_state(network: dict) -> dict:
+    """Flip states and conjunction memories by module name, for a checkpoint"""
+    return {
+        name: m.state if isinstance(m, Flip) else dict(m._last_inputs)
+        for name, m in network.items()
+        if isinstance(m, (Flip, Conjunction))
+    }
 
 
-def main(sample: bool, part_two: bool, loglevel: str, n_cycles: int = 1000):
-    """ """
-    logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-        target = "rx"
-    else:
-        fp = "sample2.txt"
-        target = "output"
-    logger.debug(f"loglevel: {loglevel}")
-    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
+def restore_network(network: dict, states: dict):
+    for name, state in states.items():
+        if isinstance(network[name], Flip):
+            network[name].state = state
+        else:
+            network[name]._last_inputs = state
 
-    # read input
-    network = defaultdict(Module)
+
+@phase("parse")
+@cached_parse(version=1)
+def parse(fp: str) -> dict:
+    """
+    Returns {name: (kind, dests)}, kind being the module's % or & prefix,
+    or "" for the broadcaster
+    """
+    wiring = {}
     for line in read_line(fp):
         parser = line.strip().replace(",", "").split()
         line_id = parser[0]
-        dests = parser[2:]
-        match [*line_id]:
-            case ["%", *name]:
-                new_module = Flip(dests=dests)
-            case ["&", *name]:
-                new_module = Conjunction(dests=dests)
-            case _:
-                new_module = Module(dests=dests)
-                name = line_id
-
-        network["".join(name)] = new_module
-
-    # update inputs for each conj
-    for m in network:
-        # append m to input for each dest
-        for dest in network[m].dests:
-            if dest in network and isinstance(network[dest], Conjunction):
-                network[dest].add_input(m)
+        kind = line_id[0] if line_id[0] in "%&" else ""
+        wiring[line_id[len(kind) :]] = (kind, parser[2:])
+    return wiring
+
+
+def solve(
+    fp: str,
+    part_two: bool = False,
+    n_presses: int = 1000,
+    checkpoint: float = None,
+    resume: bool = False,
+) -> int:
+    """
+    Returns lo * hi pulses sent after n_presses, or for part two, the
+    button presses needed for all target inputs to fire
+    With checkpoint, the state between presses is saved every checkpoint
+    seconds; resume picks up from the last save for the same input
+    """
+    # pulses left over from a previous run share the class level queue
+    Module.queue.clear()
+    wiring = parse(fp)
+    network = defaultdict(Module)
+    with phase("index"):
+        for name, (kind, dests) in wiring.items():
+            match kind:
+                case "%":
+                    new_module = Flip(dests=dests)
+                case "&":
+                    new_module = Conjunction(dests=dests)
+                case _:
+                    new_module = Module(dests=dests)
+            network[name] = new_module
+        # update inputs for each conj
+        for m in network:
+            # append m to input for each dest
+            for dest in network[m].dests:
+                if dest in network and isinstance(network[dest], Conjunction):
+                    network[dest].add_input(m)
 
     # part 2 target inputs are the 4 conj
     # that send to the conjunction before target; last needs to send LO
     # if all *those* inputs are ON then
     target_inputs = ["mp", "qt", "qb", "ng"]
     # target_inputs = ['dx', 'ck', 'cs', 'jh']
-    # execute
-    tstart = time_ns()
-
-    src = Pulse("button", 0, "broadcaster")
-    n_lo = 0
-    n_hi = 0
-    n_cycles = 0
-    target_cycles = []
-    while target_inputs:
-        if not Module.queue:
-            Module.queue.append(src)
-            n_cycles += 1
-            logger.debug(f"cycle {n_cycles}")
-        pulse = Module.queue.popleft()
-        logger.debug(f"pulse: {pulse}")
-        if pulse.state:
-            n_hi += 1
-        else:
-            n_lo += 1
-            if pulse.dest in target_inputs:
-                logger.info(
-                    f"{pulse.input} -{pulse.state}-> {pulse.dest} at cycle {n_cycles}"
-                )
-                target_cycles.append(n_cycles)
-                target_inputs.remove(pulse.dest)
-        network[pulse.dest].process_pulse(pulse.dest, pulse.state, pulse.input)
+    if part_two and not all(m in network for m in target_inputs):
+        # otherwise we'd press the button forever
+        raise ValueError(f"{fp} is missing part two targets {target_inputs}")
+    saver = None
+    if checkpoint or resume:
+        name = f"d20_part{2 if part_two else 1}"
+        saver = Checkpoint(name, repr(wiring).encode(), checkpoint or EVERY)
+    with phase("solve"):
+        # execute
+        trace = tracer(logger)
+        src = Pulse("button", 0, "broadcaster")
+        n_lo = 0
+        n_hi = 0
+        n_cycles = 0
+        target_cycles = []
+        if resume and (state := saver.load()):
+            restore_network(network, state["network"])
+            Module.queue.extend(Pulse(*p) for p in state["queue"])
+            n_lo, n_hi, n_cycles = state["n_lo"], state["n_hi"], state["n_cycles"]
+            target_cycles, target_inputs = state["target_cycles"], state["targets"]
+            logger.info(f"resuming after press {n_cycles}")
+        # part one stops once the last press has settled
+        while target_inputs if part_two else (Module.queue or n_cycles < n_presses):
+            if not Module.queue:
+                if saver and saver.due():
+                    # between presses, so the queue is empty
+                    saver.save(
+                        {
+                            "network": network_state(network),
+                            "queue": [tuple(p) for p in Module.queue],
+                            "n_lo": n_lo,
+                            "n_hi": n_hi,
+                            "n_cycles": n_cycles,
+                            "target_cycles": target_cycles,
+                            "targets": target_inputs,
+                        }
+                    )
+                    logger.info(f"checkpoint after press {n_cycles}")
+                Module.queue.append(src)
+                n_cycles += 1
+                if trace:
+                    trace("cycle %d", n_cycles)
+            pulse = Module.queue.popleft()
+            if trace:
+                trace("pulse: %s", pulse)
+            if pulse.state:
+                n_hi += 1
+            else:
+                n_lo += 1
+                if pulse.dest in target_inputs:
+                    logger.info(
+                        f"{pulse.input} -{pulse.state}-> {pulse.dest} at cycle {n_cycles}"
+                    )
+                    target_cycles.append(n_cycles)
+                    target_inputs.remove(pulse.dest)
+            network[pulse.dest].process_pulse(pulse.dest, pulse.state, pulse.input)
+    if saver:
+        saver.clear()
+    count("presses", n_cycles)
+    count("lo_pulses", n_lo)
+    count("hi_pulses", n_hi)
 
     # output
     if part_two:
-        target_cycle = reduce(lambda x, y: x * y, target_cycles, 1)
-        logger.info(f"target cycle: {target_cycle}")
-    else:
-        logger.info(f"lo: {n_lo}\thi: {n_hi}\tprod: {n_lo * n_hi}")
+        return reduce(lambda x, y: x * y, target_cycles, 1)
+    logger.info(f"lo: {n_lo}\thi: {n_hi}")
+    return n_lo * n_hi
+
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    fp: str = None,
+    checkpoint: float = None,
+    resume: bool = False,
+    jsonl: str = None,
+):
+    """ """
+    logger.setLevel(loglevel)
+    fp = pick_input(sample, part_two, fp, SAMPLES)
+    logger.debug(f"loglevel: {loglevel}")
+    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    tstop = time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6} ms")
+    with record() as timer:
+        ans = solve(fp, part_two, checkpoint=checkpoint, resume=resume)
+        with phase("output"):
+            if part_two:
+                logger.info(f"target cycle: {ans}")
+            else:
+                logger.info(f"prod: {ans}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, ans, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -177,5 +267,17 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
+    opt("--checkpoint", type=float, metavar="SECONDS", help="save state this often")
+    opt("--resume", action="store_true", default=False, help="from the last save")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        fp=args.input,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        jsonl=args.jsonl,
+    )
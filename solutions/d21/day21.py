@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-from time import time_ns
-from collections import deque, defaultdict
+
+from solutions import backend
+from solutions.aoc_tools import pick_input
+from solutions.backend import np
+from solutions.grid import Grid
+from solutions.metrics import emit
+from solutions.search import bfs, bfs_array
+from solutions.timing import phase, record
+from solutions.tracing import tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
+# solve() arguments for the sample, used by the shared runner
+SAMPLE_KWARGS = {"n_steps": 6}
+
 
 class Node:
     def __init__(self, parent, children) -> None:
@@ -17,18 +26,10 @@ class Node:
         self.visited = False
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def dfs_nsteps(
-    grid: list,
+    grid: Grid,
     visited: set,
-    plots: set,
-    node: complex,
+    node: int,
     depth: int = 0,
     n_steps: int = 6,
 ):
@@ -37,101 +38,90 @@ def dfs_nsteps(
     """
     # label node as _discovered_ at depth=n_steps
     # f = input()
-    logger.debug(f"checking {node}\tdepth: {depth}")
+    trace = tracer(logger)
+    if trace:
+        trace("checking %s\tdepth: %s", node, depth)
     if depth == n_steps and node not in visited:
         visited.add(node)
-        logger.debug(f"adding {node}\t{len(visited)} nodes found")
+        if trace:
+            trace("adding %s\t%s nodes found", node, len(visited))
         return
     # diving for more nodes
-    for plot in [node + direc for direc in [-1, 1j, 1, -1j]]:
-        if plot in plots and depth < n_steps:
-            # check boundary
+    for plot in [node + direc for direc in grid.offsets]:
+        if grid[plot] != grid.border and depth < n_steps:
+            # border is rock, so this also checks boundary
             # only check for visited when adding n_step nodes
             # check for n_steps
-            dfs_nsteps(grid, visited, plots, plot, depth=depth + 1, n_steps=n_steps)
+            dfs_nsteps(grid, visited, plot, depth=depth + 1, n_steps=n_steps)
 
     return visited
 
 
-def bfs_nsteps(plots: set, root: complex, n_steps: int):
+def bfs_nsteps(grid: Grid, root: int, n_steps: int) -> dict[int, int]:
     """
     Find all potential landing nodes in n_steps by finding shortest
     paths to all nodes, and checking for parity
+    Returns {plot: steps from root} for every plot within n_steps
     """
-    logger.debug(f"root: {root}\tn_steps: {n_steps}")
-    queue = deque([root])
-    visited = set([root])
-    parents = defaultdict(list)
-    while queue:
-        node = queue.popleft()
-        # n_steps - 1: root is included in parents,
-        # so len(parents[node]) = 1 @ step 1
-        # step = 4 when len = 4; child nodes are 5th step; allow enqueue
-        # step = 5 when len = 5; do not allow further enqueues
-        enqueue = True if len(parents[node]) < n_steps - 1 else False
-        logger.debug(f"visiting {node}; further enqueue {enqueue}")
-        for plot in [node + direc for direc in [-1, 1j, 1, -1j]]:
-            if plot not in visited and plot in plots:
-                # 1 do not revisit
-                # 2 check for boundary and rocks
-                # 3 check depth
-                visited.add(plot)
-                parents[plot] = parents[node] + [node]  # same as append
-                if enqueue:
-                    # only continue if n_step not reached
-                    queue.append(plot)
-                logger.debug(f"checking {plot}\tparents: {parents[plot]}")
-        # f = input()
-    return parents, visited
-
-
-def main(sample: bool, part_two: bool, loglevel: str, plot=".", rock="#", start="S"):
-    """ """
-    logger.setLevel(loglevel)
-    if sample:
-        fp = "sample.txt"
-        n_steps = 6
-    else:
-        fp = "input.txt"
-        n_steps = 64
-    logger.debug(f"loglevel: {loglevel}")
-    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
+    if trace := tracer(logger):
+        trace("root: %s\tn_steps: %s", root, n_steps)
+    offsets = grid.offsets
+    cells = grid.cells
+    rock = grid.border
+
+    def plots(node: int):
+        # border is rock, so this also checks boundary
+        return [p for off in offsets if cells[p := node + off] != rock]
+
+    return bfs([root], plots, max_depth=n_steps)
+
+
+def bfs_nsteps_np(grid: Grid, root: int, n_steps: int):
+    """bfs_nsteps on the NumPy backend; an array of steps, -1 if unreached"""
+    cells = grid.array().ravel()
+    offsets = np.array(grid.offsets)
+
+    def plots(frontier):
+        near = (frontier[:, None] + offsets).ravel()
+        return near[cells[near] != grid.border]
+
+    return bfs_array(cells.size, [root], plots, max_depth=n_steps)
+
+
+def solve(
+    fp: str, part_two: bool = False, n_steps: int = 64, plot=".", rock="#", start="S"
+) -> int:
+    """Returns the number of garden plots reachable in exactly n_steps"""
     if part_two:
         n_steps = 26501365
-    # read input
-    grid = [line.strip() for line in read_line(fp)]
-    plots = set(
-        [
-            col + row * 1j
-            for row, line in enumerate(grid)
-            for col, ch in enumerate(line)
-            if ch == plot
-        ]
-    )
-
-    logger.debug(f"plots loc:\n{plots}")
-    src = [
-        col + row * 1j
-        for row, line in enumerate(grid)
-        for col, ch in enumerate(line)
-        if ch == start
-    ][0]
+    # read input; rocks around the edge double as the bounds check
+    with phase("parse"):
+        grid = Grid.from_file(fp, border=rock.encode())
+
+    trace = tracer(logger)
+    if trace:
+        trace("grid:\n%s", grid)
+    src = grid.find(start.encode())
     # starting point is also plot
-    plots.add(src)
-    logger.debug(f"start: {src}")
+    grid[src] = ord(plot)
+    if trace:
+        trace("start: %s", grid.coords(src))
     visited = set()
 
-    # execute
-    tstart = time_ns()
-    # dfs_nsteps(grid, visited, plots, src, n_steps=n_steps)
-    parents, visited = bfs_nsteps(plots, src, n_steps)
-    parity = n_steps % 2
-    targets = [p for p, lineage in parents.items() if len(lineage) % 2 == parity]
+    with phase("solve"):
+        # execute
+        # dfs_nsteps(grid, visited, src, n_steps=n_steps)
+        parity = n_steps % 2
+        if backend.enabled():
+            depth = bfs_nsteps_np(grid, src, n_steps)
+            return int(np.count_nonzero((depth >= 0) & (depth % 2 == parity)))
+        depth = bfs_nsteps(grid, src, n_steps)
+        targets = [p for p, steps in depth.items() if steps % 2 == parity]
 
     # output
     visited = targets
-    logger.debug(f"visited:\n{visited}")
-    logger.info(f"reachable node count: {len(visited)}")
+    if trace:
+        trace("visited:\n%s", visited)
     # for row in range(len(grid)):
     #     line = ''
     #     for col in range(len(grid[0])):
@@ -144,8 +134,26 @@ def main(sample: bool, part_two: bool, loglevel: str, plot=".", rock="#", start=
     #         else:
     #             line += plot
     #     print(line)
-    tstop = time_ns()
-    logger.info(f"runtime: {(tstop-tstart)/1e6} ms")
+    return len(visited)
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
+    """ """
+    logger.setLevel(loglevel)
+    fp = pick_input(sample, part_two, fp)
+    n_steps = 6 if sample else 64
+    logger.debug(f"loglevel: {loglevel}")
+    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
+
+    with record() as timer:
+        n_reachable = solve(fp, part_two, n_steps=n_steps)
+        with phase("output"):
+            logger.info(f"reachable node count: {n_reachable}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, n_reachable, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -154,5 +162,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
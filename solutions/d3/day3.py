@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
@@ -7,15 +6,16 @@ import re
 from itertools import starmap, chain
 import operator
 
+from solutions.aoc_tools import pick_input, read_line
+from solutions.metrics import emit
+from solutions.timing import phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
-
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
+# sample file for each part, used by the shared runner
+SAMPLES = ("sample.txt", "sample2.txt")
 
 
 def find_gear_parts(
@@ -28,16 +28,20 @@ def find_gear_parts(
     p_num=re.compile(r"\d+"),
 ) -> list:
     """ """
+    trace = tracer(logger)
+    if trace:
+        trace("above:\t%scurr:\t%sbelow:\t%s", above, curr, below)
     # list() allows reuseability
-    logger.debug(f"above:\t{above}curr:\t{curr}below:\t{below}")
     nums = [p_num.finditer(line) for line in [above, curr, below] if line]
     nums = list(chain.from_iterable(nums))
-    logger.debug(f"nums:{nums}")
+    if trace:
+        trace("nums:%s", nums)
     parts = []
     if curr:
         gears = gears = p_gear.finditer(curr) if part_two else p_sym.finditer(curr)
         for gear in gears:
-            logger.debug(f"gear start and end: {gear.start()}-{gear.end()}")
+            if trace:
+                trace("gear start and end: %s-%s", gear.start(), gear.end())
             # collect numbers if position of the gear is adj to number
             adj_part = [
                 int(num.group(0))
@@ -47,7 +51,8 @@ def find_gear_parts(
             # only append if we have a pair
             if part_two and (num_parts := len(adj_part)) == 2:
                 parts.append(adj_part)
-                logger.debug(f"found part {adj_part}")
+                if trace:
+                    trace("found part %s", adj_part)
             elif not part_two:
                 parts.extend(adj_part)
             else:
@@ -56,39 +61,50 @@ def find_gear_parts(
     return parts
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
-    """ """
-    logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    elif sample and part_two:
-        fp = "sample2.txt"
-    else:
-        fp = "sample.txt"
-    logger.debug(f"loglevel: {loglevel}")
-    logger.debug(f"Using {fp}")
-    logger.info(f"Pt. ii: {part_two}")
-
+def solve(fp: str, part_two: bool = False) -> int:
+    """Returns the sum of part numbers, or sum of gear ratios for part two"""
     # analyze rolling window of 3 lines
     # adding `\s` to our regex is crucial, to ignore all whitespace char
-    # note that this soln requires an empty line atthe end of input file
-    # otherwise a separate section after our for loop is required to
-    # specifically handle the last line
+    # the last line is only checked once a line follows it, so an empty
+    # one is appended; input is consumed one line at a time
     prog_sym = re.compile(r"[^\d\s.]")
     prog_num = re.compile(r"\d+")
+    # streamed, so reading is timed within solve
+    lines = read_line(fp)
     n_2 = n_1 = None
     total = 0
-    for line in read_line(fp):
-        if part_two:
-            total += sum(
-                starmap(operator.mul, find_gear_parts(n_2, n_1, line, part_two))
-            )
-        else:
-            total += sum(find_gear_parts(n_2, n_1, line))
-        # rollover
-        n_2 = n_1
-        n_1 = line
-    logger.info(f"total: {total}")
+    with phase("solve"):
+        # a blank line after the last closes the window over it
+        for line in chain(lines, [""]):
+            if part_two:
+                total += sum(
+                    starmap(operator.mul, find_gear_parts(n_2, n_1, line, part_two))
+                )
+            else:
+                total += sum(find_gear_parts(n_2, n_1, line))
+            # rollover
+            n_2 = n_1
+            n_1 = line
+    return total
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
+    """ """
+    logger.setLevel(loglevel)
+    fp = pick_input(sample, part_two, fp, SAMPLES)
+    logger.debug(f"loglevel: {loglevel}")
+    logger.debug(f"Using {fp}")
+    logger.info(f"Pt. ii: {part_two}")
+
+    with record() as timer:
+        total = solve(fp, part_two)
+        with phase("output"):
+            logger.info(f"total: {total}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, total, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -97,5 +113,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
@@ -1,18 +1,19 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
 
+from solutions.aoc_tools import pick_input, read_line, split_ints
+from solutions.metrics import emit
+from solutions.parallel import pmap, preduce
+from solutions.timing import phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
-
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
+# sample file for each part, used by the shared runner
+SAMPLES = ("sample.txt", "sample2.txt")
 
 
 def count_common_num(line: str):
@@ -24,10 +25,8 @@ def count_common_num(line: str):
         return None
     card_id = int(card_id[5:])
     set1, set2 = nums.split("|")
-    # default .split() separator is any whitespace
-    # alt using map: set_1 = set(map(int, set1.split()))
-    set1 = set([int(num) for num in set1.split()])
-    set2 = set([int(num) for num in set2.split()])
+    set1 = set(split_ints(set1))
+    set2 = set(split_ints(set2))
     common_num = set1.intersection(set2)
     # logger.debug(f'line: {line}')
     # logger.debug(f'common: {common_num}')
@@ -35,57 +34,77 @@ def count_common_num(line: str):
     return card_id, len(common_num)
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def card_points(line: str) -> int:
+    """Points for one card; cards without matches are worth nothing"""
+    # filter them out before 2 ** -1 turns them into 0.5
+    if line and (result := count_common_num(line)) and (num_common := result[1]):
+        return 2 ** (num_common - 1)
+    return 0
+
+
+def solve(fp: str, part_two: bool = False, workers: int = 1) -> int:
+    """Returns the total points, or total scratchcards for part two"""
+    # streamed, so reading is timed within solve
+    lines = read_line(fp)
+    with phase("solve"):
+        if part_two:
+            # match_dict = {
+            #     cid: dict(matches=num_common, count=1)
+            #     for cid, num_common in
+            #     [count_common_num(line) for line in read_line(fp)]
+            # }
+
+            # the additional generator exp result for result... allows filtering for None
+            # returned by count_common_num if ValueError (blank line) arises
+            match_dict = {
+                cid: dict(matches=num_common, count=1)
+                for cid, num_common in (
+                    result
+                    for result in pmap(count_common_num, lines, workers=workers)
+                    if result is not None
+                )
+            }
+
+            trace = tracer(logger)
+            # iterate over each card to get match
+            for card in match_dict:
+                if trace:
+                    trace("card: %s", card)
+                # since 3.7 dicts are ordered by default
+                for cid in range(card + 1, card + match_dict[card]["matches"] + 1):
+                    match_dict[cid]["count"] += match_dict[card]["count"]
+
+                if trace:
+                    trace("%s", match_dict)
+
+            total = sum([match_dict[card]["count"] for card in match_dict])
+        else:
+            # part one
+            total = preduce(card_points, lines, workers=workers)
+    return total
+
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    workers: int = 1,
+    fp: str = None,
+    jsonl: str = None,
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    elif sample and part_two:
-        fp = "sample2.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp, SAMPLES)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    if part_two:
-        # match_dict = {
-        #     cid: dict(matches=num_common, count=1)
-        #     for cid, num_common in
-        #     [count_common_num(line) for line in read_line(fp)]
-        # }
-
-        # the additional generator exp result for result... allows filtering for None
-        # returned by count_common_num if ValueError (blank line) arises
-        match_dict = {
-            cid: dict(matches=num_common, count=1)
-            for cid, num_common in (
-                result
-                for result in (count_common_num(line) for line in read_line(fp))
-                if result is not None
-            )
-        }
-
-        # iterate over each card to get match
-        for card in match_dict:
-            logger.debug(f"card: {card}")
-            # since 3.7 dicts are ordered by default
-            for cid in range(card + 1, card + match_dict[card]["matches"] + 1):
-                match_dict[cid]["count"] += match_dict[card]["count"]
-
-            logger.debug(match_dict)
-
-        total = sum([match_dict[card]["count"] for card in match_dict])
-    else:
-        # part one
-        total = sum(
-            [
-                2 ** (num_common - 1)
-                for line in read_line(fp)
-                if line and (_, num_common := count_common_num(line))
-            ]
-        )
-
-    logger.info(f"total: {total}")
+    with record() as timer:
+        total = solve(fp, part_two, workers)
+        with phase("output"):
+            logger.info(f"total: {total}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, total, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -94,5 +113,15 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--workers", "-w", type=int, default=1, help="processes for the cards")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        args.workers,
+        fp=args.input,
+        jsonl=args.jsonl,
+    )
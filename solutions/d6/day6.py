@@ -8,23 +8,19 @@ Input:
 Time:        53     71     78     80
 Distance:   275   1181   1215   1524
 """
-from pathlib import Path
 import argparse
 import logging
 import sys
 import math
 
+from solutions.aoc_tools import pick_input, read_line, split_ints
+from solutions.metrics import emit
+from solutions.timing import phase, record
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def is_int(num: float) -> bool:
     """Is our float equal to its int?
     using subtraction and int() introduces precision issues related
@@ -54,43 +50,52 @@ def find_margin(time, dist) -> int:
     return n_soln
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def solve(fp: str, part_two: bool = False) -> int:
+    """Returns the product of the ways to win each race"""
+    with phase("read"):
+        lines = list(read_line(fp))
+    with phase("parse"):
+        for line in lines:
+            label, _, nums = line.partition(":")
+            # part two reads each line as one number, spaces ignored
+            if label == "Time":
+                if part_two:
+                    time = int(nums.replace(" ", ""))
+                else:
+                    times = split_ints(nums)
+            elif label == "Distance":
+                if part_two:
+                    dist = int(nums.replace(" ", ""))
+                else:
+                    dists = split_ints(nums)
+
+    with phase("solve"):
+        # solve quadratic for each pair of (time, dist)
+        if part_two:
+            margins = find_margin(time, dist)
+        else:
+            margins = math.prod(
+                [find_margin(time, dist) for time, dist in zip(times, dists)]
+            )
+    return margins
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    for line in read_line(fp):
-        tokens = line.split()
-        if tokens[0] == "Time:":
-            if part_two:
-                time = int("".join(tokens[1:]))
-                logger.debug(f"time: {time}")
-            else:
-                times = [int(token) for token in tokens[1:]]
-                logger.debug(f"times: {times}")
-        elif tokens[0] == "Distance:":
-            if part_two:
-                dist = int("".join(tokens[1:]))
-                logger.debug(f"distance: {dist}")
-            else:
-                dists = [int(token) for token in tokens[1:]]
-                logger.debug(f"distances: {dists}")
-        else:
-            next
-
-    # solve quadratic for each pair of (time, dist)
-    if part_two:
-        margins = find_margin(time, dist)
-    else:
-        margins = math.prod(
-            [find_margin(time, dist) for time, dist in zip(times, dists)]
-        )
-    logger.info(f"margin power: {margins}")
+    with record() as timer:
+        margins = solve(fp, part_two)
+        with phase("output"):
+            logger.info(f"margin power: {margins}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, margins, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -99,5 +104,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
-from collections import deque, Counter
-from functools import cmp_to_key, partial
+from collections import Counter
+from functools import partial
+
+from solutions.aoc_tools import cached_parse, pick_input, read_line
+from solutions.metrics import emit
+from solutions.parallel import pmap
+from solutions.timing import phase, record
+from solutions.tracing import tracer
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
@@ -25,13 +30,6 @@ logger.addHandler(logging.StreamHandler(sys.stdout))
 #    def __gt
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def get_card_val(c: str, part_two: bool = False) -> int:
     """
     returns the poker card value in int, e.g. K -> 13
@@ -56,22 +54,6 @@ def get_card_val(c: str, part_two: bool = False) -> int:
         raise ValueError(f"Not a valid card: {c}")
 
 
-def is_a_higher_than_b(a, b, part_two: bool = False) -> int:
-    """compares them as if they were poker cards"""
-    # both are numbers
-    a_val = get_card_val(a, part_two)
-    b_val = get_card_val(b, part_two)
-    try:
-        if a_val > b_val:
-            return 1
-        elif a_val < b_val:
-            return -1
-        else:
-            return 0
-    except TypeError as e:
-        logger.error(f"problem values: {a}: {a_val} and {b}: {b_val}")
-
-
 def get_hand_val(hand: str, part_two: bool = False):
     """
     Determines what type of poker hand
@@ -102,33 +84,13 @@ def get_hand_val(hand: str, part_two: bool = False):
         raise ValueError(f"not a valid hand: {hand}")
 
 
-def compare_hands(a: str, b: str, part_two: bool = False) -> int:
-    """Compares to poker hands
-    Returns -1 for a < b, 0 for a = b, 1 for a > b
-    Used in conjunction with built-in sorted()
-    and the functools.cmp_to_key util
+def hand_key(hand: str, part_two: bool = False) -> tuple:
     """
-    logger.debug(f"compare hands part two: {part_two}")
-    val_a = get_hand_val(a, part_two)
-    val_b = get_hand_val(b, part_two)
-    logger.debug(f"a: {a}\tval: {val_a}")
-    logger.debug(f"b: {b}\tval: {val_b}")
-    if val_a > val_b:
-        return 1
-    elif val_a < val_b:
-        return -1
-    else:
-        # same type; compare card by card in order
-        logger.debug("equal hand type; check for cards")
-        a = deque(a)
-        b = deque(b)
-        cmp = 0
-        while a and b and not cmp:
-            card_a = a.popleft()
-            card_b = b.popleft()
-            cmp = is_a_higher_than_b(card_a, card_b, part_two)
-            logger.debug(f"card a: {card_a}\tcard b: {card_b}\tresult: {cmp}")
-        return cmp
+    Sort key that orders poker hands:
+    hand type first, then card by card
+    """
+    cards = tuple(get_card_val(c, part_two) for c in hand)
+    return get_hand_val(hand, part_two), cards
 
 
 def use_joker(hand: Counter) -> Counter:
@@ -148,32 +110,55 @@ def use_joker(hand: Counter) -> Counter:
         return hand
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
-    """ """
-    logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
-    logger.debug(f"loglevel: {loglevel}")
-    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
+@phase("parse")
+@cached_parse(version=1)
+def parse(fp: str) -> dict:
+    """Returns {hand: bid}"""
+    return {
+        tokens[0]: int(tokens[1]) for line in read_line(fp) if (tokens := line.split())
+    }
+
+
+def solve(fp: str, part_two: bool = False, workers: int = 1) -> int:
+    """Returns the total winnings of the ranked hands"""
     # for line in read_line(fp):
     #    tokens = line.split()
     #    hand = tokens[0]
     #    bid = int(tokens[1])
 
-    all_hands = {
-        tokens[0]: int(tokens[1]) for line in read_line(fp) if (tokens := line.split())
-    }
-    logger.debug(f"hands: {all_hands}")
-    if part_two:
-        hands = sorted(
-            all_hands.keys(), key=cmp_to_key(partial(compare_hands, part_two=part_two))
-        )
-    else:
-        hands = sorted(all_hands.keys(), key=cmp_to_key(compare_hands))
-    winnings = sum(all_hands[hand] * (i + 1) for i, hand in enumerate(hands))
-    logger.info(f"winnings: {winnings}")
+    all_hands = parse(fp)
+    if trace := tracer(logger):
+        trace("hands: %s", all_hands)
+    with phase("solve"):
+        # valuing each hand is independent, so only that is spread over workers;
+        # the sort itself compares the precomputed keys
+        keys = pmap(partial(hand_key, part_two=part_two), all_hands, workers=workers)
+        hands = [hand for _, hand in sorted(zip(keys, all_hands))]
+        winnings = sum(all_hands[hand] * (i + 1) for i, hand in enumerate(hands))
+    return winnings
+
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    workers: int = 1,
+    fp: str = None,
+    jsonl: str = None,
+):
+    """ """
+    logger.setLevel(loglevel)
+    fp = pick_input(sample, part_two, fp)
+    logger.debug(f"loglevel: {loglevel}")
+    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
+
+    with record() as timer:
+        winnings = solve(fp, part_two, workers)
+        with phase("output"):
+            logger.info(f"winnings: {winnings}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, winnings, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -182,5 +167,15 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--workers", "-w", type=int, default=1, help="processes for the hand valuation")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        args.workers,
+        fp=args.input,
+        jsonl=args.jsonl,
+    )
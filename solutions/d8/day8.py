@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
@@ -8,17 +7,18 @@ from itertools import cycle
 from functools import reduce
 from math import gcd
 
+from solutions.aoc_tools import cached_parse, fixed_fields, pick_input, read_line
+from solutions.cycles import History, first_seen
+from solutions.metrics import emit
+from solutions.timing import phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
 MapRecord = namedtuple("MapRecord", ["key", "left", "right"])
-
-
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
+# "AAA = (BBB, CCC)"
+NODE_FIELDS = fixed_fields((0, 3), (7, 10), (12, 15))
 
 
 def parse_map_entry(line: str) -> dict:
@@ -27,53 +27,58 @@ def parse_map_entry(line: str) -> dict:
     {'AAA': {'L': 'BBB', 'R': 'CCC'}}
     skip re in lieu of effective hardcoding
     """
-    k = line[:3]
-    l = line[7:10]
-    r = line[12:15]
-    r = MapRecord(k, l, r)
-    return r
+    return MapRecord._make(NODE_FIELDS(line))
 
 
 def count_cycles(
     start: str, ends, dirs_cycle: cycle, node_map: dict, part_two: bool = False
 ):
     """ """
+    trace = tracer(logger)
     node = start
     counter = 0
 
     while node not in ends:
         d = next(dirs_cycle)
-        logger.debug(
-            f'current node: {node}\tL:{node_map[node]["L"]}\tR:{node_map[node]["R"]}, going {d}'
-        )
+        if trace:
+            exits = node_map[node]
+            trace("current node: %s\tL:%s\tR:%s, going %s", node, *exits.values(), d)
         node = node_map[node][d]
-        logger.debug(f"new node: {node}")
         counter += 1
-        logger.debug(f"step: {counter}")
+        if trace:
+            trace("new node: %s\tstep: %s", node, counter)
 
     return counter
 
 
+def ghost_walk(start: str, ends: set, dirs: str, node_map: dict) -> History:
+    """
+    Returns the history of a ghost's walk, recording if it is on an end
+    at each step; the walk is periodic in (node, position in dirs)
+    """
+    n_dirs = len(dirs)
+
+    def step(state):
+        node, i = state
+        return node_map[node][dirs[i]], (i + 1) % n_dirs
+
+    history = first_seen(step, (start, 0), value=lambda state: state[0] in ends)
+    logger.info(f"start: {start}\tcycle: {history.cycle}")
+    return history
+
+
 def lcm(a, b):
     return a * b // gcd(a, b)
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
-    """
-    starting at AAA, how many steps tor each ZZZ?
-    """
-    logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
-    logger.debug(f"loglevel: {loglevel}")
-    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
-
+@phase("parse")
+@cached_parse(version=1)
+def parse(fp: str) -> tuple[str, dict]:
+    """Returns the dirs and {node: {"L": left, "R": right}}"""
     lines = read_line(fp)
     dirs = next(lines).strip()
-    logger.info(f"length of dirs: {len(dirs)}")
-    logger.debug(f"dirs: {dirs}")
+    if trace := tracer(logger):
+        trace("dirs: %s", dirs)
     next(lines)  # skip empty line
     # node_map = {}
     # for line in lines:
@@ -87,28 +92,60 @@ def main(sample: bool, part_two: bool, loglevel: str):
         for line in lines
         if (parsed := parse_map_entry(line))
     }
-    logger.debug(f"node map: {node_map}")
+    return dirs, node_map
+
+
+def solve(fp: str, part_two: bool = False) -> int:
+    """
+    starting at AAA, how many steps tor each ZZZ?
+    """
+    dirs, node_map = parse(fp)
+    logger.info(f"length of dirs: {len(dirs)}")
+    if trace := tracer(logger):
+        trace("node map: %s", node_map)
 
     dirs_cycle = cycle(dirs)
     if part_two:
-        starts = [node for node in node_map if node[-1] == "A"]
-        ends = [node for node in node_map if node[-1] == "Z"]
+        with phase("index"):
+            starts = [node for node in node_map if node[-1] == "A"]
+            ends = [node for node in node_map if node[-1] == "Z"]
         logger.info(f"num starts: {len(starts)}\tnum ends: {len(ends)}")
-        num_cycles = []
-        for start in starts:
-            num = count_cycles(start, ends, dirs_cycle, node_map, part_two)
-            num_cycles.append(num)
-            logger.info(f"start: {start}\tnum: {num}")
-
-        n_steps = reduce(lcm, num_cycles)
-        logger.info(f"total steps for part 2: {n_steps}")
+        with phase("solve"):
+            ends = set(ends)
+            walks = [ghost_walk(start, ends, dirs, node_map) for start in starts]
+            # all ghosts cycle back in step after the lcm of their periods;
+            # that only answers if every ghost is on an end then
+            n_steps = reduce(lcm, [walk.cycle.period for walk in walks])
+            if not all(walk.at(n_steps) for walk in walks):
+                raise ValueError(f"not every ghost is on an end at {n_steps}")
 
     else:
         start = "AAA"
         ends = ["ZZZ"]
-        counter = count_cycles(start, ends, dirs_cycle, node_map)
+        with phase("solve"):
+            n_steps = count_cycles(start, ends, dirs_cycle, node_map)
+    return n_steps
+
+
+def main(
+    sample: bool, part_two: bool, loglevel: str, fp: str = None, jsonl: str = None
+):
+    """ """
+    logger.setLevel(loglevel)
+    fp = pick_input(sample, part_two, fp)
+    logger.debug(f"loglevel: {loglevel}")
+    logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-        logger.info(f"total steps to reach {ends[0]}: {counter}")
+    with record() as timer:
+        n_steps = solve(fp, part_two)
+        with phase("output"):
+            if part_two:
+                logger.info(f"total steps for part 2: {n_steps}")
+            else:
+                logger.info(f"total steps to reach ZZZ: {n_steps}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, n_steps, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -117,5 +154,7 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(args.sample, args.part_two, args.loglevel, fp=args.input, jsonl=args.jsonl)
@@ -1,26 +1,29 @@
 #!/usr/bin/env python3
-from pathlib import Path
 import argparse
 import logging
 import sys
+from collections import defaultdict
+from functools import partial
 from itertools import pairwise
 
+from solutions import backend
+from solutions.aoc_tools import pick_input, read_line, split_ints
+from solutions.backend import np
+from solutions.metrics import emit
+from solutions.parallel import preduce
+from solutions.timing import phase, record
+from solutions.tracing import tracer
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.StreamHandler(sys.stdout))
 
 
-def read_line(fpath: str):
-    """Reads the input and yields each line"""
-    fpath = Path(fpath)
-    with open(fpath) as f:
-        yield from f
-
-
 def differences(points: list[int]) -> list[int]:
     """Returns first difference of list of ints"""
     pairs = pairwise(points)
     diffs = [p[1] - p[0] for p in pairs]
-    logger.debug(f"diffs: {diffs}")
+    if trace := tracer(logger):
+        trace("diffs: %s", diffs)
     return diffs
 
 
@@ -55,35 +58,92 @@ def predict_polynomial(line_diffs: list, part_two: bool = False) -> int:
 #     for diffs in line_diffs[::-1]:
 
 
-def main(sample: bool, part_two: bool, loglevel: str):
+def extrapolate(line: str, part_two: bool = False) -> int:
+    """Returns the extrapolated value of one history"""
+    points = split_ints(line)
+    line_diffs = [points]
+    while True:
+        diffs = differences(points)
+        # save the diffs
+        line_diffs.append(diffs)
+        # check for equality
+        if len(set(diffs)) > 1:
+            # not all the same; get diffs again
+            points = diffs
+        else:
+            pred = predict_polynomial(line_diffs, part_two=part_two)
+            if trace := tracer(logger):
+                trace("pred: %s", pred)
+            return pred
+
+
+def extrapolate_np(lines, part_two: bool = False) -> int:
+    """
+    extrapolate() over every history at once, on the NumPy backend.
+    Histories are stacked by length, and each level of differences is
+    one np.diff of the whole stack; differencing past the constant level
+    only adds zeros, so no row needs to stop early. Levels are summed as
+    python ints, and stacks that could overflow int64 are extrapolated
+    in python instead
+    """
+    by_length = defaultdict(list)
+    for line in lines:
+        if n_points := len(line.split()):
+            by_length[n_points].append(line)
+    total = 0
+    for length, histories in by_length.items():
+        text = " ".join(histories)
+        diffs = np.fromstring(text, dtype=np.int64, sep=" ")
+        # each level at most doubles the largest magnitude; ints too big
+        # for int64 parse as its limits, so they are caught here too
+        bound = 2 ** (62 - length)
+        if diffs.max() >= bound or diffs.min() <= -bound:
+            total += sum(extrapolate(line, part_two) for line in histories)
+            continue
+        diffs = diffs.reshape(len(histories), length)
+        sign = 1
+        while diffs.shape[1]:
+            if part_two:
+                # alternating sum of the first of each level
+                total += sign * sum(diffs[:, 0].tolist())
+                sign = -sign
+            else:
+                total += sum(diffs[:, -1].tolist())
+            diffs = np.diff(diffs, axis=1)
+    return total
+
+
+def solve(fp: str, part_two: bool = False, workers: int = 1) -> int:
+    """Returns the sum of extrapolated values for each history"""
+    # streamed, so reading is timed within solve
+    lines = read_line(fp)
+    with phase("solve"):
+        if backend.enabled():
+            return extrapolate_np(lines, part_two)
+        return preduce(partial(extrapolate, part_two=part_two), lines, workers=workers)
+
+
+def main(
+    sample: bool,
+    part_two: bool,
+    loglevel: str,
+    workers: int = 1,
+    fp: str = None,
+    jsonl: str = None,
+):
     """ """
     logger.setLevel(loglevel)
-    if not sample:
-        fp = "input.txt"
-    else:
-        fp = "sample.txt"
+    fp = pick_input(sample, part_two, fp)
     logger.debug(f"loglevel: {loglevel}")
     logger.info(f'Using {fp} for {"part 2" if part_two else "part 1"}')
 
-    preds = []
-    for line in read_line(fp):
-        points = [int(num) for num in line.split()]
-        base_diff_found = False
-        line_diffs = [points]
-        while not base_diff_found:
-            diffs = differences(points)
-            # save the diffs
-            line_diffs.append(diffs)
-            # check for equality
-            if len(set(diffs)) > 1:
-                # not all the same; get diffs again
-                points = diffs
-            else:
-                preds.append(predict_polynomial(line_diffs, part_two=part_two))
-                base_diff_found = True
-
-        logger.debug(f"pred: {preds}")
-    logger.info(f"total extrapolated values: {sum(preds)}")
+    with record() as timer:
+        total = solve(fp, part_two, workers)
+        with phase("output"):
+            logger.info(f"total extrapolated values: {total}")
+    if jsonl:
+        emit(jsonl, __file__, part_two, fp, total, timer)
+    logger.info(f"phases: {timer}")
 
 
 if __name__ == "__main__":
@@ -92,5 +152,15 @@ if __name__ == "__main__":
     opt("--sample", "-s", action="store_true", default=False)
     opt("--part_two", "-t", action="store_true", default=False)
     opt("--loglevel", "-l", type=str.upper, default="info")
+    opt("--workers", "-w", type=int, default=1, help="processes for the histories")
+    opt("--input", "-i", help="input file, or - for stdin")
+    opt("--jsonl", metavar="FILE", help="append a JSON record of the run")
     args = parser.parse_args()
-    main(args.sample, args.part_two, args.loglevel)
+    main(
+        args.sample,
+        args.part_two,
+        args.loglevel,
+        args.workers,
+        fp=args.input,
+        jsonl=args.jsonl,
+    )
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Resident solver daemon on a Unix domain socket
+
+Starting Python, importing a day and compiling its regexes costs more
+than solving a small input. The daemon pays that once: it imports every
+day module up front, then answers requests over a local socket.
+
+    python -m solutions.daemon serve &
+    python -m solutions.daemon solve 7 input.txt -p 2
+    python -m solutions.daemon ping --repeat 200 7 sample.txt
+
+A request is one JSON line, then the input's bytes:
+
+    {"day": 7, "part": 2, "variant": null, "sample": false, "size": 1024}\\n<1024 bytes>
+
+and the reply is one JSON line: the runner's Result, minus fp, plus
+server_ms, the time from the request arriving to the reply being sent.
+With "sample" true, the day's SAMPLE_KWARGS apply, as with the runner's
+--sample. A size over MAX_SIZE, or not a count of bytes, is refused and
+the connection closed, since the input that follows cannot be skipped.
+A connection may carry any number of requests. Solvers read from a
+path, so each input is written to a spool file first; tmpfs is used
+when available. Requests are served one at a time, since solvers keep
+module level state, e.g. d20's pulse queue and the phase recorder.
+
+The socket is $AOC_SOCKET, or aoc-2023.sock in the temp dir.
+"""
+from pathlib import Path
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import statistics
+import sys
+import tempfile
+from dataclasses import asdict
+from time import perf_counter_ns
+
+from solutions.runner import PACKAGE, REGISTRY, run
+
+SOCKET = Path(
+    os.environ.get("AOC_SOCKET", Path(tempfile.gettempdir()) / "aoc-2023.sock")
+)
+# tmpfs keeps the spool file out of the page cache's writeback
+SPOOL_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+# largest input accepted, in bytes
+MAX_SIZE = 1 << 30
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+class SolveHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while header := self.rfile.readline():
+            tstart = perf_counter_ns()
+            try:
+                request = json.loads(header)
+                size = request["size"]
+                if (
+                    not isinstance(size, int)
+                    or isinstance(size, bool)
+                    or not 0 <= size <= MAX_SIZE
+                ):
+                    # read(-1) would wait for the client to hang up
+                    error = f"bad request: size {size!r} not in 0..{MAX_SIZE}"
+                    self.send({"error": error}, tstart)
+                    break
+                data = self.rfile.read(size)
+                if len(data) < size:
+                    # client went away mid-input
+                    break
+                reply = self.server.solve(request, data)
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {"error": f"bad request: {type(e).__name__}: {e}"}
+            self.send(reply, tstart)
+
+    def send(self, reply: dict, tstart: int):
+        reply["server_ms"] = round((perf_counter_ns() - tstart) / 1e6, 3)
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+        self.wfile.flush()
+
+
+class SolverDaemon(socketserver.UnixStreamServer):
+    """Serves solve requests with every day module already imported"""
+
+    def __init__(self, path: Path = SOCKET):
+        for solver in REGISTRY.values():
+            try:
+                solver.load()
+            except Exception as e:
+                logger.warning(f"skipping d{solver.day}/{solver.variant}: {e}")
+        logger.info(f"{len(REGISTRY)} solvers loaded")
+        self.spool = tempfile.NamedTemporaryFile(dir=SPOOL_DIR, suffix=".txt")
+        path = Path(path)
+        if path.is_socket():
+            # left behind by a daemon that did not shut down cleanly
+            path.unlink()
+        super().__init__(str(path), SolveHandler)
+
+    def solve(self, request: dict, data: bytes) -> dict:
+        day = int(request["day"])
+        variant = request.get("variant") or f"day{day}"
+        if (solver := REGISTRY.get((day, variant))) is None:
+            return {"error": f"no solver d{day}/{variant}"}
+        self.spool.seek(0)
+        self.spool.truncate()
+        self.spool.write(data)
+        self.spool.flush()
+        part = int(request.get("part", 1))
+        sample = bool(request.get("sample"))
+        result = next(run([solver], [part], sample, fp=self.spool.name))
+        reply = asdict(result)
+        del reply["fp"]
+        return reply
+
+    def server_close(self):
+        super().server_close()
+        self.spool.close()
+        Path(self.server_address).unlink(missing_ok=True)
+
+
+def solve(
+    day: int,
+    data: bytes,
+    part: int = 1,
+    variant: str = None,
+    path: Path = SOCKET,
+    sock: socket.socket = None,
+    sample: bool = False,
+) -> dict:
+    """Sends one request, over sock if given, and returns the reply"""
+    request = dict(day=day, part=part, variant=variant, sample=sample, size=len(data))
+    own = sock is None
+    if own:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(str(path))
+    try:
+        sock.sendall(json.dumps(request).encode() + b"\n" + data)
+        reply = b""
+        while not reply.endswith(b"\n"):
+            if not (chunk := sock.recv(65536)):
+                raise ConnectionError("daemon closed the connection")
+            reply += chunk
+    finally:
+        if own:
+            sock.close()
+    return json.loads(reply)
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(path: Path = SOCKET, loglevel: str = "warning"):
+    """Runs the daemon until interrupted or terminated"""
+    logging.getLogger(PACKAGE).setLevel(loglevel)
+    logger.setLevel("INFO")
+    # unwind through server_close, removing the socket, on kill too
+    signal.signal(signal.SIGTERM, _terminate)
+    with SolverDaemon(path) as server:
+        logger.info(f"listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def ping(
+    day: int,
+    fp: str,
+    part: int,
+    variant: str,
+    path: Path,
+    repeat: int,
+    sample: bool = False,
+):
+    """Latency percentiles of repeated solves over one connection"""
+    data = Path(fp).read_bytes()
+    client_ms, solve_ms = [], []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(path))
+        for _ in range(repeat):
+            tstart = perf_counter_ns()
+            reply = solve(day, data, part, variant, path, sock, sample)
+            client_ms.append((perf_counter_ns() - tstart) / 1e6)
+            if reply.get("error"):
+                print(f"error: {reply['error']}")
+                return
+            solve_ms.append(reply["phases"]["total"])
+    for name, times in (("round trip", client_ms), ("solve", solve_ms)):
+        times.sort()
+        p95 = times[max(0, -(-95 * len(times) // 100) - 1)]
+        print(f"{name:<10} p50 {statistics.median(times):.3f} ms  p95 {p95:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket", type=Path, default=SOCKET)
+    commands = parser.add_subparsers(dest="command", required=True)
+    server_opts = commands.add_parser("serve", help="run the daemon")
+    server_opts.add_argument("--loglevel", "-l", type=str.upper, default="warning")
+    for name in ("solve", "ping"):
+        client_opts = commands.add_parser(name)
+        opt = client_opts.add_argument
+        opt("day", type=int)
+        opt("fp", help="input file")
+        opt("--part", "-p", type=int, choices=[1, 2], default=1)
+        opt("--variant", "-v", default=None)
+        opt("--sample", "-s", action="store_true", default=False)
+        if name == "ping":
+            opt("--repeat", "-n", type=int, default=100)
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.socket, args.loglevel)
+    elif args.command == "solve":
+        data = Path(args.fp).read_bytes()
+        reply = solve(
+            args.day, data, args.part, args.variant, args.socket, sample=args.sample
+        )
+        print(json.dumps(reply))
+    else:
+        ping(
+            args.day,
+            args.fp,
+            args.part,
+            args.variant,
+            args.socket,
+            args.repeat,
+            args.sample,
+        )
@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+"""
+Generates synthetic puzzle input for each solved day
+
+scale=1 is roughly the size of a real puzzle input. Record counts scale
+linearly, e.g. d12 springs; grid days scale the side length, so cells
+grow with scale**2. Output depends only on (day, scale, seed).
+
+Every generator yields lines without the trailing newline, so inputs far
+larger than memory can be streamed straight to disk.
+"""
+from pathlib import Path
+import argparse
+import math
+import random
+import string
+import sys
+from collections import deque
+
+GENERATORS = {}
+
+
+def generator(day: int):
+    """Registers the decorated function as the generator for day"""
+
+    def register(func):
+        GENERATORS[day] = func
+        return func
+
+    return register
+
+
+def generate(day: int, scale: float = 1, seed: int = 0):
+    """Yields the lines of a day's input; same seed, same input"""
+    if day not in GENERATORS:
+        raise ValueError(f"no generator for day {day}")
+    return GENERATORS[day](random.Random(seed), scale)
+
+
+def write_input(day: int, fp, scale: float = 1, seed: int = 0) -> Path:
+    """Writes the generated input to fp, returning its path"""
+    fp = Path(fp)
+    with open(fp, "w") as f:
+        for line in generate(day, scale, seed):
+            f.write(line + "\n")
+    return fp
+
+
+def scaled(base: int, scale: float) -> int:
+    return max(1, int(base * scale))
+
+
+def is_prime(n: int) -> bool:
+    return n > 1 and all(n % d for d in range(2, int(n**0.5) + 1))
+
+
+def next_prime(n: int) -> int:
+    while not is_prime(n):
+        n += 1
+    return n
+
+
+def random_region(rng, k: int, fill: float = 0.45) -> set:
+    """
+    Returns a random polyomino of (x, y) cells on a k x k grid, grown from
+    the centre. Holes are filled and diagonal-only contacts widened so its
+    outline is a single simple loop
+    """
+    start = (k // 2, k // 2)
+    cells = {start}
+    grown = [start]
+    target = max(2, int(k * k * fill))
+    while len(cells) < target:
+        x, y = rng.choice(grown)
+        dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        cell = (x + dx, y + dy)
+        if 0 <= cell[0] < k and 0 <= cell[1] < k and cell not in cells:
+            cells.add(cell)
+            grown.append(cell)
+
+    changed = True
+    while changed:
+        changed = False
+        # fill holes: anything the outside can't reach becomes region
+        outside = {(-1, -1)}
+        queue = deque(outside)
+        while queue:
+            x, y = queue.popleft()
+            for nx in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+                if (
+                    -1 <= nx[0] <= k
+                    and -1 <= nx[1] <= k
+                    and nx not in cells
+                    and nx not in outside
+                ):
+                    outside.add(nx)
+                    queue.append(nx)
+        holes = {
+            (x, y)
+            for x in range(k)
+            for y in range(k)
+            if (x, y) not in cells and (x, y) not in outside
+        }
+        if holes:
+            cells |= holes
+            changed = True
+        # widen cells that only touch at a corner
+        for x in range(k - 1):
+            for y in range(k - 1):
+                a, b, c, d = (x, y), (x + 1, y), (x, y + 1), (x + 1, y + 1)
+                if (a in cells) == (d in cells) != (b in cells) == (c in cells):
+                    cells |= {a, b, c, d}
+                    changed = True
+    return cells
+
+
+def outline(cells: set) -> list:
+    """Returns the lattice points around a random_region() in walking order"""
+    adj = {}
+
+    def link(p, q):
+        adj.setdefault(p, []).append(q)
+        adj.setdefault(q, []).append(p)
+
+    for x, y in cells:
+        if (x, y - 1) not in cells:
+            link((x, y), (x + 1, y))
+        if (x, y + 1) not in cells:
+            link((x, y + 1), (x + 1, y + 1))
+        if (x - 1, y) not in cells:
+            link((x, y), (x, y + 1))
+        if (x + 1, y) not in cells:
+            link((x + 1, y), (x + 1, y + 1))
+
+    start = min(adj)
+    loop = [start]
+    prev, curr = start, adj[start][0]
+    while curr != start:
+        loop.append(curr)
+        prev, curr = curr, next(p for p in adj[curr] if p != prev)
+    return loop
+
+
+@generator(1)
+def day1(rng, scale):
+    words = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+    for _ in range(scaled(1000, scale)):
+        tokens = [rng.choice(string.digits[1:])]
+        for _ in range(rng.randint(1, 8)):
+            roll = rng.random()
+            if roll < 0.3:
+                tokens.append(rng.choice(words))
+            elif roll < 0.5:
+                tokens.append(rng.choice(string.digits[1:]))
+            else:
+                tokens.append("".join(rng.choices(string.ascii_lowercase, k=3)))
+        rng.shuffle(tokens)
+        yield "".join(tokens)
+
+
+@generator(2)
+def day2(rng, scale):
+    colors = ["red", "green", "blue"]
+    for gid in range(1, scaled(100, scale) + 1):
+        sets = []
+        for _ in range(rng.randint(1, 6)):
+            shown = rng.sample(colors, rng.randint(1, 3))
+            sets.append(", ".join(f"{rng.randint(1, 20)} {c}" for c in shown))
+        yield f"Game {gid}: {'; '.join(sets)}"
+
+
+@generator(3)
+def day3(rng, scale):
+    """
+    Numbers are laid out a row ahead of the symbols. A symbol is left out
+    if a number it touches already touches another symbol, since d3 sums
+    the parts around each symbol and would count a shared number twice
+    """
+    side = scaled(140, scale)
+    symbols = "*#+$/=%@&-"
+
+    def layout():
+        """
+        A row of numbers and dots, the columns symbols may take, and per
+        column, offset by one, the start of the number covering it or -1
+        """
+        row, spots = [], []
+        while len(row) < side:
+            roll = rng.random()
+            if roll < 0.12 and (not row or not row[-1].isdigit()):
+                row.extend(str(rng.randint(1, 999)))
+            else:
+                if roll < 0.18:
+                    spots.append(len(row))
+                row.append(".")
+        del row[side:]
+        owner = [-1] * (side + 2)
+        for col, ch in enumerate(row):
+            if ch.isdigit():
+                owner[col + 1] = owner[col] if col and row[col - 1].isdigit() else col
+        return row, [c for c in spots if c < side], owner
+
+    # previous, current and next row, and the numbers in each given a symbol
+    window = [None, layout(), layout() if side > 1 else None]
+    claimed = [set(), set(), set()]
+    for r in range(side):
+        row, spots, _ = window[1]
+        for col in spots:
+            # owner is offset by one, so this is columns col - 1 to col + 1
+            near = {
+                (i, start)
+                for i in range(3)
+                if window[i]
+                for start in window[i][2][col : col + 3]
+                if start >= 0
+            }
+            if any(start in claimed[i] for i, start in near):
+                continue
+            for i, start in near:
+                claimed[i].add(start)
+            row[col] = rng.choice(symbols)
+        yield "".join(row)
+        window = [window[1], window[2], layout() if r + 2 < side else None]
+        claimed = [claimed[1], claimed[2], set()]
+
+
+@generator(4)
+def day4(rng, scale):
+    n_cards = scaled(200, scale)
+    for cid in range(1, n_cards + 1):
+        winning = rng.sample(range(1, 100), 10)
+        # copies won may not run past the last card
+        n_match = rng.randint(0, min(10, n_cards - cid))
+        others = [n for n in range(1, 100) if n not in winning]
+        have = rng.sample(winning, n_match) + rng.sample(others, 25 - n_match)
+        rng.shuffle(have)
+        left = " ".join(f"{n:>2}" for n in winning)
+        right = " ".join(f"{n:>2}" for n in have)
+        yield f"Card {cid:>3}: {left} | {right}"
+
+
+@generator(5)
+def day5(rng, scale, span=2**32):
+    n_maps = scaled(7, scale)
+    seeds = []
+    for _ in range(scaled(10, scale)):
+        start = rng.randrange(span // 2)
+        seeds += [start, rng.randint(1, span // 16)]
+    yield "seeds: " + " ".join(map(str, seeds))
+    names = ["seed"] + [f"stage{i}" for i in range(1, n_maps)] + ["location"]
+    for src, dest in zip(names, names[1:]):
+        yield ""
+        yield f"{src}-to-{dest} map:"
+        # disjoint source ranges between sorted cut points
+        cuts = sorted(rng.sample(range(span), 60))
+        for lo, hi in zip(cuts[::2], cuts[1::2]):
+            yield f"{rng.randrange(span - (hi - lo))} {lo} {hi - lo}"
+
+
+@generator(6)
+def day6(rng, scale):
+    """
+    Part two joins every number; past ~50 races the joined time no longer
+    fits a float
+    """
+    times = [rng.randint(7, 99) for _ in range(scaled(4, scale))]
+    dists = [rng.randint(t, t * t // 4 - 1) for t in times]
+    yield "Time:     " + " ".join(f"{t:>4}" for t in times)
+    yield "Distance: " + " ".join(f"{d:>4}" for d in dists)
+
+
+@generator(7)
+def day7(rng, scale, cards="23456789TJQKA"):
+    n_hands = scaled(1000, scale)
+    if n_hands > len(cards) ** 5:
+        raise ValueError(f"only {len(cards) ** 5} distinct hands exist")
+    hands = set()
+    while len(hands) < n_hands:
+        hand = "".join(rng.choices(cards, k=5))
+        if hand not in hands:
+            hands.add(hand)
+            yield f"{hand} {rng.randint(1, 1000)}"
+
+
+@generator(8)
+def day8(rng, scale):
+    """
+    Each ghost walks a chain of layers, two nodes wide, from its xxA start
+    to a single xxZ node. Chain lengths are the direction count times a
+    distinct prime, so the answer is their lcm and the shared direction
+    cycle lines up again after each ghost
+    """
+    n_dirs = next_prime(scaled(20, scale))
+    dirs = [rng.choice("LR") for _ in range(n_dirs)]
+    alphabet = string.ascii_uppercase + string.digits
+    names = [
+        a + b + c for a in alphabet for b in alphabet for c in alphabet if c not in "AZ"
+    ]
+    rng.shuffle(names)
+    multiples = [2, 3, 5, 7, 11, 13]
+    if 2 * n_dirs * sum(multiples) > len(names):
+        raise ValueError("not enough 3 character node names at this scale")
+    names = iter(names)
+
+    yield "".join(dirs)
+    yield ""
+    lines = []
+    for ghost, mult in enumerate(multiples):
+        length = n_dirs * mult
+        if ghost == 0:
+            start, end = "AAA", "ZZZ"
+        else:
+            stem = next(names)[:2]
+            start, end = stem + "A", stem + "Z"
+        layers = [(next(names), next(names)) for _ in range(length)]
+        # the last step always takes the last direction; put Z on that side
+        last = layers[-1]
+        layers[-1] = (end, last[1]) if dirs[-1] == "L" else (last[0], end)
+        lines.append(f"{start} = ({layers[0][0]}, {layers[0][1]})")
+        for i, layer in enumerate(layers):
+            # the Z layer loops back to the first layer like the start did
+            nx = layers[(i + 1) % length]
+            for node in layer:
+                lines.append(f"{node} = ({nx[0]}, {nx[1]})")
+    rng.shuffle(lines)
+    yield from lines
+
+
+@generator(9)
+def day9(rng, scale, n_points=21):
+    for _ in range(scaled(200, scale)):
+        coefs = [rng.randint(-9, 9) for _ in range(rng.randint(1, 6))]
+        yield " ".join(
+            str(sum(c * x**i for i, c in enumerate(coefs))) for x in range(n_points)
+        )
+
+
+PIPES = {
+    frozenset([(0, -1), (0, 1)]): "|",
+    frozenset([(-1, 0), (1, 0)]): "-",
+    frozenset([(0, -1), (1, 0)]): "L",
+    frozenset([(0, -1), (-1, 0)]): "J",
+    frozenset([(0, 1), (-1, 0)]): "7",
+    frozenset([(0, 1), (1, 0)]): "F",
+}
+
+
+@generator(10)
+def day10(rng, scale):
+    k = scaled(139, scale)
+    loop = outline(random_region(rng, k))
+    grid = [[rng.choice(".......|-LJ7F") for _ in range(k + 1)] for _ in range(k + 1)]
+    straights = []
+    for i, (x, y) in enumerate(loop):
+        prev, nx = loop[i - 1], loop[(i + 1) % len(loop)]
+        pipe = PIPES[frozenset([(p[0] - x, p[1] - y) for p in (prev, nx)])]
+        grid[y][x] = pipe
+        if pipe in "|-":
+            straights.append((x, y))
+    # S on a straight keeps every corner a polygon vertex for part two
+    x, y = rng.choice(straights)
+    grid[y][x] = "S"
+    # exactly two pipes may connect to S
+    on_loop = set(loop)
+    for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+        nx = (x + dx, y + dy)
+        if nx not in on_loop and 0 <= nx[0] <= k and 0 <= nx[1] <= k:
+            grid[nx[1]][nx[0]] = "."
+    for row in grid:
+        yield "".join(row)
+
+
+@generator(11)
+def day11(rng, scale):
+    side = scaled(140, scale)
+    empty_rows = {r for r in range(side) if rng.random() < 0.07}
+    empty_cols = {c for c in range(side) if rng.random() < 0.07}
+    for r in range(side):
+        yield "".join(
+            "#"
+            if r not in empty_rows and c not in empty_cols and rng.random() < 0.025
+            else "."
+            for c in range(side)
+        )
+
+
+@generator(12)
+def day12(rng, scale):
+    for _ in range(scaled(1000, scale)):
+        springs = [rng.choice("#..") for _ in range(rng.randint(4, 20))]
+        springs[rng.randrange(len(springs))] = "#"
+        grps = [len(g) for g in "".join(springs).split(".") if g]
+        record = "".join("?" if rng.random() < 0.5 else s for s in springs)
+        yield f"{record} {','.join(map(str, grps))}"
+
+
+def mirror_diffs(rows: list[int]) -> list[int]:
+    """Cell differences across each line between rows i-1 and i, i >= 1"""
+    return [
+        sum(
+            (rows[i - 1 - j] ^ rows[i + j]).bit_count()
+            for j in range(min(i, len(rows) - i))
+        )
+        for i in range(1, len(rows))
+    ]
+
+
+@generator(13)
+def day13(rng, scale):
+    """
+    Each pattern has one perfect reflection and one other line that
+    reflects with exactly one smudge; candidates are rejected otherwise
+    """
+    for n in range(scaled(100, scale)):
+        while True:
+            nrows, ncols = rng.randint(7, 17), rng.randint(7, 17)
+            rows = [[rng.random() < 0.5 for _ in range(ncols)] for _ in range(nrows)]
+            smudged = rng.randint(1, nrows // 2 - 1)
+            perfect = rng.randint(1, (nrows - 2 * smudged) // 2)
+            for j in range(smudged):
+                rows[2 * smudged - 1 - j] = rows[j].copy()
+            for j in range(perfect):
+                rows[nrows - 1 - j] = rows[nrows - 2 * perfect + j].copy()
+            rows[rng.randrange(smudged)][rng.randrange(ncols)] ^= True
+            if rng.random() < 0.5:
+                rows.reverse()
+            if rng.random() < 0.5:
+                rows = [list(col) for col in zip(*rows)]
+            as_bits = [int("".join("1" if c else "0" for c in r), 2) for r in rows]
+            cols = [list(col) for col in zip(*rows)]
+            col_bits = [int("".join("1" if c else "0" for c in r), 2) for r in cols]
+            diffs = mirror_diffs(as_bits) + mirror_diffs(col_bits)
+            if diffs.count(0) == 1 and diffs.count(1) == 1:
+                break
+        if n:
+            yield ""
+        for r in rows:
+            yield "".join("#" if c else "." for c in r)
+
+
+@generator(14)
+def day14(rng, scale):
+    side = scaled(100, scale)
+    for _ in range(side):
+        yield "".join(rng.choices("O#.", weights=[2, 1, 7], k=side))
+
+
+@generator(15)
+def day15(rng, scale):
+    n_steps = scaled(4000, scale)
+    labels = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 6)))
+        for _ in range(max(1, n_steps // 4))
+    ]
+    yield ",".join(
+        f"{rng.choice(labels)}={rng.randint(1, 9)}"
+        if rng.random() < 0.6
+        else f"{rng.choice(labels)}-"
+        for _ in range(n_steps)
+    )
+
+
+@generator(16)
+def day16(rng, scale):
+    side = scaled(110, scale)
+    for _ in range(side):
+        yield "".join(rng.choices(".\\/|-", weights=[36, 1, 1, 1, 1], k=side))
+
+
+@generator(17)
+def day17(rng, scale):
+    side = scaled(141, scale)
+    for _ in range(side):
+        yield "".join(rng.choices("123456789", k=side))
+
+
+@generator(18)
+def day18(rng, scale):
+    """
+    Both parts dig the outline of the same random region, stretched by
+    small widths for part one and 5 hex digit widths for part two
+    """
+    k = scaled(40, scale)
+    loop = outline(random_region(rng, k))
+    # corners only; collinear points are merged into one edge
+    corners = [
+        p
+        for i, p in enumerate(loop)
+        if (loop[i - 1][0] == p[0]) != (p[0] == loop[(i + 1) % len(loop)][0])
+    ]
+    widths = 0xFFFFF // (k + 1)
+    stretches = [
+        [
+            [0, *(rng.randint(1, w) for _ in range(k + 1))]
+            for _ in range(2)  # x then y
+        ]
+        for w in (8, widths)
+    ]
+    for stretch in stretches:
+        for axis in stretch:
+            for i in range(1, len(axis)):
+                axis[i] += axis[i - 1]
+    names = {(1, 0): ("R", 0), (-1, 0): ("L", 2), (0, 1): ("D", 1), (0, -1): ("U", 3)}
+    for i, (x, y) in enumerate(corners):
+        nx, ny = corners[(i + 1) % len(corners)]
+        step = ((nx > x) - (nx < x), (ny > y) - (ny < y))
+        name, code = names[step]
+        (xs1, ys1), (xs2, ys2) = stretches
+        m1 = abs(xs1[nx] - xs1[x]) + abs(ys1[ny] - ys1[y])
+        m2 = abs(xs2[nx] - xs2[x]) + abs(ys2[ny] - ys2[y])
+        yield f"{name} {m1} (#{m2:05x}{code})"
+
+
+@generator(19)
+def day19(rng, scale):
+    """
+    Workflows form a tree from "in": each is sent to by at most one rule,
+    as the part two solver assumes
+    """
+    n_flows = scaled(550, scale)
+    names = set()
+    while len(names) < n_flows - 1:
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 4)))
+        if name != "in":
+            names.add(name)
+    names = ["in"] + sorted(names)
+    rng.shuffle(names[1:])
+    queue = deque([names[0]])
+    unassigned = deque(names[1:])
+    lines = []
+    while queue:
+        name = queue.popleft()
+        rules = []
+        n_rules = rng.randint(1, 3)
+        for i in range(n_rules + 1):
+            if unassigned and rng.random() < 0.7:
+                dest = unassigned.popleft()
+                queue.append(dest)
+            else:
+                dest = rng.choice("AR")
+            if i == n_rules:
+                rules.append(dest)
+            else:
+                op = rng.choice("<>")
+                rules.append(f"{rng.choice('xmas')}{op}{rng.randint(1, 4000)}:{dest}")
+        lines.append(f"{name}{{{','.join(rules)}}}")
+    rng.shuffle(lines)
+    yield from lines
+    yield ""
+    for _ in range(scaled(200, scale)):
+        x, m, a, s = (rng.randint(1, 4000) for _ in range(4))
+        yield f"{{x={x},m={m},a={a},s={s}}}"
+
+
+@generator(20)
+def day20(rng, scale, targets=("mp", "qt", "qb", "ng")):
+    """
+    Four binary counters, as in the real input: flip-flop chains whose hub
+    conjunction fires at a prime period and resets them. The hubs feed the
+    inverters the part two solver watches for. scale=1 gives 12-bit
+    counters; each doubling of scale adds a bit, so doubles the part two
+    presses, down to 5 bits, the fewest with four primes to pick from
+    """
+    bits = max(5, 12 + round(math.log2(max(scale, 2**-7))))
+    periods = rng.sample([p for p in range(2 ** (bits - 1), 2**bits) if is_prime(p)], 4)
+    taken = {"rx", "broadcaster", *targets}
+
+    def new_name():
+        while (name := "".join(rng.choices(string.ascii_lowercase, k=3))) in taken:
+            pass
+        taken.add(name)
+        return name
+
+    final = new_name()
+    lines = []
+    starts = []
+    for target, period in zip(targets, periods):
+        flips = [new_name() for _ in range(bits)]
+        hub = new_name()
+        starts.append(flips[0])
+        hub_dests = [target]
+        for i, flip in enumerate(flips):
+            dests = [flips[i + 1]] if i + 1 < bits else []
+            if period >> i & 1:
+                dests.append(hub)
+            if not period >> i & 1 or i == 0:
+                hub_dests.append(flip)
+            lines.append(f"%{flip} -> {', '.join(dests)}")
+        lines.append(f"&{hub} -> {', '.join(hub_dests)}")
+        lines.append(f"&{target} -> {final}")
+    lines.append(f"&{final} -> rx")
+    lines.append(f"broadcaster -> {', '.join(starts)}")
+    rng.shuffle(lines)
+    yield from lines
+
+
+@generator(21)
+def day21(rng, scale):
+    # odd side keeps S dead centre, as the part two extrapolation assumes
+    side = scaled(131, scale) | 1
+    for r in range(side):
+        row = rng.choices("#.", weights=[1, 7], k=side)
+        if r == side // 2:
+            row[side // 2] = "S"
+        yield "".join(row)
+
+
+def main(day: int, scale: float, seed: int, output: str):
+    """ """
+    if output:
+        write_input(day, output, scale, seed)
+    else:
+        for line in generate(day, scale, seed):
+            sys.stdout.write(line + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    opt = parser.add_argument
+    opt("day", type=int)
+    opt("--scale", "-x", type=float, default=1, help="1 is about a real input")
+    opt("--seed", "-r", type=int, default=0)
+    opt("--output", "-o", help="file to write; stdout if omitted")
+    args = parser.parse_args()
+    main(args.day, args.scale, args.seed, args.output)
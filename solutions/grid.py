@@ -0,0 +1,97 @@
+"""
+2d grid stored as one flat bytearray
+
+Cells are indexed by a single int, (row + 1) * width + col + 1, where
+width includes a one cell sentinel border on every side. Stepping off
+the puzzle grid lands on the border value instead of raising or
+wrapping, so inner loops need no bounds checks:
+
+    grid = Grid.from_file("input.txt", border=b"#")
+    for off in grid.offsets:
+        if grid[pos + off] != grid.border: ...
+
+Directions are plain int offsets, N/E/S/W, so moving is one addition.
+On the NumPy backend, array() views the same cells as a 2d uint8 array.
+"""
+from solutions.aoc_tools import iter_lines, map_file
+from solutions.backend import np
+
+
+class Grid:
+    def __init__(self, rows: list, border: bytes = b"#"):
+        rows = [r.encode() if isinstance(r, str) else bytes(r) for r in rows]
+        self.nrows = len(rows)
+        self.ncols = len(rows[0])
+        self.width = self.ncols + 2
+        self.border = border[0]
+        edge = border * self.width
+        self.cells = bytearray(edge)
+        for row in rows:
+            if len(row) != self.ncols:
+                raise ValueError(f"ragged row, {len(row)} != {self.ncols} cols")
+            self.cells += border + row + border
+        self.cells += edge
+        # offsets for one step in each compass direction
+        self.N, self.E, self.S, self.W = -self.width, 1, self.width, -1
+        self.offsets = (self.N, self.E, self.S, self.W)
+
+    @classmethod
+    def from_file(cls, fpath: str, border: bytes = b"#"):
+        """Reads a grid from a memory map, ignoring blank lines"""
+        return cls([line for line in iter_lines(map_file(fpath)) if len(line)], border)
+
+    def __getitem__(self, idx: int) -> int:
+        return self.cells[idx]
+
+    def __setitem__(self, idx: int, value: int):
+        self.cells[idx] = value
+
+    def __str__(self) -> str:
+        return "\n".join(bytes(self.row(r)).decode() for r in range(self.nrows))
+
+    def idx(self, row: int, col: int) -> int:
+        """Flat index of (row, col); -1 and nrows/ncols land on the border"""
+        return (row + 1) * self.width + col + 1
+
+    def coords(self, idx: int) -> tuple[int, int]:
+        """(row, col) of a flat index"""
+        row, col = divmod(idx, self.width)
+        return row - 1, col - 1
+
+    def find(self, value: bytes) -> int:
+        """Flat index of the first cell equal to value"""
+        return self.cells.index(value)
+
+    def indices(self, value: bytes) -> list[int]:
+        """Flat indices of every cell equal to value, in row order"""
+        found = []
+        idx = self.cells.find(value)
+        while idx != -1:
+            found.append(idx)
+            idx = self.cells.find(value, idx + 1)
+        return found
+
+    def row_indices(self, row: int) -> range:
+        start = self.idx(row, 0)
+        return range(start, start + self.ncols)
+
+    def col_indices(self, col: int) -> range:
+        start = self.idx(0, col)
+        return range(start, start + self.nrows * self.width, self.width)
+
+    def row(self, row: int) -> memoryview:
+        """Zero copy view of a row, border excluded"""
+        start = self.idx(row, 0)
+        return memoryview(self.cells)[start : start + self.ncols]
+
+    def array(self):
+        """
+        NumPy view of the cells, border included, (nrows + 2) x width;
+        shares memory with cells, and ravel() gives flat indices back
+        """
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(-1, self.width)
+
+    def col(self, col: int) -> bytes:
+        """Copy of a column, border excluded; columns aren't contiguous"""
+        r = self.col_indices(col)
+        return bytes(self.cells[r.start : r.stop : r.step])
@@ -0,0 +1,188 @@
+"""
+Half-open integer ranges, [start, stop), kept sorted and disjoint
+
+A RangeSet stores its ranges as two parallel lists of starts and stops,
+so locating the range around any int is a bisect. Overlapping or
+touching ranges are merged on construction, and every operation returns
+a new, normalized set:
+
+    seeds = RangeSet([(79, 93), (55, 68)])
+    seeds & RangeSet([(60, 80)])     # [(60, 68), (79, 80)]
+    low, high = seeds.split(60)      # below 60, and from 60 up
+    seeds.shift(10), seeds.size      # moved ranges; 27 ints covered
+
+A RangeMap is a sorted table of disjoint source ranges, each moved by
+its own delta; ints outside every rule map to themselves. Mapping a
+RangeSet through it splits each range at the rule edges it crosses,
+finding the first rule with a bisect rather than trying every rule:
+
+    table = RangeMap([(98, 100, -48), (50, 98, 2)])
+    table[79]                  # 81
+    table.apply(seeds)         # RangeSet of every mapped int
+"""
+from bisect import bisect_left, bisect_right
+
+
+class RangeSet:
+    """Sorted, disjoint and non-adjacent half-open int ranges"""
+
+    __slots__ = ("starts", "stops")
+
+    def __init__(self, ranges=()):
+        self.starts = []
+        self.stops = []
+        for start, stop in sorted(ranges):
+            if start >= stop:
+                # empty range
+                continue
+            if self.stops and start <= self.stops[-1]:
+                # overlaps or touches the previous range; merge
+                self.stops[-1] = max(self.stops[-1], stop)
+            else:
+                self.starts.append(start)
+                self.stops.append(stop)
+
+    @classmethod
+    def _from_sorted(cls, starts: list, stops: list):
+        """Wraps lists that are already sorted and disjoint"""
+        ranges = cls.__new__(cls)
+        ranges.starts = starts
+        ranges.stops = stops
+        return ranges
+
+    def __iter__(self):
+        return zip(self.starts, self.stops)
+
+    def __len__(self) -> int:
+        """Number of ranges, not ints; see size"""
+        return len(self.starts)
+
+    def __bool__(self) -> bool:
+        return bool(self.starts)
+
+    def __eq__(self, other) -> bool:
+        return self.starts == other.starts and self.stops == other.stops
+
+    def __contains__(self, x: int) -> bool:
+        i = bisect_right(self.starts, x) - 1
+        return i >= 0 and x < self.stops[i]
+
+    def __repr__(self) -> str:
+        return f"RangeSet({list(self)})"
+
+    @property
+    def size(self) -> int:
+        """Number of ints covered"""
+        return sum(self.stops) - sum(self.starts)
+
+    def min(self) -> int:
+        """Smallest int covered; raises ValueError if empty"""
+        if not self.starts:
+            raise ValueError("empty RangeSet")
+        return self.starts[0]
+
+    def __and__(self, other: "RangeSet") -> "RangeSet":
+        """Intersection, merging the two sorted lists in one pass"""
+        starts, stops = [], []
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            lo = max(self.starts[i], other.starts[j])
+            hi = min(self.stops[i], other.stops[j])
+            if lo < hi:
+                starts.append(lo)
+                stops.append(hi)
+            # drop whichever range ends first
+            if self.stops[i] < other.stops[j]:
+                i += 1
+            else:
+                j += 1
+        return RangeSet._from_sorted(starts, stops)
+
+    def __sub__(self, other: "RangeSet") -> "RangeSet":
+        """Difference; ints in self that are not in other"""
+        starts, stops = [], []
+        for start, stop in self:
+            # first range of other that ends after start
+            j = bisect_right(other.stops, start)
+            while j < len(other.starts) and other.starts[j] < stop:
+                if other.starts[j] > start:
+                    starts.append(start)
+                    stops.append(other.starts[j])
+                start = other.stops[j]
+                j += 1
+            if start < stop:
+                starts.append(start)
+                stops.append(stop)
+        return RangeSet._from_sorted(starts, stops)
+
+    def __or__(self, other: "RangeSet") -> "RangeSet":
+        return RangeSet([*self, *other])
+
+    def shift(self, delta: int) -> "RangeSet":
+        """Every range moved by delta"""
+        return RangeSet._from_sorted(
+            [start + delta for start in self.starts],
+            [stop + delta for stop in self.stops],
+        )
+
+    def split(self, at: int) -> tuple["RangeSet", "RangeSet"]:
+        """Returns the ints below at, and the ints from at upwards"""
+        # ranges wholly below, and the one straddling at, if any
+        i = bisect_right(self.stops, at)
+        j = bisect_left(self.starts, at)
+        low = RangeSet._from_sorted(self.starts[:j], self.stops[:i] + [at] * (j - i))
+        high = RangeSet._from_sorted([at] * (j - i) + self.starts[j:], self.stops[i:])
+        return low, high
+
+
+class RangeMap:
+    """
+    Disjoint half-open source ranges, each moved by its own delta
+    rules are (start, stop, delta); raises ValueError if any overlap
+    """
+
+    __slots__ = ("starts", "stops", "deltas")
+
+    def __init__(self, rules=()):
+        self.starts, self.stops, self.deltas = [], [], []
+        for start, stop, delta in sorted(rules):
+            if start >= stop:
+                continue
+            if self.stops and start < self.stops[-1]:
+                raise ValueError(f"rule [{start}, {stop}) overlaps another")
+            self.starts.append(start)
+            self.stops.append(stop)
+            self.deltas.append(delta)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, x: int) -> int:
+        """Maps one int"""
+        i = bisect_right(self.starts, x) - 1
+        if i >= 0 and x < self.stops[i]:
+            return x + self.deltas[i]
+        return x
+
+    def apply(self, ranges: RangeSet) -> RangeSet:
+        """Maps every int in ranges, splitting them at rule edges"""
+        pieces = []
+        n_rules = len(self.starts)
+        for start, stop in ranges:
+            # first rule that ends after start
+            i = bisect_right(self.stops, start)
+            while start < stop:
+                if i == n_rules or self.starts[i] >= stop:
+                    # no more rules overlap; the rest is unchanged
+                    pieces.append((start, stop))
+                    break
+                if self.starts[i] > start:
+                    # gap before the rule is unchanged
+                    pieces.append((start, self.starts[i]))
+                    start = self.starts[i]
+                end = min(stop, self.stops[i])
+                delta = self.deltas[i]
+                pieces.append((start + delta, end + delta))
+                start = end
+                i += 1
+        return RangeSet(pieces)
@@ -0,0 +1,182 @@
+"""
+Bounded memoization, by entry count or by approximate bytes
+
+functools.cache keeps every result for the life of the process, and a
+mutable default dict keeps them across every call of the function; in
+a long batch or bench run both grow with each input. BoundedCache is
+a pair of plain dicts with a limit on entries, bytes, or both; once
+over either, the older dict is dropped whole. A hit costs a dict
+lookup or two, and nothing is reordered:
+
+    cache = BoundedCache(max_entries=1 << 16)
+    if (hit := cache.get(key)) is not None:
+        return hit
+    cache[key] = value
+
+bounded_cache wraps a function the same way, keyed on its arguments
+as functools.cache is, so they must be hashable:
+
+    @bounded_cache(max_bytes=64 << 20)
+    def tilt(cells: bytes, ...) -> bytes:
+
+Sizes are only computed under max_bytes: sys.getsizeof of the value
+and of each argument, one level deep. A tuple argument counts its own
+slots, not what they point to, so shared objects passed on every call
+are not counted as copies.
+
+Both count hits, misses and evictions; the decorated function's
+cache_info() returns them with the current size. Its scope() gives the
+calls in a with block a fresh, empty store, dropped at the end, so
+results are reused within one solve but not kept for the next:
+
+    with tilt.scope():
+        ...
+"""
+import sys
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import wraps
+
+CacheInfo = namedtuple("CacheInfo", "hits misses evictions entries nbytes")
+_missing = object()
+
+
+def approx_size(key, value) -> int:
+    """Bytes of key and value, and of the items of a tuple key, not deeper"""
+    size = sys.getsizeof(key) + sys.getsizeof(value)
+    if type(key) is tuple:
+        size += sum(sys.getsizeof(k) for k in key)
+    return size
+
+
+class BoundedCache:
+    """
+    Mapping holding at most max_entries, and about max_bytes; None is no
+    limit. Entries go into a new generation; once that holds half of
+    either limit, the old generation is dropped whole and the new one
+    takes its place. A hit in the old generation moves the entry back
+    into the new, so what is still used survives: an approximate LRU
+    whose evictions cost nothing per entry
+    """
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        self.nbytes = 0
+        # each generation's entries, and sizes only under a byte limit
+        self._new, self._old = {}, {}
+        sized = max_bytes is not None
+        self._new_sizes, self._old_sizes = ({}, {}) if sized else (None, None)
+        self._new_bytes = 0
+        self._max_new = None if max_entries is None else max(1, max_entries // 2)
+
+    def get(self, key, default=None):
+        """The value for key, keeping it in the new generation, or default"""
+        value = self._new.get(key, _missing)
+        if value is _missing:
+            value = self._old.pop(key, _missing)
+            if value is _missing:
+                self.misses += 1
+                return default
+            size = 0
+            if self._old_sizes is not None:
+                size = self._old_sizes.pop(key)
+                self.nbytes -= size
+            self.put(key, value, size)
+        self.hits += 1
+        return value
+
+    def __contains__(self, key) -> bool:
+        return key in self._new or key in self._old
+
+    def __getitem__(self, key):
+        value = self.get(key, _missing)
+        if value is _missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if self._new_sizes is not None:
+            self.put(key, value, approx_size(key, value))
+            return
+        # put() without the sizes, as memos store on every miss
+        self._old.pop(key, None)
+        self._new[key] = value
+        if self._max_new is not None and len(self._new) >= self._max_new:
+            self._rotate()
+
+    def __len__(self) -> int:
+        return len(self._new) + len(self._old)
+
+    def put(self, key, value, size: int = 0):
+        """Stores value for key as size bytes, then evicts if over a limit"""
+        sizes = self._new_sizes
+        if key in self._old:
+            del self._old[key]
+            if sizes is not None:
+                self.nbytes -= self._old_sizes.pop(key)
+        if sizes is not None:
+            if key in sizes:
+                self.nbytes -= sizes[key]
+                self._new_bytes -= sizes[key]
+            sizes[key] = size
+            self.nbytes += size
+            self._new_bytes += size
+        self._new[key] = value
+        if (self._max_new is not None and len(self._new) >= self._max_new) or (
+            sizes is not None and 2 * self._new_bytes >= self.max_bytes
+        ):
+            self._rotate()
+
+    def _rotate(self):
+        """Drops the old generation; the new one becomes old"""
+        self.evictions += len(self._old)
+        if self._new_sizes is not None:
+            self.nbytes = self._new_bytes
+            self._old_sizes, self._new_sizes = self._new_sizes, {}
+            self._new_bytes = 0
+        self._old, self._new = self._new, {}
+
+    def clear(self):
+        """Drops every entry; the counters are kept"""
+        self._new, self._old = {}, {}
+        if self._new_sizes is not None:
+            self._new_sizes, self._old_sizes = {}, {}
+        self.nbytes = self._new_bytes = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.evictions, len(self), self.nbytes)
+
+
+def bounded_cache(max_entries: int = None, max_bytes: int = None):
+    """Memoizes a function in a BoundedCache keyed on its arguments"""
+
+    def decorate(func):
+        cache = BoundedCache(max_entries, max_bytes)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = args + tuple(sorted(kwargs.items())) if kwargs else args
+            value = cache.get(key, _missing)
+            if value is _missing:
+                value = func(*args, **kwargs)
+                cache[key] = value
+            return value
+
+        @contextmanager
+        def scope():
+            nonlocal cache
+            outer = cache
+            cache = BoundedCache(max_entries, max_bytes)
+            try:
+                yield cache
+            finally:
+                cache = outer
+
+        wrapper.cache_info = lambda: cache.info()
+        wrapper.cache_clear = lambda: cache.clear()
+        wrapper.scope = scope
+        return wrapper
+
+    return decorate
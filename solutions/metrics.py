@@ -0,0 +1,58 @@
+"""
+One JSON record per run of a day's main, for dashboards
+
+Every day's main takes --jsonl FILE and, after solving, appends a
+record of the run to FILE, or writes it to stdout for -:
+
+    python solutions/d14/day14.py -t --jsonl runs.jsonl
+
+The record has the fields of a runner Result, so runs of a day's main,
+the runner's --jsonl and batch output can be read the same way:
+
+    {"day": 14, "variant": "day14", "part": 2, "fp": "input.txt",
+     "answer": 104533, "error": null,
+     "phases": {"parse": 0.4, "index": 0.3, "solve": 512.1, "total": 513.0},
+     "memory": null, "cached": false, "digest": "9f3c...",
+     "counters": {"spins": 154, "tilt_hits": 0, ...},
+     "peak_rss_mib": 14.2, "finished": "2023-12-14T09:30:00+00:00"}
+
+counters are whatever the solver passed to timing.count. memory is
+only filled by the runner's --memory; peak_rss_mib is always there.
+"""
+from pathlib import Path
+import json
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+from solutions.timing import Recorder, peak_rss_mib
+
+
+def run_record(module_file: str, part_two: bool, fp, answer, timer: Recorder):
+    """A Result for one run of the day module at module_file"""
+    # every day imports this module; the runner, with its sqlite3 and
+    # cProfile imports, is only loaded once a record is wanted
+    from solutions.runner import Result, input_digest
+
+    path = Path(module_file)
+    return Result(
+        day=int(path.parent.name[1:]),
+        variant=path.stem,
+        part=2 if part_two else 1,
+        fp=str(fp),
+        answer=answer,
+        phases=timer.as_dict(),
+        digest=input_digest(fp),
+        counters=timer.counters,
+        peak_rss_mib=peak_rss_mib(),
+        finished=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+
+
+def emit(out: str, module_file: str, part_two: bool, fp, answer, timer: Recorder):
+    """Appends the run's record to the file out as a JSON line; - is stdout"""
+    line = json.dumps(asdict(run_record(module_file, part_two, fp, answer, timer)))
+    if out == "-":
+        print(line, flush=True)
+        return
+    with open(out, "a") as f:
+        f.write(line + "\n")
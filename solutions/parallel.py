@@ -0,0 +1,103 @@
+"""
+Parallel map and reduce over independent records
+
+Records are dispatched to a ProcessPoolExecutor in chunks, so each task
+amortizes pickling over many records, and only a bounded number of
+chunks is in flight so inputs stream rather than queue up in memory.
+With workers <= 1 everything runs serially in-process, so callers need
+no separate code path:
+
+    total = preduce(partial(score, part_two=part_two), read_line(fp), workers=n)
+
+func must be picklable, i.e. a module level function or a partial of
+one. Arguments bound with partial are pickled per chunk, so mutable
+state such as a memo dict is shared within a chunk, not across them.
+"""
+import operator
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial, reduce
+from itertools import islice
+
+CHUNKSIZE = 256
+
+
+def chunks(items, size: int):
+    """Yields lists of up to size items"""
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _map_chunk(func, chunk: list) -> list:
+    return [func(item) for item in chunk]
+
+
+def _reduce_chunk(func, reducer, chunk: list):
+    return reduce(reducer, map(func, chunk))
+
+
+def run_chunks(
+    task, items, workers: int, chunksize: int = CHUNKSIZE, ordered: bool = True
+):
+    """
+    Yields task(chunk) for each chunk of items from a pool of workers
+    ordered keeps chunk order; otherwise results come as they complete
+    """
+    inflight = 4 * workers
+    with ProcessPoolExecutor(workers) as pool:
+        if ordered:
+            pending = deque()
+            for chunk in chunks(items, chunksize):
+                pending.append(pool.submit(task, chunk))
+                if len(pending) >= inflight:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        else:
+            pending = set()
+            for chunk in chunks(items, chunksize):
+                pending.add(pool.submit(task, chunk))
+                if len(pending) >= inflight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+
+def pmap(
+    func, items, workers: int = 1, chunksize: int = CHUNKSIZE, ordered: bool = True
+):
+    """Yields func(item) for every item; in input order unless ordered=False"""
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    for results in run_chunks(
+        partial(_map_chunk, func), items, workers, chunksize, ordered
+    ):
+        yield from results
+
+
+def preduce(
+    func,
+    items,
+    reducer=operator.add,
+    initial=0,
+    workers: int = 1,
+    chunksize: int = CHUNKSIZE,
+    ordered: bool = True,
+):
+    """
+    Returns reduce(reducer, map(func, items), initial)
+    Each worker reduces its own chunk, so only one value per chunk comes
+    back. ordered=False is only safe for a commutative reducer
+    """
+    if workers <= 1:
+        return reduce(reducer, map(func, items), initial)
+    partials = run_chunks(
+        partial(_reduce_chunk, func, reducer), items, workers, chunksize, ordered
+    )
+    return reduce(reducer, partials, initial)
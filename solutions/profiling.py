@@ -0,0 +1,95 @@
+"""
+cProfile wrapper for any solve, used by the runner's --profile
+
+Each profiled call leaves two files next to each other:
+
+    <name>.pstats     load with pstats, snakeviz, etc.
+    <name>.collapsed  "a;b;c usec" lines for flamegraph.pl, speedscope,
+                      inferno and the like
+
+and prints the top-N functions by own time.
+"""
+from pathlib import Path
+import cProfile
+import pstats
+import sys
+from collections import defaultdict
+
+# stacks below this many microseconds are dropped from collapsed output
+MIN_USEC = 1
+
+
+def frame_label(func: tuple) -> str:
+    """module.py:line:name, or just the name for builtins"""
+    file, line, name = func
+    if file == "~":
+        # builtins; e.g. <method 'append' of 'list' objects>
+        return name.replace(";", ",")
+    return f"{Path(file).name}:{line}:{name}"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> dict[str, int]:
+    """
+    Returns {"a;b;c": usec of own time} approximated from the call graph
+    cProfile keeps only caller -> callee edges, not whole stacks, so a
+    function's time is split among its callers in proportion to the
+    cumulative time of each edge. Recursive edges are folded into the
+    first occurrence on the stack
+    """
+    entries = stats.stats
+    callees = defaultdict(dict)
+    roots = []
+    for func, (*_, callers) in entries.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            # edge is (cc, nc, tt, ct) for calls from caller only
+            callees[caller][func] = edge[3]
+    stacks = defaultdict(float)
+
+    def walk(func, path: tuple, on_stack: frozenset, share: float):
+        _, _, tt, ct, _ = entries[func]
+        path += (frame_label(func),)
+        stacks[";".join(path)] += tt * share
+        for callee, edge_ct in callees[func].items():
+            callee_ct = entries[callee][3]
+            if callee in on_stack or callee_ct <= 0:
+                continue
+            sub_share = share * min(1.0, edge_ct / callee_ct)
+            if callee_ct * sub_share * 1e6 >= MIN_USEC:
+                walk(callee, path, on_stack | {callee}, sub_share)
+
+    for root in roots:
+        walk(root, (), frozenset([root]), 1.0)
+    return {
+        stack: round(sec * 1e6)
+        for stack, sec in stacks.items()
+        if round(sec * 1e6) >= MIN_USEC
+    }
+
+
+def write_collapsed(stats: pstats.Stats, fp: Path):
+    with open(fp, "w") as f:
+        for stack, usec in sorted(collapsed_stacks(stats).items()):
+            f.write(f"{stack} {usec}\n")
+
+
+def profile_call(func, out: Path, top: int = 20, stream=sys.stdout):
+    """
+    Runs func() under cProfile and returns its result, writing
+    out.pstats and out.collapsed and printing the top functions by
+    own time. Only this process is profiled, not pool workers
+    """
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(func)
+    finally:
+        # profile what ran even if the solve raised
+        pstats_fp = out.with_name(out.name + ".pstats")
+        prof.dump_stats(pstats_fp)
+        stats = pstats.Stats(prof, stream=stream)
+        write_collapsed(stats, out.with_name(out.name + ".collapsed"))
+        print(f"profile: {pstats_fp}", file=stream)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Runs any subset of the daily solutions in a single process
+
+Every module under d<N>/ is a solver variant for day N, e.g. d12/memo12.py
+is variant "memo12" of day 12; dayN.py is the default variant. Modules
+are discovered by file name and only imported the first time they run.
+Each exposes solve(fp, part_two) -> answer, and optionally:
+
+SAMPLES: tuple
+    sample file names for (part one, part two); default sample.txt
+SAMPLE_KWARGS: dict
+    extra solve() arguments when running against the sample
+COMPLEXITY: dict
+    expected exponent of time against input size per part; see scaling.py
+
+Days whose records are independent also accept solve(..., workers=N)
+to spread them over N processes; see parallel.py
+"""
+from pathlib import Path
+import argparse
+import importlib
+import inspect
+import json
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import partial
+
+from solutions import aoc_tools, backend, profiling
+from solutions.answers import AnswerStore
+from solutions.timing import deadline, peak_rss_mib, record
+
+ROOT = Path(__file__).parent
+PACKAGE = "solutions"
+
+
+@dataclass(frozen=True)
+class Solver:
+    day: int
+    variant: str
+    path: Path
+
+    @property
+    def module_name(self) -> str:
+        return f"{PACKAGE}.d{self.day}.{self.variant}"
+
+    @property
+    def is_default(self) -> bool:
+        return self.variant == f"day{self.day}"
+
+    def load(self):
+        """Imports the module on first call; later calls hit sys.modules"""
+        return importlib.import_module(self.module_name)
+
+    def input_path(self, sample: bool = False, part_two: bool = False) -> Path:
+        """Puzzle input, or the sample for that part, next to the module"""
+        if not sample:
+            return self.path.parent / "input.txt"
+        samples = getattr(self.load(), "SAMPLES", ("sample.txt", "sample.txt"))
+        return self.path.parent / samples[part_two]
+
+    @property
+    def parallel(self) -> bool:
+        """Whether solve() takes a workers argument"""
+        return "workers" in inspect.signature(self.load().solve).parameters
+
+    def sample_kwargs(self, sample: bool = False) -> dict:
+        """Extra solve() arguments, which only the samples have"""
+        return getattr(self.load(), "SAMPLE_KWARGS", {}) if sample else {}
+
+    def solve(self, fp, part_two: bool = False, sample: bool = False, workers=1):
+        kwargs = self.sample_kwargs(sample)
+        if workers > 1 and self.parallel:
+            kwargs = kwargs | {"workers": workers}
+        return self.load().solve(str(fp), part_two, **kwargs)
+
+
+@dataclass
+class Result:
+    day: int
+    variant: str
+    part: int
+    fp: str
+    answer: int = None
+    error: str = None
+    # ms per phase the solver marked, plus total; see timing.py
+    phases: dict = None
+    # peak MiB per phase and top allocation sites, when tracing memory
+    memory: dict = None
+    # answered from the answer store rather than solved
+    cached: bool = False
+    # blake2b of the input bytes; None for stdin
+    digest: str = None
+    # totals the solver passed to timing.count
+    counters: dict = None
+    # the process's peak resident MiB so far, traced or not
+    peak_rss_mib: float = None
+    # UTC, to the second
+    finished: str = None
+
+
+def input_digest(fp) -> str:
+    """file_digest of fp, or None for stdin or a missing file"""
+    if str(fp) == aoc_tools.STDIN:
+        return None
+    try:
+        return aoc_tools.file_digest(str(fp))
+    except OSError:
+        return None
+
+
+def discover(root: Path = ROOT) -> dict:
+    """
+    Returns {(day, variant): Solver} for every module in root/d<N>/
+    Nothing is imported here
+    """
+    registry = {}
+    for path in root.glob("d*/*.py"):
+        if not (day := path.parent.name[1:]).isdigit():
+            continue
+        registry[int(day), path.stem] = Solver(int(day), path.stem, path)
+    return dict(sorted(registry.items()))
+
+
+REGISTRY = discover()
+
+
+def select(
+    days: list[int] = None, variants: list[str] = None, all_variants: bool = False
+) -> list[Solver]:
+    """
+    Filters the registry; with neither variants nor all_variants only the
+    default dayN variant of each day is returned
+    """
+    return [
+        solver
+        for (day, variant), solver in REGISTRY.items()
+        if (not days or day in days)
+        and (variant in variants if variants else (all_variants or solver.is_default))
+    ]
+
+
+def run(
+    solvers: list[Solver],
+    parts=(1, 2),
+    sample: bool = False,
+    fp: str = None,
+    workers: int = 1,
+    profile_dir: Path = None,
+    top: int = 20,
+    memory: bool = False,
+    answers: AnswerStore = None,
+    timeout: float = None,
+    digest: bool = False,
+):
+    """
+    Solves each part with each solver, yielding a Result as each finishes
+    A failing solver is recorded in Result.error instead of stopping the run,
+    as is one still solving after timeout seconds
+    With profile_dir, each solve is profiled into d<N>_<variant>_part<P>.*
+    memory traces allocations per phase, keeping the top sites
+    answers, if given, is checked before solving and stores new answers;
+    runs that profile or trace memory always solve
+    Result.digest is only filled with digest or answers, and each input
+    is hashed once per run, however many solvers and parts read it
+    """
+    digests = {}
+
+    def hashed(path) -> str:
+        if path not in digests:
+            digests[path] = input_digest(path)
+        return digests[path]
+
+    for solver in solvers:
+        for part in parts:
+            part_two = part == 2
+            path = fp or solver.input_path(sample, part_two)
+            result = Result(solver.day, solver.variant, part, str(path))
+            call = partial(solver.solve, path, part_two, sample, workers)
+            key = None
+            with record(memory) as timer:
+                try:
+                    # stdin cannot be hashed, so is never looked up
+                    if answers and (input_hash := hashed(path)):
+                        kwargs = solver.sample_kwargs(sample)
+                        key = answers.key(solver, part, path, kwargs, input_hash)
+                    if key and not (profile_dir or memory):
+                        result.cached, result.answer = answers.get(key)
+                    if not result.cached:
+                        if profile_dir:
+                            # keep the import out of the profile
+                            solver.load()
+                            out = (
+                                Path(profile_dir)
+                                / f"d{solver.day}_{solver.variant}_part{part}"
+                            )
+                            call = partial(profiling.profile_call, call, out, top)
+                        if timeout:
+                            with deadline(timeout):
+                                result.answer = call()
+                        else:
+                            result.answer = call()
+                        if key:
+                            answers.put(key, result.answer)
+                except TimeoutError:
+                    result.error = f"timed out after {timeout:g} s"
+                except Exception as e:
+                    result.error = f"{type(e).__name__}: {e}"
+            result.phases = timer.as_dict()
+            result.counters = timer.counters
+            result.peak_rss_mib = peak_rss_mib()
+            result.finished = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            if key or digest:
+                result.digest = hashed(path)
+            if memory:
+                result.memory = dict(
+                    peak_mib=timer.memory_dict(), top_sites=timer.top_sites(top)
+                )
+            yield result
+
+
+def main(
+    days: list[int],
+    parts: list[int],
+    variants: list[str],
+    all_variants: bool,
+    sample: bool,
+    loglevel: str,
+    use_mmap: bool = False,
+    parse_cache: bool = False,
+    workers: int = 1,
+    profile_dir: str = None,
+    top: int = 20,
+    phases: bool = False,
+    memory: bool = False,
+    answer_cache: bool = False,
+    use_numpy: bool = False,
+    jsonl: str = None,
+    timeout: float = None,
+):
+    """ """
+    # every solver logger is a child of the package logger
+    logging.getLogger(PACKAGE).setLevel(loglevel)
+    aoc_tools.USE_MMAP = use_mmap or aoc_tools.USE_MMAP
+    aoc_tools.USE_PARSE_CACHE = parse_cache or aoc_tools.USE_PARSE_CACHE
+    backend.USE_NUMPY = use_numpy or backend.USE_NUMPY
+    solvers = select(days, variants, all_variants)
+    answers = AnswerStore() if answer_cache else None
+    out = open(jsonl, "a") if jsonl and jsonl != "-" else None
+    for r in run(
+        solvers,
+        parts,
+        sample,
+        None,
+        workers,
+        profile_dir,
+        top,
+        memory,
+        answers,
+        timeout,
+        digest=bool(jsonl),
+    ):
+        outcome = r.answer if r.error is None else f"error: {r.error}"
+        if r.cached:
+            outcome = f"{outcome} (cached)"
+        print(f"day {r.day:>2}  {r.variant:<16} part {r.part}  {outcome}", flush=True)
+        if phases:
+            row = dict(day=r.day, variant=r.variant, part=r.part, fp=r.fp)
+            print(json.dumps(row | {"phases_ms": r.phases}), flush=True)
+        if memory:
+            row = dict(day=r.day, variant=r.variant, part=r.part, fp=r.fp)
+            print(json.dumps(row | r.memory), flush=True)
+        if jsonl:
+            print(json.dumps(asdict(r)), file=out, flush=True)
+    if out:
+        out.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    opt = parser.add_argument
+    opt("days", nargs="*", type=int, help="days to run; all if omitted")
+    opt("--part", "-p", type=int, choices=[1, 2], action="append")
+    opt("--variant", "-v", action="append", help="e.g. memo12; repeatable")
+    opt("--all_variants", "-a", action="store_true", default=False)
+    opt("--sample", "-s", action="store_true", default=False)
+    opt("--loglevel", "-l", type=str.upper, default="warning")
+    opt("--mmap", action="store_true", default=False, help="read inputs via mmap")
+    opt("--parse_cache", action="store_true", default=False, help="reuse parses")
+    opt("--workers", type=int, default=1, help="processes for days that split")
+    opt(
+        "--profile",
+        nargs="?",
+        const="profiles",
+        metavar="DIR",
+        help="cProfile each solve; .pstats and .collapsed saved to DIR",
+    )
+    opt("--top", type=int, default=20, help="entries shown by --profile/--memory")
+    opt("--phases", action="store_true", default=False, help="print ms per phase")
+    opt("--memory", action="store_true", default=False, help="peak MiB per phase")
+    opt(
+        "--answer_cache",
+        action="store_true",
+        default=False,
+        help="reuse answers for unchanged code and input",
+    )
+    opt("--numpy", action="store_true", default=False, help="vectorize if available")
+    opt("--jsonl", metavar="FILE", help="append a JSON record per result; - for stdout")
+    opt("--timeout", type=float, help="seconds before a solve is dropped")
+    args = parser.parse_args()
+    main(
+        args.days,
+        args.part or [1, 2],
+        args.variant,
+        args.all_variants,
+        args.sample,
+        args.loglevel,
+        args.mmap,
+        args.parse_cache,
+        args.workers,
+        args.profile,
+        args.top,
+        args.phases,
+        args.memory,
+        args.answer_cache,
+        args.numpy,
+        args.jsonl,
+        args.timeout,
+    )
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Fits the empirical complexity of each solver over generated inputs
+
+Each day is run on a geometric series of generated inputs, scale
+start, start * factor, ... for --steps sizes. Time, and with --memory
+peak traced MiB, is fitted against input bytes on a log-log scale; the
+slope is the estimated exponent, e.g. ~1 for linear and ~2 for
+quadratic. Bytes rather than scale are the size, so grid days, whose
+cells grow with scale**2, are judged like the rest.
+
+    python -m solutions.scaling 11 14 15 --steps 6
+    python -m solutions.scaling 12 -v memo12 -v dp12 --memory --start 2
+
+A solver may declare its expected exponents per part,
+
+    COMPLEXITY = {2: 1.5}    # part 2 tries every edge entry, each O(n)
+
+and is otherwise expected to be linear. An exponent above the expected
+one plus --slack fails the solver, and the run exits 1. Once a solve
+takes longer than --budget seconds, that solver is not run on larger
+inputs, and a solve still going after --timeout seconds is abandoned;
+with fewer than three sizes left a solver cannot be judged.
+"""
+from pathlib import Path
+import argparse
+import logging
+import math
+import sys
+import tempfile
+from dataclasses import dataclass, field
+
+from solutions import backend
+from solutions.bench import time_solve
+from solutions.generate import GENERATORS, write_input
+from solutions.runner import PACKAGE, Solver, run, select
+from solutions.timing import deadline
+
+# exponent expected of a solver that declares none
+LINEAR = 1.0
+# fewest sizes worth fitting a line through
+MIN_POINTS = 3
+# exponent allowed over the expected one, for noise and log factors
+SLACK = 0.25
+
+
+@dataclass
+class Curve:
+    day: int
+    variant: str
+    part: int
+    expected: float
+    # (input bytes, median ms, peak MiB or None) per size that ran
+    points: list = field(default_factory=list)
+    error: str = None
+
+    def exponent(self, column: int = 1) -> float:
+        """Fitted time exponent, or memory's with column=2; None if unfit"""
+        pts = [(p[0], p[column]) for p in self.points if p[column]]
+        if len(pts) < MIN_POINTS:
+            return None
+        return fit_exponent(*zip(*pts))
+
+    def passed(self, slack: float = SLACK) -> bool:
+        """Neither exponent is above expected; unjudged curves pass"""
+        return all(
+            e is None or e <= self.expected + slack
+            for e in (self.exponent(1), self.exponent(2))
+        )
+
+
+def fit_exponent(sizes, values) -> float:
+    """Least squares slope of log(values) against log(sizes); None if unfit"""
+    # a generator may write the same bytes at several scales; keep the first
+    distinct = dict(zip(reversed(sizes), reversed(values)))
+    if len(distinct) < 2:
+        return None
+    xs = [math.log(s) for s in distinct]
+    ys = [math.log(v) for v in distinct.values()]
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    sxx = sum((x - x_mean) ** 2 for x in xs)
+    sxy = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    return sxy / sxx if sxx else None
+
+
+def expected_exponent(solver: Solver, part: int) -> float:
+    return getattr(solver.load(), "COMPLEXITY", {}).get(part, LINEAR)
+
+
+def generate_series(day: int, scales: list[float], root: Path, seed: int = 0):
+    """Writes one input per scale under root; returns their paths"""
+    return [
+        write_input(day, root / f"d{day}_x{scale:g}.txt", scale, seed)
+        for scale in scales
+    ]
+
+
+def measure(
+    solver: Solver,
+    part: int,
+    paths: list[Path],
+    reps: int = 3,
+    memory: bool = False,
+    budget: float = 10,
+    timeout: float = 120,
+) -> Curve:
+    """Times solver on each input, smallest first, until over budget"""
+    curve = Curve(solver.day, solver.variant, part, expected_exponent(solver, part))
+    for fp in paths:
+        try:
+            with deadline(timeout):
+                _, stats = time_solve(solver, fp, part == 2, False, warmup=0, reps=reps)
+        except Exception as e:
+            curve.error = f"{type(e).__name__}: {e}"
+            break
+        peak = None
+        if memory:
+            result = next(run([solver], [part], fp=fp, memory=True))
+            peak = result.memory["peak_mib"]["total"] if not result.error else None
+        curve.points.append((fp.stat().st_size, stats.median_ms, peak))
+        if stats.median_ms > budget * 1000:
+            break
+    return curve
+
+
+def print_curve(curve: Curve, slack: float = SLACK):
+    name = f"d{curve.day}/{curve.variant}/part{curve.part}"
+    for size, ms, peak in curve.points:
+        mib = "" if peak is None else f"{peak:>10.2f} MiB"
+        print(f"  {name:<32}{size / 1024:>12.1f} KiB{ms:>12.3f} ms{mib}")
+    if curve.error:
+        print(f"  {name:<32}error: {curve.error}")
+    fitted = [
+        f"{label} n^{e:.2f}"
+        for label, e in (("time", curve.exponent(1)), ("memory", curve.exponent(2)))
+        if e is not None
+    ]
+    if not fitted and len(curve.points) < MIN_POINTS:
+        verdict = "too few sizes to fit"
+    elif not fitted:
+        verdict = "unfit"
+    else:
+        verdict = "ok" if curve.passed(slack) else "FAIL"
+    print(
+        f"{name:<34}{', '.join(fitted) or '-'}  "
+        f"expected <= n^{curve.expected:.2f}  {verdict}",
+        flush=True,
+    )
+
+
+def main(
+    days: list[int],
+    parts: list[int],
+    variants: list[str],
+    all_variants: bool,
+    start: float,
+    factor: float,
+    steps: int,
+    reps: int,
+    memory: bool,
+    budget: float,
+    slack: float,
+    timeout: float = 120,
+    seed: int = 0,
+    keep: str = None,
+    use_numpy: bool = False,
+) -> int:
+    """ """
+    logging.getLogger(PACKAGE).setLevel("WARNING")
+    backend.USE_NUMPY = use_numpy or backend.USE_NUMPY
+    scales = [start * factor**i for i in range(steps)]
+    solvers = [s for s in select(days, variants, all_variants) if s.day in GENERATORS]
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(keep or tmp)
+        root.mkdir(parents=True, exist_ok=True)
+        series = {}
+        for solver in solvers:
+            if solver.day not in series:
+                series[solver.day] = generate_series(solver.day, scales, root, seed)
+            for part in parts:
+                curve = measure(
+                    solver, part, series[solver.day], reps, memory, budget, timeout
+                )
+                print_curve(curve, slack)
+                if not curve.passed(slack):
+                    failed.append(f"d{curve.day}/{curve.variant}/part{part}")
+    if failed:
+        print(f"above expected complexity: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    opt = parser.add_argument
+    opt("days", nargs="*", type=int, help="days to run; all generated if omitted")
+    opt("--part", "-p", type=int, choices=[1, 2], action="append")
+    opt("--variant", "-v", action="append", help="e.g. memo12; repeatable")
+    opt("--all_variants", "-a", action="store_true", default=False)
+    opt("--start", type=float, default=0.25, help="smallest generator scale")
+    opt("--factor", "-f", type=float, default=2, help="scale ratio between sizes")
+    opt("--steps", type=int, default=5, help="number of sizes")
+    opt("--reps", "-n", type=int, default=3)
+    opt("--memory", action="store_true", default=False, help="fit peak MiB too")
+    opt("--budget", type=float, default=10, help="seconds before sizes stop growing")
+    opt("--slack", type=float, default=SLACK, help="exponent allowed over expected")
+    opt("--timeout", type=float, default=120, help="seconds before a solve is dropped")
+    opt("--seed", "-r", type=int, default=0)
+    opt("--keep", metavar="DIR", help="write the inputs to DIR and keep them")
+    opt("--numpy", action="store_true", default=False, help="vectorize if available")
+    args = parser.parse_args()
+    sys.exit(
+        main(
+            args.days,
+            args.part or [1, 2],
+            args.variant,
+            args.all_variants,
+            args.start,
+            args.factor,
+            args.steps,
+            args.reps,
+            args.memory,
+            args.budget,
+            args.slack,
+            args.timeout,
+            args.seed,
+            args.keep,
+            args.numpy,
+        )
+    )
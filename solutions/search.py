@@ -0,0 +1,168 @@
+"""
+Graph search over integer states
+
+A day supplies only a neighbours function; the searches never look
+inside a state. Keeping states as plain ints, e.g. a flat Grid index,
+means hashing and comparing them runs at C speed. Composite states are
+packed into one int:
+
+    state = pack(pos, direction, run)     # pos << 8 | direction << 4 | run
+    pos, direction, run = unpack(state, 2)
+
+bfs(sources, neighbours)
+    neighbours(state) yields states; returns {state: depth}
+dijkstra(sources, neighbours, goal, heuristic=None)
+    neighbours(state) yields (state, weight); a heapq priority queue,
+    and A* when given an admissible heuristic(state)
+dial(sources, neighbours, goal, max_weight)
+    same contract as dijkstra, with a ring of buckets instead of a heap
+    for small int weights, e.g. the 1-9 heat losses of day 17
+bfs_array(n_states, sources, expand)
+    bfs on the NumPy backend, a layer per step; expand(frontier) maps an
+    array of states to an array of neighbours; returns an array of depths
+
+The weighted searches stop at the first state for which goal(state) is
+true and return (cost, state), or None if no goal can be reached. Pass
+a dict as parents to record each state's predecessor, for path().
+"""
+from heapq import heapify, heappop, heappush
+from math import inf
+
+from solutions.backend import np
+
+# bits per packed field; fields must be below 2**FIELD_BITS
+FIELD_BITS = 4
+FIELD_MASK = (1 << FIELD_BITS) - 1
+
+
+def pack(pos: int, *fields: int) -> int:
+    """Packs small non-negative fields below pos into one int"""
+    for field in fields:
+        pos = pos << FIELD_BITS | field
+    return pos
+
+
+def unpack(state: int, n_fields: int) -> tuple:
+    """Inverse of pack for n_fields fields; returns (pos, *fields)"""
+    fields = []
+    for _ in range(n_fields):
+        fields.append(state & FIELD_MASK)
+        state >>= FIELD_BITS
+    return state, *reversed(fields)
+
+
+def bfs(sources, neighbours, max_depth: int = None, goal=None) -> dict:
+    """
+    Returns {state: depth} for every state within max_depth steps of a
+    source, searching layer by layer. Stops early, with the layer
+    incomplete, once a state satisfying goal is reached
+    """
+    depth = dict.fromkeys(sources, 0)
+    frontier = list(depth)
+    d = 0
+    while frontier and (max_depth is None or d < max_depth):
+        d += 1
+        layer = []
+        for state in frontier:
+            for nxt in neighbours(state):
+                if nxt not in depth:
+                    depth[nxt] = d
+                    if goal is not None and goal(nxt):
+                        return depth
+                    layer.append(nxt)
+        frontier = layer
+    return depth
+
+
+def bfs_array(n_states: int, sources, expand, max_depth: int = None):
+    """
+    bfs() a whole layer at a time; states are ints below n_states and
+    expand(frontier) returns the frontier's neighbours as an int array,
+    repeats allowed. Returns an int32 array of each state's depth, -1
+    where unreached. Needs NumPy
+    """
+    depth = np.full(n_states, -1, dtype=np.int32)
+    frontier = np.unique(np.asarray(sources, dtype=np.intp))
+    depth[frontier] = 0
+    d = 0
+    while frontier.size and (max_depth is None or d < max_depth):
+        d += 1
+        layer = expand(frontier)
+        layer = layer[depth[layer] < 0]
+        # drop repeats without sorting: number each copy in depth itself,
+        # where the last write per state wins, and keep only the winners
+        order = -2 - np.arange(layer.size, dtype=np.int32)
+        depth[layer] = order
+        frontier = layer[depth[layer] == order]
+        depth[frontier] = d
+    return depth
+
+
+def dijkstra(sources, neighbours, goal, heuristic=None, parents: dict = None):
+    """
+    Returns (cost, state) for the cheapest state satisfying goal
+    With a heuristic that never overestimates the remaining cost, this
+    is A*: the queue is ordered by cost + heuristic(state)
+    """
+    dist = dict.fromkeys(sources, 0)
+    heap = [(heuristic(s) if heuristic else 0, 0, s) for s in dist]
+    heapify(heap)
+    while heap:
+        _, cost, state = heappop(heap)
+        if cost > dist[state]:
+            # stale entry; state was reached more cheaply since
+            continue
+        if goal(state):
+            return cost, state
+        for nxt, weight in neighbours(state):
+            alt = cost + weight
+            if alt < dist.get(nxt, inf):
+                dist[nxt] = alt
+                if parents is not None:
+                    parents[nxt] = state
+                priority = alt + heuristic(nxt) if heuristic else alt
+                heappush(heap, (priority, alt, nxt))
+    return None
+
+
+def dial(sources, neighbours, goal, max_weight: int, parents: dict = None):
+    """
+    Dijkstra for int weights in [0, max_weight] with a bucket queue
+    Every queued cost lies within max_weight of the current one, so
+    max_weight + 1 buckets, indexed by cost modulo their count, suffice
+    and each pop is O(1) instead of a heap's O(log n)
+    """
+    n_buckets = max_weight + 1
+    buckets = [[] for _ in range(n_buckets)]
+    dist = dict.fromkeys(sources, 0)
+    buckets[0].extend(dist)
+    queued = len(dist)
+    cost = 0
+    while queued:
+        bucket = buckets[cost % n_buckets]
+        while bucket:
+            state = bucket.pop()
+            queued -= 1
+            if dist[state] != cost:
+                # stale entry
+                continue
+            if goal(state):
+                return cost, state
+            for nxt, weight in neighbours(state):
+                alt = cost + weight
+                if alt < dist.get(nxt, inf):
+                    dist[nxt] = alt
+                    if parents is not None:
+                        parents[nxt] = state
+                    buckets[alt % n_buckets].append(nxt)
+                    queued += 1
+        cost += 1
+    return None
+
+
+def path(parents: dict, state) -> list:
+    """States from a source to state, following parents"""
+    route = [state]
+    while (state := parents.get(state)) is not None:
+        route.append(state)
+    return route[::-1]
@@ -0,0 +1,205 @@
+"""
+Named phase timing shared by every day
+
+Solvers mark their phases, conventionally read, parse, index, solve and
+output, either as a block or by decorating a function:
+
+    with phase("read"):
+        lines = read_lines(fp)
+
+    @phase("parse")
+    def parse(fp): ...
+
+Time is only recorded while a Recorder is active, and is summed per
+name, so a phase entered once per record adds up over the input. The
+recorder reports milliseconds per phase, in order of first entry, as a
+dict or a JSON string:
+
+    with record() as timer:
+        ans = solve(fp)
+    timer.as_dict()  # {"read": 0.4, "parse": 3.1, "solve": 12.8, "total": 16.4}
+
+Solvers may also expose counters, e.g. presses made or memo hits, for
+the recorder to report with its timings. Call count() once per solve
+with the totals, not per iteration:
+
+    count("presses", n_presses)
+    timer.counters  # {"presses": 4051}
+
+Outside a recorder, phase() and count() cost a list lookup and nothing
+else.
+Phases inside pool workers are not recorded; the parent's enclosing
+phase covers them.
+
+deadline(seconds) raises TimeoutError inside its block once seconds
+have passed, for tools that give up on a slow solve. It uses SIGALRM,
+so only works in the main thread.
+
+record(memory=True) also traces allocations with tracemalloc, which
+slows the code under it several times over. It keeps the peak traced
+bytes reached during each phase, and a snapshot from the end of the
+phase holding the most memory, to rank allocation sites:
+
+    timer.memory_dict()  # {"parse": 41.2, "solve": 57.9, "total": 57.9} MiB
+    timer.top_sites(5)   # [{"site": "day19.py:30", "kib": ..., "count": ...}]
+"""
+import json
+import resource
+import signal
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter_ns
+
+# innermost recorder last
+_active = []
+
+
+class Recorder:
+    """Accumulates nanoseconds, and optionally peak memory, per phase name"""
+
+    def __init__(self, memory: bool = False):
+        self.ns = {}
+        self.counters = {}
+        self.memory = memory
+        # peak traced bytes per phase
+        self.peak = {}
+        # (traced bytes, snapshot) at the end of the fullest phase
+        self.heaviest = None
+        # [name, peak so far] for each phase being traced, innermost last
+        self._open = []
+
+    def add(self, name: str, ns: int):
+        self.ns[name] = self.ns.get(name, 0) + ns
+
+    def _fold_peak(self):
+        """Credits the peak since the last reset to every open phase"""
+        _, peak = tracemalloc.get_traced_memory()
+        for entry in self._open:
+            entry[1] = max(entry[1], peak)
+        # so an inner phase only sees its own peak
+        tracemalloc.reset_peak()
+
+    def enter(self, name: str):
+        self._fold_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        self._open.append([name, current])
+
+    def leave(self):
+        self._fold_peak()
+        name, peak = self._open.pop()
+        self.peak[name] = max(self.peak.get(name, 0), peak)
+        current, _ = tracemalloc.get_traced_memory()
+        if self.heaviest is None or current > self.heaviest[0]:
+            self.heaviest = current, tracemalloc.take_snapshot()
+
+    def as_dict(self) -> dict[str, float]:
+        """Milliseconds per phase, plus total for the whole recording"""
+        return {name: round(ns / 1e6, 3) for name, ns in self.ns.items()}
+
+    def memory_dict(self) -> dict[str, float]:
+        """Peak traced MiB per phase; empty unless recording memory"""
+        return {name: round(b / 2**20, 3) for name, b in self.peak.items()}
+
+    def top_sites(self, n: int = 10) -> list[dict]:
+        """
+        Source lines holding the most memory at the end of the fullest
+        phase, i.e. what was still alive then, not every allocation made
+        """
+        if self.heaviest is None:
+            return []
+        snapshot = self.heaviest[1].filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                tracemalloc.Filter(False, __file__),
+            )
+        )
+        return [
+            {
+                "site": f"{Path(stat.traceback[0].filename).name}:"
+                f"{stat.traceback[0].lineno}",
+                "kib": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:n]
+        ]
+
+    def __str__(self):
+        return json.dumps(self.as_dict())
+
+
+@contextmanager
+def record(memory: bool = False):
+    """
+    Times every phase entered inside the block, plus the block as total
+    memory traces allocations too, starting tracemalloc if need be
+    """
+    recorder = Recorder(memory)
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    if memory:
+        recorder.enter("total")
+    _active.append(recorder)
+    start = perf_counter_ns()
+    try:
+        yield recorder
+    finally:
+        elapsed = perf_counter_ns() - start
+        _active.remove(recorder)
+        recorder.add("total", elapsed)
+        if memory:
+            recorder.leave()
+        if started:
+            tracemalloc.stop()
+
+
+def peak_rss_mib() -> float:
+    """
+    The process's peak resident MiB so far, which costs nothing to read
+    unlike tracing; it only grows, so later runs in a process inherit it
+    """
+    # KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 3)
+
+
+def count(name: str, n: int = 1):
+    """Adds n to counter name of the innermost recorder, if any"""
+    if _active:
+        counters = _active[-1].counters
+        counters[name] = counters.get(name, 0) + n
+
+
+@contextmanager
+def phase(name: str):
+    """Adds the time spent in the block, or decorated call, to phase name"""
+    if not _active:
+        yield
+        return
+    recorder = _active[-1]
+    if recorder.memory:
+        recorder.enter(name)
+    start = perf_counter_ns()
+    try:
+        yield
+    finally:
+        recorder.add(name, perf_counter_ns() - start)
+        if recorder.memory:
+            recorder.leave()
+
+
+def _expire(signum, frame):
+    raise TimeoutError("solve abandoned")
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Raises TimeoutError in the block once seconds have passed"""
+    previous = signal.signal(signal.SIGALRM, _expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
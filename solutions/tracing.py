@@ -0,0 +1,25 @@
+"""
+Debug tracing that costs nothing in hot loops when DEBUG is off
+
+logger.debug(f"...") formats its message, and makes the call, on every
+iteration even when the record is dropped. Instead, ask once per
+function call whether DEBUG is on, and keep the %-style message and
+its args behind that local flag:
+
+    trace = tracer(logger)
+    while node not in ends:
+        if trace:
+            trace("node %s going %s", node, d)
+
+With DEBUG off, each iteration pays one local truthiness check; no
+string is built and no logging call is made. The flag is re-read on
+every call of the function, so levels set later, e.g. by a day's main
+or the runner, still apply.
+"""
+import logging
+
+
+def tracer(logger: logging.Logger):
+    """Returns logger.debug if the logger emits DEBUG records, else None"""
+    # isEnabledFor caches its answer per level on the logger
+    return logger.debug if logger.isEnabledFor(logging.DEBUG) else None